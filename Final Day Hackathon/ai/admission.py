@@ -0,0 +1,123 @@
+# ai/admission.py
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, TypeVar
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Admission settings
+MAX_CONCURRENT_CONVERSIONS = int(os.getenv("LCNC_MAX_CONCURRENT_CONVERSIONS", "4"))
+MAX_QUEUED_CONVERSIONS = int(os.getenv("LCNC_MAX_QUEUED_CONVERSIONS", "16"))
+RETRY_AFTER_SECONDS = int(os.getenv("LCNC_RETRY_AFTER_SECONDS", "5"))
+
+class AdmissionRejected(Exception):
+    """Raised when both the running slots and the wait queue are full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many conversions in progress, retry later")
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Concurrency limiter with a bounded wait queue"""
+
+    def __init__(self, max_concurrent: int, max_queued: int, retry_after: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+    async def acquire(self) -> None:
+        """Take a running slot, waiting in the queue if needed; raises AdmissionRejected when it is full"""
+        if self._slots.locked() and self.queued >= self.max_queued:
+            self.rejected += 1
+            logger.warning(
+                f"Admission rejected: {self.in_flight} in flight, {self.queued} queued"
+            )
+            raise AdmissionRejected(self.retry_after)
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued
+        }
+
+admission = AdmissionController(
+    MAX_CONCURRENT_CONVERSIONS, MAX_QUEUED_CONVERSIONS, RETRY_AFTER_SECONDS
+)
+
+async def run_admitted(
+    items: Iterable[T],
+    run: Callable[[T], Awaitable[Any]],
+    concurrency: int
+) -> AsyncIterator[Any]:
+    """Run run(item) for every item on a pool of workers, yielding results in completion order.
+
+    The caller already holds one admission slot, which the first worker
+    runs on. Each other worker waits for a slot of its own per item, like
+    any request; if the wait queue is full, it hands the item back for the
+    slot-holding worker and stops, so under load the pool shrinks instead
+    of failing items. run must not raise.
+    """
+    pending: asyncio.Queue = asyncio.Queue()
+    total = 0
+    for item in items:
+        pending.put_nowait(item)
+        total += 1
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def holder() -> None:
+        # Keeps draining, including items handed back by the other workers
+        while True:
+            await results.put(await run(await pending.get()))
+
+    async def worker() -> None:
+        while not pending.empty():
+            item = pending.get_nowait()
+            try:
+                await admission.acquire()
+            except AdmissionRejected:
+                pending.put_nowait(item)
+                return
+            try:
+                await results.put(await run(item))
+            finally:
+                admission.release()
+
+    workers = [asyncio.create_task(holder())] + [
+        asyncio.create_task(worker()) for _ in range(max(0, min(concurrency, total) - 1))
+    ]
+    try:
+        for _ in range(total):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
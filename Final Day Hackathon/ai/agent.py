@@ -1,25 +1,103 @@
 # ai/agent.py
+import os
+import copy
 import json
+import uuid
+import operator
+import asyncio
 import logging
-from typing import Dict, Any, Annotated, TypedDict, Union, List
+import threading
+import time
+import weakref
+from typing import Dict, Any, Annotated, AsyncIterator, TypedDict, Union, List
 from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from html_parser_agent import create_html_parser_agent
 from component_mapper_agent import create_component_mapper_agent
 from layout_translator_agent import create_layout_translator_agent
 from rag_pattern_agent import create_rag_pattern_agent
 from compatibility_ranker_agent import create_compatibility_ranker_agent
+from component_pipeline import create_direct_node, astream_pipelined
+from single_call import use_single_call, convert_single_call, load_tokenizer
+from blob_store import close_blob_store, stash, load, aload, BlobNotFound
+from sectioning import (
+    split_into_sections, stitch_results, section_fingerprint, SECTION_SPLIT_CHARS, SECTION_CONCURRENCY
+)
+from conversion_store import get_conversion_store, content_hash
+from metrics import timed_node
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:  # checkpointing is optional
+    aiosqlite = None
+    AsyncSqliteSaver = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SQLite file for graph checkpoints; empty disables checkpointing and resume
+CHECKPOINT_DB = os.getenv("LCNC_CHECKPOINT_DB", "")
+
+# Deadline handling: below this per-node budget an agent node calls its tool
+# directly instead of running a ReAct loop...
+DEADLINE_DIRECT_SECONDS = float(os.getenv("LCNC_DEADLINE_DIRECT_MS", "8000")) / 1000
+# ...and above it, the loop gets one iteration per this much budget
+DEADLINE_ITERATION_SECONDS = float(os.getenv("LCNC_DEADLINE_ITERATION_MS", "5000")) / 1000
+
+# A node the router sends back to itself (it returned neither *_COMPLETE nor
+# an error) runs at most this many times in total, waiting
+# LCNC_NODE_RETRY_BACKOFF_MS, then twice that, ... (capped) between attempts
+NODE_MAX_ATTEMPTS = int(os.getenv("LCNC_NODE_MAX_ATTEMPTS", "3"))
+NODE_RETRY_BACKOFF_SECONDS = float(os.getenv("LCNC_NODE_RETRY_BACKOFF_MS", "500")) / 1000
+NODE_RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("LCNC_NODE_RETRY_BACKOFF_MAX_MS", "8000")) / 1000
+
+# Conversion profiles: which nodes run and whether they use ReAct agents or
+# call their main tool directly. "thorough" is the full agentic workflow.
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "nodes": ["HTML_PARSER", "COMPONENT_MAPPER", "LAYOUT_TRANSLATOR"],
+        "direct": True
+    },
+    "balanced": {
+        "nodes": ["HTML_PARSER", "COMPONENT_MAPPER", "LAYOUT_TRANSLATOR", "RAG_PATTERN", "COMPATIBILITY_RANKER"],
+        "direct": True
+    },
+    "thorough": {
+        "nodes": ["HTML_PARSER", "COMPONENT_MAPPER", "LAYOUT_TRANSLATOR", "RAG_PATTERN", "COMPATIBILITY_RANKER"],
+        "direct": False
+    }
+}
+DEFAULT_PROFILE = "thorough"
+
+class ConversionNotFound(Exception):
+    """Raised when resuming a conversion that has no checkpoints"""
+
+# State reducers. Nodes return only the keys they change; LAYOUT_TRANSLATOR
+# and RAG_PATTERN run in parallel and may both write these keys in the same
+# step, so they need merge rules.
+def _last_value(current: Any, update: Any) -> Any:
+    """Keep the most recent write"""
+    return update
+
+def _keep_error(current: Union[str, None], update: Union[str, None]) -> Union[str, None]:
+    """A branch that did not fail must not clear another branch's error"""
+    return update if update is not None else current
+
+def _add_counts(current: Union[Dict[str, int], None], update: Union[Dict[str, int], None]) -> Dict[str, int]:
+    """Add per-node counters; parallel branches each report their own"""
+    merged = dict(current or {})
+    for key, count in (update or {}).items():
+        merged[key] = merged.get(key, 0) + count
+    return merged
+
 # Define state type
 class WorkflowState(TypedDict):
     html_content: str
     css_content: str
-    current_agent: str
-    error: Union[str, None]
+    current_agent: Annotated[str, _last_value]
+    error: Annotated[Union[str, None], _keep_error]
     parsed_components: list
     mapped_components: list
     layout_structure: dict
@@ -28,27 +106,194 @@ class WorkflowState(TypedDict):
     pattern_metadata: dict
     ranking_metadata: dict
     responsive_config: dict
+    applied_patterns: list
+    compatibility: list
+    fixes: list
+    section: dict
+    profile: str
+    # Blob store run id; large values above are then handles into that store
+    blob_run: str
+    # Absolute deadline (epoch seconds) and the nodes that degraded to meet it
+    deadline: Union[float, None]
+    degraded_nodes: Annotated[list, operator.add]
+    # How many times each node has run in this conversion
+    node_attempts: Annotated[Dict[str, int], _add_counts]
+
+# ReAct agent factory for each workflow node
+_AGENT_FACTORIES = {
+    "HTML_PARSER": create_html_parser_agent,
+    "COMPONENT_MAPPER": create_component_mapper_agent,
+    "LAYOUT_TRANSLATOR": create_layout_translator_agent,
+    "RAG_PATTERN": create_rag_pattern_agent,
+    "COMPATIBILITY_RANKER": create_compatibility_ranker_agent
+}
+
+# Large node outputs kept in the run's blob store instead of inline in the state
+_STASHED_KEYS = ("parsed_components", "mapped_components")
+
+def _stash_outputs(node: Any) -> Any:
+    """Wrap a node so its large outputs are stored once and passed on by handle"""
+    async def run(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        update = await node(state, config)
+        for key in _STASHED_KEYS:
+            if key in update:
+                update[key] = await asyncio.to_thread(stash, state, update[key])
+        return update
+    return run
+
+# Position of each node on the workflow's critical path
+_NODE_DEPTH = {
+    "HTML_PARSER": 0,
+    "COMPONENT_MAPPER": 1,
+    "LAYOUT_TRANSLATOR": 2,
+    "RAG_PATTERN": 2,
+    "COMPATIBILITY_RANKER": 3
+}
+# AgentExecutor's default iteration limit, used when there is no deadline
+AGENT_MAX_ITERATIONS = 15
+# Nodes whose output the result can do without when time runs out
+_SKIPPABLE_NODES = {"LAYOUT_TRANSLATOR", "RAG_PATTERN", "COMPATIBILITY_RANKER"}
+# Nodes after the fan-out: no self-loop edge, since each runs once before the join
+_BRANCH_NODES = {"LAYOUT_TRANSLATOR", "RAG_PATTERN"}
+
+def _with_deadline(name: str, node: Any, direct: Any, stages_left: int, iterative: bool) -> Any:
+    """Wrap a node so it degrades instead of overrunning state["deadline"].
+
+    The remaining time is shared between this node and the stages after it.
+    An agent node gets a ReAct iteration cap that fits its share, and falls
+    back to the direct tool call when the share is too small or the capped
+    agent overruns or fails. Once the deadline has passed, optional stages
+    are skipped. Every degradation is recorded in degraded_nodes. A resumed
+    run passes its own deadline in config["configurable"]["deadline"].
+    """
+    async def run(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        configurable = (config or {}).get("configurable", {})
+        deadline = configurable["deadline"] if "deadline" in configurable else state.get("deadline")
+        if not deadline or state.get("error"):
+            return await node(state)
+        section = (state.get("section") or {}).get("name")
+
+        def degraded(mode: str, update: Dict[str, Any], **details: Any) -> Dict[str, Any]:
+            entry = {"node": name, "mode": mode, **details}
+            if section:
+                entry["section"] = section
+            logger.warning(f"{name}: degraded ({mode}) to meet the deadline")
+            return {**update, "degraded_nodes": [entry]}
+
+        def out_of_time() -> Dict[str, Any]:
+            if name in _SKIPPABLE_NODES:
+                return degraded("skipped", {"current_agent": f"{name}_COMPLETE"})
+            return {"error": f"{name}: deadline exceeded", "current_agent": "ERROR"}
+
+        async def run_direct(reason: str) -> Dict[str, Any]:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return out_of_time()
+            try:
+                update = await asyncio.wait_for(direct(state), timeout=remaining)
+            except asyncio.TimeoutError:
+                return out_of_time()
+            return degraded("direct", update, reason=reason)
+
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return out_of_time()
+        if not iterative:
+            # Nodes without a ReAct loop have nothing lighter to fall back to
+            try:
+                return await asyncio.wait_for(node(state), timeout=remaining)
+            except asyncio.TimeoutError:
+                return out_of_time()
 
-def create_workflow_graph() -> StateGraph:
-    """Create the workflow graph using LangGraph"""
-    logger.info("Creating workflow graph")
+        budget = remaining / stages_left
+        if budget < DEADLINE_DIRECT_SECONDS:
+            return await run_direct("budget below LCNC_DEADLINE_DIRECT_MS")
+
+        cap = int(budget / DEADLINE_ITERATION_SECONDS)
+        if cap < 1:
+            # Possible when LCNC_DEADLINE_ITERATION_MS exceeds LCNC_DEADLINE_DIRECT_MS
+            return await run_direct("budget below LCNC_DEADLINE_ITERATION_MS")
+        capped = cap < AGENT_MAX_ITERATIONS
+        try:
+            update = await asyncio.wait_for(
+                node({**state, "max_iterations": cap} if capped else state), timeout=budget
+            )
+        except asyncio.TimeoutError:
+            return await run_direct("agent overran its budget")
+        if not capped:
+            return update
+        if update.get("error"):
+            # Most likely stopped at the cap without a final answer
+            return await run_direct(f"capped agent failed: {update['error']}")
+        return degraded("capped", update, max_iterations=cap)
+
+    return run
+
+def _with_attempts(name: str, node: Any, self_loop: bool = True) -> Any:
+    """Wrap a node so its retries are bounded.
+
+    Each run adds one to node_attempts[name]. A retry first waits an
+    exponential backoff (never past the deadline), and the attempt that
+    reaches NODE_MAX_ATTEMPTS without completing ends the run with an error
+    instead of being routed back again. The parallel branch nodes have no
+    self-loop edge (each must run once before the join), so with
+    self_loop=False the retries happen here, in place. A resumed run passes
+    the counts it starts from in config["configurable"]["attempts_base"],
+    so it gets a fresh budget.
+    """
+    async def run(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        configurable = (config or {}).get("configurable", {})
+        base = (configurable.get("attempts_base") or {}).get(name, 0)
+        attempts = (state.get("node_attempts") or {}).get(name, 0) - base
+        runs = 0
+        while True:
+            if attempts > 0:
+                delay = min(NODE_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), NODE_RETRY_BACKOFF_MAX_SECONDS)
+                deadline = configurable["deadline"] if "deadline" in configurable else state.get("deadline")
+                if deadline:
+                    delay = min(delay, max(deadline - time.time(), 0))
+                logger.warning(f"{name}: did not complete, retrying (attempt {attempts + 1}) in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            update = await node(state, config)
+            attempts += 1
+            runs += 1
+            complete = bool(update.get("error") or state.get("error")
+                            or update.get("current_agent") == f"{name}_COMPLETE")
+            if complete or self_loop or attempts >= NODE_MAX_ATTEMPTS:
+                break
+
+        update = {**update, "node_attempts": {name: runs}}
+        if not complete and attempts >= NODE_MAX_ATTEMPTS:
+            logger.error(f"{name}: no result after {attempts} attempts")
+            update.update({
+                "error": f"{name}: did not complete after {attempts} attempts (LCNC_NODE_MAX_ATTEMPTS)",
+                "current_agent": "ERROR"
+            })
+        return update
+
+    return run
+
+def create_workflow_graph(checkpointer: Any = None, profile: str = DEFAULT_PROFILE) -> StateGraph:
+    """Create the workflow graph for a conversion profile using LangGraph"""
+    logger.info(f"Creating workflow graph ({profile})")
+    settings = PROFILES[profile]
+    full = "COMPATIBILITY_RANKER" in settings["nodes"]
     
     # Create workflow graph with state schema
     workflow = StateGraph(WorkflowState)
     
-    # Create agents
-    html_parser = create_html_parser_agent()
-    component_mapper = create_component_mapper_agent()
-    layout_translator = create_layout_translator_agent()
-    rag_pattern = create_rag_pattern_agent()
-    compatibility_ranker = create_compatibility_ranker_agent()
-    
-    # Add nodes
-    workflow.add_node("HTML_PARSER", html_parser)
-    workflow.add_node("COMPONENT_MAPPER", component_mapper)
-    workflow.add_node("LAYOUT_TRANSLATOR", layout_translator)
-    workflow.add_node("RAG_PATTERN", rag_pattern)
-    workflow.add_node("COMPATIBILITY_RANKER", compatibility_ranker)
+    # Add nodes: ReAct agents, or direct tool calls for the lighter profiles.
+    # The direct call doubles as the agent's fallback when a deadline is close.
+    depth = max(_NODE_DEPTH[node] for node in settings["nodes"])
+    for node in settings["nodes"]:
+        direct = create_direct_node(node)
+        run = direct if settings["direct"] else _AGENT_FACTORIES[node]()
+        stages_left = depth - _NODE_DEPTH[node] + 1
+        # The RAG agent retrieves deterministically, without a ReAct loop
+        iterative = not settings["direct"] and node != "RAG_PATTERN"
+        workflow.add_node(node, timed_node(node, _stash_outputs(_with_attempts(
+            node, _with_deadline(node, run, direct, stages_left, iterative), self_loop=node not in _BRANCH_NODES
+        ))))
     
     # Define conditional routing
     def route_to_mapper(state: Dict) -> str:
@@ -59,30 +304,15 @@ def create_workflow_graph() -> StateGraph:
             return "COMPONENT_MAPPER"
         return "HTML_PARSER"
     
-    def route_to_translator(state: Dict) -> str:
-        """Route to layout translator if component mapping succeeded"""
+    def route_to_branches(state: Dict) -> Union[str, List[str]]:
+        """Fan out to the layout translator and RAG pattern agent, which both
+        only need mapped_components, once component mapping succeeded"""
         if state.get("error"):
             return "ERROR"
         if state.get("current_agent") == "COMPONENT_MAPPER_COMPLETE":
-            return "LAYOUT_TRANSLATOR"
+            return ["LAYOUT_TRANSLATOR", "RAG_PATTERN"] if full else "LAYOUT_TRANSLATOR"
         return "COMPONENT_MAPPER"
     
-    def route_to_rag(state: Dict) -> str:
-        """Route to RAG pattern agent if layout translation succeeded"""
-        if state.get("error"):
-            return "ERROR"
-        if state.get("current_agent") == "LAYOUT_TRANSLATOR_COMPLETE":
-            return "RAG_PATTERN"
-        return "LAYOUT_TRANSLATOR"
-    
-    def route_to_ranker(state: Dict) -> str:
-        """Route to compatibility ranker if RAG pattern matching succeeded"""
-        if state.get("error"):
-            return "ERROR"
-        if state.get("current_agent") == "RAG_PATTERN_COMPLETE":
-            return "COMPATIBILITY_RANKER"
-        return "RAG_PATTERN"
-    
     def route_to_end(state: Dict) -> str:
         """Route to 'end' string so conditional edge mapping matches the END node"""
         if state.get("error") or state.get("current_agent") == "COMPATIBILITY_RANKER_COMPLETE":
@@ -102,50 +332,39 @@ def create_workflow_graph() -> StateGraph:
     
     workflow.add_conditional_edges(
         "COMPONENT_MAPPER",
-        route_to_translator,
+        route_to_branches,
         {
             "LAYOUT_TRANSLATOR": "LAYOUT_TRANSLATOR",
+            **({"RAG_PATTERN": "RAG_PATTERN"} if full else {}),
             "ERROR": "ERROR",
             "COMPONENT_MAPPER": "COMPONENT_MAPPER"
         }
     )
     
-    workflow.add_conditional_edges(
-        "LAYOUT_TRANSLATOR",
-        route_to_rag,
-        {
-            "RAG_PATTERN": "RAG_PATTERN",
-            "ERROR": "ERROR",
-            "LAYOUT_TRANSLATOR": "LAYOUT_TRANSLATOR"
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        "RAG_PATTERN",
-        route_to_ranker,
-        {
-            "COMPATIBILITY_RANKER": "COMPATIBILITY_RANKER",
-            "ERROR": "ERROR",
-            "RAG_PATTERN": "RAG_PATTERN"
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        "COMPATIBILITY_RANKER",
-        route_to_end,
-        {
-            "end": END,
-            "COMPATIBILITY_RANKER": "COMPATIBILITY_RANKER"
-        }
-    )
+    if full:
+        # Join: the ranker runs once both branches have finished. _with_attempts
+        # retries a branch in place and turns one that never completes into an
+        # error, so both end in *_COMPLETE or ERROR; the ranker skips work on error.
+        workflow.add_edge(["LAYOUT_TRANSLATOR", "RAG_PATTERN"], "COMPATIBILITY_RANKER")
+        
+        workflow.add_conditional_edges(
+            "COMPATIBILITY_RANKER",
+            route_to_end,
+            {
+                "end": END,
+                "COMPATIBILITY_RANKER": "COMPATIBILITY_RANKER"
+            }
+        )
+    else:
+        # Fast profile: the layout is the last stage
+        workflow.add_edge("LAYOUT_TRANSLATOR", END)
     
     # Add error handling
     def handle_error(state: Dict) -> Dict:
         """Handle error state"""
         return {
-            **state,
             "current_agent": "ERROR",
-            "error": state.get("error", "Unknown error occurred")
+            "error": state.get("error") or "Unknown error occurred"
         }
     
     workflow.add_node("ERROR", handle_error)
@@ -154,63 +373,739 @@ def create_workflow_graph() -> StateGraph:
     workflow.set_entry_point("HTML_PARSER")
     
     # Compile the graph
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+# Process-wide registry of compiled workflow graphs, one per profile. Building
+# the thorough graph creates all five agents (LLM client, ReAct prompt and
+# AgentExecutor each), so it is done once and shared by every request.
+_workflow_graphs: Dict[str, Any] = {}
+_workflow_lock = threading.Lock()
+_workflow_ready = threading.Event()
+
+def get_workflow_graph(profile: str = DEFAULT_PROFILE):
+    """Return the shared compiled workflow graph for a profile, building it on first use"""
+    graph = _workflow_graphs.get(profile)
+    if graph is None:
+        with _workflow_lock:
+            graph = _workflow_graphs.get(profile)
+            if graph is None:
+                graph = create_workflow_graph(profile=profile)
+                _workflow_graphs[profile] = graph
+    return graph
+
+# Checkpointed graphs are bound to the event loop their SQLite connection was
+# opened on, so each loop (the server's, the sync wrapper's) gets its own
+# connection, shared by all profiles, and its own graphs
+_checkpointed_graphs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_checkpoint_saver: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+# Serializes opening the connection and building the graphs on each loop, so
+# concurrent first requests neither open extra connections nor replace graphs
+_checkpoint_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+def _checkpointing_enabled() -> bool:
+    if not CHECKPOINT_DB:
+        return False
+    if AsyncSqliteSaver is None:
+        logger.warning("LCNC_CHECKPOINT_DB is set but langgraph-checkpoint-sqlite is not installed")
+        return False
+    return True
+
+async def aget_workflow_graph(profile: str = DEFAULT_PROFILE):
+    """Return the shared workflow graph for a profile, with a SQLite checkpointer when enabled"""
+    if not _checkpointing_enabled():
+        return get_workflow_graph(profile)
+
+    loop = asyncio.get_running_loop()
+    graph = _checkpointed_graphs.get(loop, {}).get(profile)
+    if graph is not None:
+        return graph
+
+    lock = _checkpoint_locks.get(loop)
+    if lock is None:
+        lock = _checkpoint_locks[loop] = asyncio.Lock()
+    async with lock:
+        saver = _checkpoint_saver.get(loop)
+        if saver is None:
+            os.makedirs(os.path.dirname(CHECKPOINT_DB) or ".", exist_ok=True)
+            saver = _checkpoint_saver[loop] = AsyncSqliteSaver(await aiosqlite.connect(CHECKPOINT_DB))
+        graphs = _checkpointed_graphs.setdefault(loop, {})
+        graph = graphs.get(profile)
+        if graph is None:
+            graph = graphs[profile] = await asyncio.to_thread(create_workflow_graph, saver, profile)
+    return graph
+
+async def aclose_workflow_checkpointer() -> None:
+    """Close the checkpoint database connection opened on the running loop"""
+    loop = asyncio.get_running_loop()
+    saver = _checkpoint_saver.pop(loop, None)
+    _checkpointed_graphs.pop(loop, None)
+    if saver is not None:
+        await saver.conn.close()
+
+def _build_workflow_graphs() -> None:
+    for profile in PROFILES:
+        get_workflow_graph(profile)
+    # The single-call size check needs the tokenizer, which may be downloaded
+    load_tokenizer()
+
+def warm_up_workflow() -> None:
+    """Build the shared workflow graph of every profile ahead of the first request.
+    Checkpointed graphs belong to an event loop; a server uses awarm_up_workflow."""
+    logger.info("Warming up workflow graphs")
+    _build_workflow_graphs()
+    _workflow_ready.set()
+    logger.info("Workflow graphs ready")
+
+async def awarm_up_workflow() -> None:
+    """Build every graph requests on the running loop will use, then mark the workflow
+    ready. With LCNC_CHECKPOINT_DB these are the checkpointed graphs."""
+    logger.info("Warming up workflow graphs")
+    await asyncio.to_thread(_build_workflow_graphs)
+    if _checkpointing_enabled():
+        for profile in PROFILES:
+            await aget_workflow_graph(profile)
+    _workflow_ready.set()
+    logger.info("Workflow graphs ready")
+
+def is_workflow_ready() -> bool:
+    """Whether warm-up has finished and requests will not pay for graph creation"""
+    return _workflow_ready.is_set()
+
+def create_initial_state(
+    html_content: str,
+    css_content: str,
+    profile: str = DEFAULT_PROFILE,
+    blob_run: Union[str, None] = None,
+    deadline: Union[float, None] = None
+) -> WorkflowState:
+    """Create the state a conversion starts from.
+
+    With a blob_run, large inputs and stage outputs are kept in that run's
+    blob store and the state only carries handles to them. deadline is an
+    absolute time.time() by which the run should finish.
+    """
+    state = {"blob_run": blob_run} if blob_run else {}
+    return {
+        "html_content": stash(state, html_content),
+        "css_content": stash(state, css_content),
+        "profile": profile,
+        "deadline": deadline,
+        "degraded_nodes": [],
+        "node_attempts": {},
+        **state,
+        "current_agent": "START",
+        "error": None,
+        "parsed_components": [],
+        "mapped_components": [],
+        "layout_structure": {},
+        "matched_patterns": [],
+        "ranked_components": [],
+        "pattern_metadata": {},
+        "ranking_metadata": {},
+        "responsive_config": {}
+    }
+
+def build_conversion_result(final_state: Dict[str, Any], conversion_id: Union[str, None] = None) -> Dict[str, Any]:
+    """Turn the final workflow state into the conversion result"""
+    # Decide which structure to return for LCNC rendering
+    lcnc_structure = load(
+        final_state.get("layout_structure")
+        or final_state.get("optimized_components")
+        or final_state.get("mapped_components")
+        or final_state.get("parsed_components")
+        or []
+    )
+
+    # Build analysis report by gathering everything that is useful for consumers
+    analysis_report = {
+        "matched_patterns": final_state.get("matched_patterns", []),
+        "pattern_metadata": final_state.get("pattern_metadata", {}),
+        "compatibility": final_state.get("compatibility", []),
+        "fixes": final_state.get("fixes", []),
+        "ranking_metadata": final_state.get("ranking_metadata", {}),
+        "responsive_config": final_state.get("responsive_config", {}),
+        "degraded_nodes": final_state.get("degraded_nodes", []),
+        "attempts": final_state.get("node_attempts", {}),
+        "workflow_agent": final_state.get("current_agent")
+    }
+
+    return {
+        "conversion_id": conversion_id,
+        "profile": final_state.get("profile", DEFAULT_PROFILE),
+        "error": final_state.get("error"),
+        "lcnc_structure": lcnc_structure,
+        "analysis_report": analysis_report
+    }
+
+# Raw inputs are not echoed back in per-stage progress events
+_STREAM_EXCLUDED_KEYS = {"html_content", "css_content"}
 
-def process_html_to_lcnc(html_content: str, css_content: str) -> Dict[str, Any]:
-    """Process HTML/CSS content through the agent workflow"""
-    logger.info("Starting HTML to LCNC conversion")
+async def _astream_workflow(
+    workflow: Any,
+    graph_input: Union[Dict[str, Any], None],
+    config: Dict[str, Any],
+    conversion_id: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream a workflow run as stage events followed by one result event"""
+    started = time.perf_counter()
+    final_state: Dict[str, Any] = {}
     
     try:
-        # Create initial state
-        initial_state: WorkflowState = {
-            "html_content": html_content,
-            "css_content": css_content,
-            "current_agent": "START",
-            "error": None,
-            "parsed_components": [],
-            "mapped_components": [],
-            "layout_structure": {},
-            "matched_patterns": [],
-            "ranked_components": [],
-            "pattern_metadata": {},
-            "ranking_metadata": {},
-            "responsive_config": {}
-        }
-        
-        # Create and run workflow
-        workflow = create_workflow_graph()
-        final_state = workflow.invoke(initial_state)
+        async for mode, chunk in workflow.astream(
+            graph_input,
+            config,
+            stream_mode=["updates", "values"]
+        ):
+            if mode == "values":
+                final_state = chunk
+                continue
+            for node, update in chunk.items():
+                yield {
+                    "event": "stage",
+                    "node": node,
+                    "data": {
+                        key: await aload(value) for key, value in (update or {}).items()
+                        if key not in _STREAM_EXCLUDED_KEYS
+                    },
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+                }
+        # Building the result may read spilled blobs
+        result = await asyncio.to_thread(build_conversion_result, final_state, conversion_id)
+        yield {"event": "result", "data": result}
         
-        # Decide which structure to return for LCNC rendering
-        lcnc_structure = (
-            final_state.get("layout_structure")
-            or final_state.get("optimized_components")
-            or final_state.get("mapped_components")
-            or final_state.get("parsed_components")
-            or []
-        )
-
-        # Build analysis report by gathering everything that is useful for consumers
-        analysis_report = {
-            "matched_patterns": final_state.get("matched_patterns", []),
-            "pattern_metadata": final_state.get("pattern_metadata", {}),
-            "compatibility": final_state.get("compatibility", []),
-            "fixes": final_state.get("fixes", []),
-            "ranking_metadata": final_state.get("ranking_metadata", {}),
-            "responsive_config": final_state.get("responsive_config", {}),
-            "workflow_agent": final_state.get("current_agent")
+    except Exception as e:
+        logger.error(f"Error in workflow execution: {str(e)}")
+        yield {
+            "event": "result",
+            "data": {
+                "conversion_id": conversion_id,
+                "error": f"Workflow execution error: {str(e)}",
+                "lcnc_structure": [],
+                "analysis_report": {}
+            }
         }
 
+# Stages that follow the single call for profiles that rank components. Both
+# can be skipped, so under a deadline they are cut off and reported as skipped
+_SINGLE_CALL_FOLLOW_UP = {
+    node: _with_deadline(node, create_direct_node(node), create_direct_node(node), 1, False)
+    for node in ("RAG_PATTERN", "COMPATIBILITY_RANKER")
+}
+
+async def _astream_single_call(
+    state: Dict[str, Any],
+    update: Dict[str, Any],
+    started: float,
+    conversion_id: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream a fast-path run: the single call's output, then pattern matching
+    and ranking (run together, direct, within state["deadline"]) when the
+    profile includes them"""
+    def event(node: str, data: Dict[str, Any]) -> Dict[str, Any]:
         return {
-            "error": final_state.get("error"),
-            "lcnc_structure": lcnc_structure,
-            "analysis_report": analysis_report
+            "event": "stage",
+            "node": node,
+            "data": data,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
         }
-        
-    except Exception as e:
-        logger.error(f"Error in workflow execution: {str(e)}")
-        return {
-            "error": f"Workflow execution error: {str(e)}",
-            "lcnc_structure": [],
-            "analysis_report": {}
-        }
\ No newline at end of file
+
+    state.update(update)
+    yield event("SINGLE_CALL", update)
+    if "COMPATIBILITY_RANKER" in PROFILES[state["profile"]]["nodes"]:
+        nodes = list(_SINGLE_CALL_FOLLOW_UP)
+        updates = await asyncio.gather(*(_SINGLE_CALL_FOLLOW_UP[node](state, {}) for node in nodes))
+        for node, node_update in zip(nodes, updates):
+            state.update({
+                **node_update,
+                "error": node_update.get("error") or state.get("error"),
+                "degraded_nodes": state["degraded_nodes"] + node_update.get("degraded_nodes", [])
+            })
+            yield event(node, node_update)
+    result = await asyncio.to_thread(build_conversion_result, state, conversion_id)
+    result["analysis_report"]["single_call"] = True
+    yield {"event": "result", "data": result}
+
+def _section_thread_id(conversion_id: str, index: int) -> str:
+    """Checkpoint thread of one section of a sectioned conversion"""
+    return f"{conversion_id}:section-{index}"
+
+async def _merge_streams(streams: List[AsyncIterator[Dict[str, Any]]]) -> AsyncIterator[Any]:
+    """Run several event streams concurrently, yielding (index, event) as events arrive"""
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    limit = asyncio.Semaphore(SECTION_CONCURRENCY)
+
+    async def pump(index: int, stream: AsyncIterator[Dict[str, Any]]) -> None:
+        try:
+            async with limit:
+                async for event in stream:
+                    await queue.put((index, event))
+        finally:
+            await queue.put((index, finished))
+
+    tasks = [asyncio.create_task(pump(i, stream)) for i, stream in enumerate(streams)]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            index, event = await queue.get()
+            if event is finished:
+                remaining -= 1
+                continue
+            yield index, event
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def _astream_sections(
+    sections: List[Dict[str, Any]],
+    streams: List[AsyncIterator[Dict[str, Any]]],
+    conversion_id: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """Map: convert sections concurrently. Reduce: stitch them in document order.
+
+    The result event also carries "section_results", each section's own result.
+    """
+    results: List[Dict[str, Any]] = [{} for _ in sections]
+    async for index, event in _merge_streams(streams):
+        if event["event"] == "result":
+            results[index] = event["data"]
+        else:
+            yield {**event, "section": sections[index]["name"]}
+    result = stitch_results(sections, results)
+    result["conversion_id"] = conversion_id
+    result["profile"] = next((r["profile"] for r in results if r.get("profile")), DEFAULT_PROFILE)
+    yield {"event": "result", "data": result, "section_results": results}
+
+async def _stored_result_stream(result: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Event stream of a section result reused from an earlier conversion"""
+    yield {"event": "result", "data": copy.deepcopy(result)}
+
+async def _astream_section(
+    workflow: Any,
+    section: Dict[str, Any],
+    index: int,
+    css_content: str,
+    profile: str,
+    conversion_id: str,
+    deadline: Union[float, None] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Event stream converting one section of a sectioned conversion"""
+    # Stashing the inputs may spill to disk
+    state = await asyncio.to_thread(
+        create_initial_state, section["html"], css_content, profile, conversion_id, deadline
+    )
+    state["section"] = {"name": section["name"], "tag": section["tag"]}
+    config = {"configurable": {"thread_id": _section_thread_id(conversion_id, index)}}
+    async for event in _astream_workflow(workflow, state, config, conversion_id):
+        yield event
+
+async def _with_conversion_record(
+    events: AsyncIterator[Dict[str, Any]],
+    conversion_id: str,
+    css_hash: str,
+    profile: str,
+    sections: List[Dict[str, Any]]
+) -> AsyncIterator[Dict[str, Any]]:
+    """Save the finished conversion, section by section, so a later upload of
+    an edited page can name it as base_conversion_id"""
+    store = get_conversion_store()
+    async for event in events:
+        if event["event"] == "result" and store is not None:
+            results = event.pop("section_results", None) or [event["data"]]
+            fingerprints = await asyncio.to_thread(
+                lambda: [s.get("fingerprint") or section_fingerprint(s["html"]) for s in sections]
+            )
+            try:
+                await store.save(conversion_id, profile, css_hash, [
+                    {
+                        "name": section["name"],
+                        "tag": section["tag"],
+                        "chars": section["chars"] if "chars" in section else len(section["html"]),
+                        "fingerprint": fingerprint,
+                        "result": section_result
+                    }
+                    for section, fingerprint, section_result in zip(sections, fingerprints, results)
+                ], event["data"])
+            except Exception as e:
+                logger.error(f"Failed to record conversion {conversion_id}: {str(e)}")
+        yield event
+
+async def aload_conversion(conversion_id: str) -> Dict[str, Any]:
+    """Stored record of an earlier conversion; raises ConversionNotFound"""
+    store = get_conversion_store()
+    record = await store.get(conversion_id) if store is not None else None
+    if record is None:
+        raise ConversionNotFound(f"No stored conversion {conversion_id}")
+    return record
+
+async def aload_conversion_result(conversion_id: str) -> Dict[str, Any]:
+    """{"result", "created_at"} of an earlier conversion; raises ConversionNotFound"""
+    store = get_conversion_store()
+    record = await store.get_result(conversion_id) if store is not None else None
+    if record is None:
+        raise ConversionNotFound(f"No stored conversion {conversion_id}")
+    return record
+
+async def astream_html_to_lcnc(
+    html_content: str,
+    css_content: str,
+    conversion_id: Union[str, None] = None,
+    profile: str = DEFAULT_PROFILE,
+    base_conversion_id: Union[str, None] = None,
+    deadline: Union[float, None] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Run the workflow and yield an event each time a node finishes.
+
+    Yields {"event": "stage", "node": ..., "data": ..., "elapsed_ms": ...} per
+    completed node, then a single {"event": "result", "data": ...} with the
+    same payload aprocess_html_to_lcnc returns. When checkpointing is enabled
+    the run is recorded under conversion_id so it can be resumed.
+
+    Pages over SECTION_SPLIT_CHARS are split into top-level sections that
+    run through the workflow concurrently (stage events then also carry
+    "section") and are stitched back together, so nothing is truncated.
+    Pages under SINGLE_CALL_MAX_TOKENS are parsed, mapped and laid out by
+    one LLM call instead (not checkpointed). profile selects one of PROFILES.
+
+    With base_conversion_id the page is diffed section by section against
+    that stored conversion: unchanged sections reuse their stored results
+    and only changed or new ones are converted. Raises ConversionNotFound
+    if the base is not stored.
+
+    deadline (absolute time.time()) is carried in the state; nodes cap or
+    replace their ReAct loops to meet it and the result lists them in
+    analysis_report.degraded_nodes.
+    """
+    logger.info(f"Starting HTML to LCNC conversion ({profile})")
+    conversion_id = conversion_id or uuid.uuid4().hex
+    page = [{"name": "page", "tag": "body", "html": html_content}]
+
+    if base_conversion_id:
+        base = await aload_conversion(base_conversion_id)
+        events = _astream_incremental(html_content, css_content, conversion_id, profile, base, deadline)
+        async for event in events:
+            yield event
+        return
+
+    # Tokenizing is CPU work (and loads the tokenizer if warm-up has not yet)
+    if await asyncio.to_thread(use_single_call, html_content, css_content):
+        started = time.perf_counter()
+        update = await convert_single_call(html_content, css_content, deadline)
+        if update is not None:
+            logger.info("Converted small page with a single call")
+            state = create_initial_state(html_content, css_content, profile, deadline=deadline)
+            events = _astream_single_call(state, update, started, conversion_id)
+            async for event in _with_conversion_record(events, conversion_id, content_hash(css_content), profile, page):
+                yield event
+            return
+
+    # Run the shared workflow
+    workflow = await aget_workflow_graph(profile)
+
+    sections = await _page_sections(html_content)
+    if len(sections) > 1:
+        streams = [
+            _astream_section(workflow, section, index, css_content, profile, conversion_id, deadline)
+            for index, section in enumerate(sections)
+        ]
+        events = _astream_sections(sections, streams, conversion_id)
+    else:
+        config = {"configurable": {"thread_id": conversion_id}}
+        # Stashing the inputs may spill to disk
+        state = await asyncio.to_thread(
+            create_initial_state, html_content, css_content, profile, conversion_id, deadline
+        )
+        events = _astream_workflow(workflow, state, config, conversion_id)
+    events = _with_blob_store(events, conversion_id, workflow.checkpointer is not None)
+    async for event in _with_conversion_record(events, conversion_id, content_hash(css_content), profile, sections):
+        yield event
+
+async def astream_pipelined_html_to_lcnc(
+    html_content: str,
+    css_content: str,
+    conversion_id: Union[str, None] = None,
+    profile: str = DEFAULT_PROFILE,
+    deadline: Union[float, None] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Pipelined conversion (component_pipeline.astream_pipelined) of a profile's stages.
+
+    Like astream_html_to_lcnc it has a conversion_id, honours deadline and
+    records the finished conversion, split as _page_sections would, so it
+    can serve as a base_conversion_id and its structure can be paged. It
+    is not checkpointed, so only a successful run can be "resumed".
+    """
+    conversion_id = conversion_id or uuid.uuid4().hex
+    sections = await _page_sections(html_content)
+    events = astream_pipelined(
+        html_content, css_content, conversion_id,
+        stages=PROFILES[profile]["nodes"], deadline=deadline
+    )
+
+    async def recorded() -> AsyncIterator[Dict[str, Any]]:
+        async for event in events:
+            if event["event"] == "result":
+                event["data"]["profile"] = profile
+                if len(sections) == 1:
+                    # A page under the split size is recorded whole
+                    event.pop("section_results", None)
+            yield event
+
+    async for event in _with_conversion_record(recorded(), conversion_id, content_hash(css_content), profile, sections):
+        yield event
+
+async def _page_sections(html_content: str) -> List[Dict[str, Any]]:
+    """Sections a page is converted and recorded as: its top-level sections when
+    it is over SECTION_SPLIT_CHARS and splits, otherwise the whole page as one"""
+    if len(html_content) > SECTION_SPLIT_CHARS:
+        sections = await asyncio.to_thread(split_into_sections, html_content)
+        if len(sections) > 1:
+            return sections
+    return [{"name": "page", "tag": "body", "html": html_content}]
+
+async def _astream_incremental(
+    html_content: str,
+    css_content: str,
+    conversion_id: str,
+    profile: str,
+    base: Dict[str, Any],
+    deadline: Union[float, None] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Re-convert an edited page against a stored base conversion.
+
+    The page is split exactly as a fresh conversion would record it, and
+    sections are matched by fingerprint, so unchanged sections are reused
+    even if they moved; a page below SECTION_SPLIT_CHARS is one section,
+    reused only if nothing changed. A different stylesheet or profile can
+    change every section's output, so then nothing is reused.
+    """
+    sections = await _page_sections(html_content)
+    fingerprints = await asyncio.to_thread(lambda: [section_fingerprint(s["html"]) for s in sections])
+    reusable: Dict[str, Dict[str, Any]] = {}
+    if base["css_hash"] == content_hash(css_content) and base["profile"] == profile:
+        reusable = {
+            stored["fingerprint"]: stored["result"]
+            for stored in base["sections"]
+            if not stored["result"].get("error")
+        }
+
+    workflow = await aget_workflow_graph(profile)
+    streams: List[AsyncIterator[Dict[str, Any]]] = []
+    reused = 0
+    for index, (section, fingerprint) in enumerate(zip(sections, fingerprints)):
+        section["fingerprint"] = fingerprint
+        if fingerprint in reusable:
+            reused += 1
+            streams.append(_stored_result_stream(reusable[fingerprint]))
+        else:
+            streams.append(_astream_section(
+                workflow, section, index, css_content, profile, conversion_id, deadline
+            ))
+    logger.info(
+        f"Incremental conversion against {base['conversion_id']}: "
+        f"reusing {reused} of {len(sections)} sections"
+    )
+
+    events = _astream_sections(sections, streams, conversion_id)
+    events = _with_blob_store(events, conversion_id, workflow.checkpointer is not None)
+    async for event in _with_conversion_record(events, conversion_id, content_hash(css_content), profile, sections):
+        if event["event"] == "result" and event["data"].get("analysis_report") is not None:
+            matched = set(fingerprints)
+            event["data"]["analysis_report"]["incremental"] = {
+                "base_conversion_id": base["conversion_id"],
+                "reused_sections": reused,
+                "converted_sections": len(sections) - reused,
+                "removed_sections": sum(1 for stored in base["sections"] if stored["fingerprint"] not in matched)
+            }
+        yield event
+
+async def _with_blob_store(
+    events: AsyncIterator[Dict[str, Any]],
+    conversion_id: str,
+    checkpointed: bool
+) -> AsyncIterator[Dict[str, Any]]:
+    """Release a run's blob store once its events are consumed. A checkpointed
+    run that did not succeed keeps its blobs on disk so it can be resumed."""
+    result: Dict[str, Any] = {}
+    try:
+        async for event in events:
+            if event["event"] == "result":
+                result = event["data"]
+            yield event
+    finally:
+        # Persisting or deleting the blobs is file I/O
+        await asyncio.to_thread(
+            close_blob_store, conversion_id, checkpointed and (not result or bool(result.get("error")))
+        )
+
+async def _load_checkpointed(value: Any, conversion_id: str) -> Any:
+    """aload() for a checkpointed value; blobs a finished run deleted are a ConversionNotFound"""
+    try:
+        return await aload(value)
+    except BlobNotFound:
+        raise ConversionNotFound(f"Conversion {conversion_id} finished and its intermediate data is gone")
+
+async def _find_resume_point(workflow: Any, thread_id: str) -> Any:
+    """Return (latest, resume_from) snapshots of a checkpoint thread.
+
+    History is newest first; the first snapshot without an error that still
+    has work pending is where the run last stood before anything failed.
+    """
+    latest = None
+    resume_from = None
+    async for snapshot in workflow.aget_state_history({"configurable": {"thread_id": thread_id}}):
+        latest = latest or snapshot
+        if snapshot.values.get("error") or not snapshot.next or "__start__" in snapshot.next:
+            continue
+        resume_from = snapshot
+        break
+    return latest, resume_from
+
+def _resume_stream(
+    workflow: Any,
+    latest: Any,
+    resume_from: Any,
+    conversion_id: str,
+    deadline: Union[float, None] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Event stream that finishes a checkpointed run under a new deadline"""
+    if not latest.next and not latest.values.get("error"):
+        # Already finished successfully; nothing to re-run
+        async def finished():
+            try:
+                result = await asyncio.to_thread(build_conversion_result, latest.values, conversion_id)
+            except BlobNotFound:
+                raise ConversionNotFound(f"Conversion {conversion_id} finished and its intermediate data is gone")
+            yield {"event": "result", "data": result}
+        return finished()
+    if resume_from is None:
+        raise ConversionNotFound(f"No resumable checkpoint for conversion {conversion_id}")
+    logger.info(f"Resuming conversion {conversion_id} at {', '.join(resume_from.next)}")
+    # The original run's deadline has usually passed by now, and the nodes
+    # it retried get a fresh attempt budget
+    config = {**resume_from.config, "configurable": {
+        **resume_from.config["configurable"],
+        "deadline": deadline,
+        "attempts_base": resume_from.values.get("node_attempts") or {}
+    }}
+    return _astream_workflow(workflow, None, config, conversion_id)
+
+async def astream_resume_html_to_lcnc(
+    conversion_id: str,
+    deadline: Union[float, None] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Resume a checkpointed conversion from its last successfully completed node.
+
+    For sectioned conversions every section resumes independently, so only
+    the sections that failed are re-run. deadline replaces the original
+    run's deadline. A conversion that already finished successfully yields
+    its recorded result. Raises ConversionNotFound when checkpointing is
+    disabled or the conversion has no checkpoints.
+    """
+    workflow = await aget_workflow_graph()
+    if workflow.checkpointer is None:
+        raise ConversionNotFound("Checkpointing is disabled; set LCNC_CHECKPOINT_DB")
+
+    # Sections an incremental conversion reused have no checkpoints, only a record
+    store = get_conversion_store()
+    record = await store.get(conversion_id) if store is not None else None
+    if record and not record["result"].get("error"):
+        # Finished successfully: its blobs are deleted, but the record has the result
+        yield {"event": "result", "data": record["result"]}
+        return
+    stored_sections = record["sections"] if record else []
+
+    # Resume on the graph of the profile the conversion started with
+    profile = record["profile"] if record else None
+    for thread_id in (conversion_id, _section_thread_id(conversion_id, 0)):
+        if profile is not None:
+            break
+        snapshot = await workflow.aget_state({"configurable": {"thread_id": thread_id}})
+        if snapshot.values:
+            profile = snapshot.values.get("profile", DEFAULT_PROFILE)
+    profile = profile or DEFAULT_PROFILE
+    workflow = await aget_workflow_graph(profile)
+
+    latest, resume_from = await _find_resume_point(workflow, conversion_id)
+    if latest is not None:
+        page = [{"name": "page", "tag": "body", "html": await _load_checkpointed(latest.values.get("html_content", ""), conversion_id)}]
+        css_hash = content_hash(await _load_checkpointed(latest.values.get("css_content", ""), conversion_id))
+        events = _resume_stream(workflow, latest, resume_from, conversion_id, deadline)
+        events = _with_blob_store(events, conversion_id, checkpointed=True)
+        async for event in _with_conversion_record(events, conversion_id, css_hash, profile, page):
+            yield event
+        return
+
+    sections: List[Dict[str, Any]] = []
+    streams: List[AsyncIterator[Dict[str, Any]]] = []
+    css_hash = record["css_hash"] if record else content_hash("")
+    while True:
+        index = len(sections)
+        latest, resume_from = await _find_resume_point(workflow, _section_thread_id(conversion_id, index))
+        if latest is None:
+            if index >= len(stored_sections):
+                break
+            stored = stored_sections[index]
+            sections.append({key: stored[key] for key in ("name", "tag", "chars", "fingerprint")})
+            streams.append(_stored_result_stream(stored["result"]))
+            continue
+        section = latest.values.get("section") or {}
+        sections.append({
+            "name": section.get("name", f"section[{index}]"),
+            "tag": section.get("tag", ""),
+            "html": await _load_checkpointed(latest.values.get("html_content", ""), conversion_id)
+        })
+        if not record:
+            css_hash = content_hash(await _load_checkpointed(latest.values.get("css_content", ""), conversion_id))
+        streams.append(_resume_stream(workflow, latest, resume_from, conversion_id, deadline))
+
+    if not any("html" in section for section in sections):
+        raise ConversionNotFound(f"No checkpoints for conversion {conversion_id}")
+    events = _astream_sections(sections, streams, conversion_id)
+    events = _with_blob_store(events, conversion_id, checkpointed=True)
+    async for event in _with_conversion_record(events, conversion_id, css_hash, profile, sections):
+        yield event
+
+async def aprocess_html_to_lcnc(
+    html_content: str,
+    css_content: str,
+    conversion_id: Union[str, None] = None,
+    profile: str = DEFAULT_PROFILE,
+    base_conversion_id: Union[str, None] = None,
+    deadline: Union[float, None] = None
+) -> Dict[str, Any]:
+    """Process HTML/CSS content through the agent workflow without blocking the event loop"""
+    result: Dict[str, Any] = {}
+    async for event in astream_html_to_lcnc(
+        html_content, css_content, conversion_id, profile, base_conversion_id, deadline
+    ):
+        if event["event"] == "result":
+            result = event["data"]
+    return result
+
+# Event loop the synchronous wrapper runs conversions on. The LLM client and
+# the checkpoint connection are bound to the loop they were first used on,
+# so every sync call must reuse one loop rather than asyncio.run a new one.
+_sync_loop: Union[asyncio.AbstractEventLoop, None] = None
+_sync_loop_lock = threading.Lock()
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) the background thread that runs the sync wrapper's event loop"""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            loop = asyncio.new_event_loop()
+            # A daemon thread, so connections opened on it never block interpreter exit
+            threading.Thread(target=loop.run_forever, name="lcnc-sync-loop", daemon=True).start()
+            _sync_loop = loop
+    return _sync_loop
+
+def process_html_to_lcnc(html_content: str, css_content: str, profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+    """Synchronous wrapper around aprocess_html_to_lcnc for scripts and notebooks.
+
+    Runs on a persistent background event loop, so it can be called
+    repeatedly, and from code that already has a running loop.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        aprocess_html_to_lcnc(html_content, css_content, profile=profile), _get_sync_loop()
+    )
+    return future.result()
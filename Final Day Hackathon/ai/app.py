@@ -1,14 +1,50 @@
 # ai/app.py
+import os
+import hmac
+import json
+import time
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from agent import process_html_to_lcnc
-from typing import Optional, Union
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+from agent import (
+    astream_html_to_lcnc,
+    astream_resume_html_to_lcnc,
+    astream_pipelined_html_to_lcnc,
+    awarm_up_workflow,
+    is_workflow_ready,
+    aclose_workflow_checkpointer,
+    ConversionNotFound,
+    aload_conversion,
+    aload_conversion_result,
+    PROFILES,
+    DEFAULT_PROFILE
+)
+from result_cache import get_result_cache, make_cache_key
+from job_queue import JobQueue, JOB_DB_PATH
+from admission import admission, AdmissionRejected, run_admitted
+from singleflight import inflight
+from result_views import select_fields, page_structure, InvalidPointer, InvalidCursor, RESULT_PAGE_MAX
+from response_encoding import negotiate, encoded_response, encode_record, stream_media_type, NotAcceptable, MSGPACK
+import metrics
+from profiling import profile_coroutine, ProfilerBusy
+from site_bundle import convert_site_bundle, SiteBundleError, BUNDLE_MAX_BYTES, BUNDLE_CONCURRENCY
+from html_ingest import ingest_upload, limited_stream, UploadRejected, UPLOAD_MAX_BYTES
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Union
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Batch conversions: pages converted at once per batch, and pages per batch
+BATCH_CONCURRENCY = int(os.getenv("LCNC_BATCH_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS = int(os.getenv("LCNC_BATCH_MAX_ITEMS", "500"))
+
+# Bearer token for the /debug endpoints; unset disables them
+ADMIN_TOKEN = os.getenv("LCNC_ADMIN_TOKEN", "")
+
 # Create FastAPI app
 app = FastAPI(
     title="HTML to LCNC Converter",
@@ -16,10 +52,84 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Keep a reference so the warm-up task is not garbage collected
+_warm_up_task: Optional[asyncio.Task] = None
+
+async def _warm_up() -> None:
+    """Build the workflow graphs (graph building runs off the event loop)"""
+    try:
+        await awarm_up_workflow()
+    except Exception as e:
+        logger.error(f"Workflow warm-up failed: {str(e)}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Kick off workflow warm-up in the background"""
+    global _warm_up_task
+    _warm_up_task = asyncio.create_task(_warm_up())
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Observe each request's latency, up to the end of its (possibly streamed) body"""
+    started = time.perf_counter()
+
+    def observe(status: int) -> None:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.record_request(request.method, path, status, time.perf_counter() - started)
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        observe(500)
+        raise
+    body = response.body_iterator
+
+    async def observed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            observe(response.status_code)
+
+    response.body_iterator = observed_body()
+    return response
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected) -> JSONResponse:
+    """Shed load with 429 once the admission queue is full"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), **admission.stats()},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 class ConversionRequest(BaseModel):
     """Request model for HTML/CSS conversion"""
     html_content: str
     css_content: str
+    # "fast" returns only lcnc_structure, "balanced" runs every stage without
+    # ReAct loops, "thorough" runs the full agentic workflow
+    profile: Literal["fast", "balanced", "thorough"] = DEFAULT_PROFILE
+    # Stream top-level components through per-stage workers instead of the graph
+    pipelined: bool = False
+    # Earlier conversion of this page; only sections that changed are re-converted
+    base_conversion_id: Optional[str] = None
+    # Latency budget counted from arrival (or X-Deadline-Ms); nodes degrade to meet it
+    deadline_ms: Optional[int] = Field(None, gt=0)
+    _received_at: float = PrivateAttr(default_factory=time.time)
+
+    @model_validator(mode="after")
+    def check_incremental(self) -> "ConversionRequest":
+        if self.pipelined and self.base_conversion_id:
+            raise ValueError("base_conversion_id cannot be combined with pipelined")
+        return self
+
+class BatchConversionRequest(BaseModel):
+    """Request model for converting many pages in one call"""
+    items: List[ConversionRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    # Pages converted at once; capped at LCNC_BATCH_CONCURRENCY
+    concurrency: Optional[int] = Field(None, gt=0)
 
 class ConversionResponse(BaseModel):
     """Response model for conversion results"""
@@ -27,34 +137,218 @@ class ConversionResponse(BaseModel):
     lcnc_structure: Union[list, dict]
     analysis_report: dict
     error: Optional[str] = None
+    conversion_id: Optional[str] = None
+    profile: Optional[str] = None
 
-@app.post("/convert", response_model=ConversionResponse)
-async def convert_html_to_lcnc(request: ConversionRequest) -> ConversionResponse:
-    """Convert HTML/CSS to LCNC components"""
-    try:
-        # Process the conversion
-        result = process_html_to_lcnc(
-            html_content=request.html_content,
-            css_content=request.css_content
+def _request_options(request: ConversionRequest) -> Dict[str, Any]:
+    """Options that change the result, for cache keys and coalescing.
+
+    A deadline only decides how hard to try, so a cached full result
+    serves any deadline (degraded results are never cached).
+    """
+    return request.model_dump(
+        exclude={"html_content", "css_content", "deadline_ms"}, exclude_defaults=True
+    )
+
+def _with_deadline_header(request: ConversionRequest, x_deadline_ms: Optional[int]) -> ConversionRequest:
+    """Apply an X-Deadline-Ms header unless the body already sets deadline_ms"""
+    if x_deadline_ms is not None and request.deadline_ms is None:
+        request.deadline_ms = x_deadline_ms
+    return request
+
+def _deadline(request: ConversionRequest) -> Optional[float]:
+    """Absolute deadline of a request, or None"""
+    if request.deadline_ms is None:
+        return None
+    return request._received_at + request.deadline_ms / 1000
+
+def _cache_key(request: ConversionRequest) -> str:
+    return make_cache_key(request.html_content, request.css_content, **_request_options(request))
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """StreamingResponse for a request that already holds an admission slot.
+
+    The slot is returned when the response finishes, fails or is cancelled,
+    including when the body is never iterated (client gone before the first
+    chunk), so it cannot leak the way a release inside the body generator can.
+    """
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission.release()
+
+async def _pipeline_events(request: ConversionRequest) -> AsyncIterator[Dict[str, Any]]:
+    """Run the agent pipeline for a request"""
+    if request.pipelined:
+        events = astream_pipelined_html_to_lcnc(
+            request.html_content, request.css_content,
+            profile=request.profile,
+            deadline=_deadline(request)
         )
-        
-        # Check for errors
-        if result.get("error"):
-            return ConversionResponse(
-                status="error",
-                lcnc_structure=[],
-                analysis_report={},
-                error=result["error"]
-            )
-        
-        # Return successful response
-        return ConversionResponse(
-            status="success",
-            lcnc_structure=result.get("lcnc_structure", []),
-            analysis_report=result.get("analysis_report", {}),
-            error=None
+    else:
+        events = astream_html_to_lcnc(
+            request.html_content, request.css_content,
+            profile=request.profile,
+            base_conversion_id=request.base_conversion_id,
+            deadline=_deadline(request)
         )
+    async for event in events:
+        if event["event"] == "result":
+            event["data"]["profile"] = request.profile
+        yield event
+
+async def _conversion_events(
+    request: ConversionRequest,
+    admit: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """Conversion events for a request, served from the result cache when possible.
+
+    With admit=True a cache miss must pass admission control before the
+    pipeline runs; callers that already hold a slot (or run in the job
+    pool) leave it False.
+    """
+    # Serve repeated uploads of the same page from the result cache
+    cache = get_result_cache()
+    cache_key = _cache_key(request)
+    result, cache_tier = await asyncio.to_thread(cache.get, cache_key)
+
+    coalesced = False
+    if result is None:
+        # Identical requests already running share that run's result
+        future, leader = inflight.claim(cache_key)
+        if not leader:
+            result = await inflight.wait(future)
+            coalesced = True
+        else:
+            try:
+                if admit:
+                    await admission.acquire()
+                try:
+                    # Process the conversion
+                    async for event in _pipeline_events(request):
+                        if event["event"] != "result":
+                            yield event
+                            continue
+                        result = event["data"]
+                        degraded = (result.get("analysis_report") or {}).get("degraded_nodes")
+                        if not result.get("error") and not degraded:
+                            await asyncio.to_thread(cache.set, cache_key, result)
+                finally:
+                    if admit:
+                        admission.release()
+                inflight.resolve(cache_key, result)
+            except (GeneratorExit, asyncio.CancelledError):
+                inflight.fail(cache_key, RuntimeError("Coalesced conversion was abandoned"))
+                raise
+            except BaseException as e:
+                inflight.fail(cache_key, e)
+                raise
+
+    if result.get("analysis_report") is not None:
+        result["analysis_report"]["cache"] = {
+            "hit": cache_tier is not None,
+            "tier": cache_tier,
+            **cache.stats()
+        }
+        result["analysis_report"]["coalesced"] = coalesced
+    yield {"event": "result", "data": result}
+
+async def _run_conversion(
+    request: ConversionRequest,
+    on_stage: Optional[Callable[[str, float], Awaitable[None]]] = None,
+    admit: bool = False
+) -> Dict[str, Any]:
+    """Run a conversion to completion, reporting each stage's duration to on_stage"""
+    result: Dict[str, Any] = {}
+    last_elapsed = 0.0
+    async for event in _conversion_events(request, admit=admit):
+        if event["event"] == "result":
+            result = event["data"]
+        elif on_stage is not None:
+            await on_stage(event["node"], round(event["elapsed_ms"] - last_elapsed, 1))
+            last_elapsed = event["elapsed_ms"]
+    return result
+
+def _response_body(result: Dict[str, Any]) -> Dict[str, Any]:
+    """ConversionResponse fields for a conversion result, as a plain dict"""
+    # Check for errors
+    if result.get("error"):
+        return {
+            "status": "error",
+            "lcnc_structure": [],
+            "analysis_report": {},
+            "error": result["error"],
+            "conversion_id": result.get("conversion_id"),
+            "profile": result.get("profile")
+        }
+    
+    # Return successful response
+    return {
+        "status": "success",
+        "lcnc_structure": result.get("lcnc_structure", []),
+        "analysis_report": result.get("analysis_report", {}),
+        "error": None,
+        "conversion_id": result.get("conversion_id"),
+        "profile": result.get("profile")
+    }
+
+def _to_response(result: Dict[str, Any]) -> ConversionResponse:
+    """Build the API response for a conversion result"""
+    return ConversionResponse(**_response_body(result))
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validate a fields= selector: comma-separated dotted paths into ConversionResponse"""
+    if fields is None:
+        return None
+    paths = [path.strip() for path in fields.split(",") if path.strip()]
+    unknown = sorted({path.split(".")[0] for path in paths} - set(ConversionResponse.model_fields))
+    if not paths or unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown) or fields!r}")
+    return paths
+
+@app.post(
+    "/convert",
+    response_model=ConversionResponse,
+    responses={200: {"content": {MSGPACK: {}}}, 406: {"description": "Accept rules out JSON and MessagePack"}}
+)
+async def convert_html_to_lcnc(
+    request: ConversionRequest,
+    x_deadline_ms: Optional[int] = Header(None, gt=0),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. lcnc_structure,analysis_report.fixes"),
+    accept: Optional[str] = Header(None)
+) -> Response:
+    """Convert HTML/CSS to LCNC components.
+
+    The body is encoded directly (orjson, or MessagePack when the Accept
+    header prefers application/msgpack) instead of through the response
+    model, which is too slow for large component trees.
+    """
+    _with_deadline_header(request, x_deadline_ms)
+    paths = _parse_fields(fields)
+    return await _convert_response(request, paths, _negotiate(accept))
+
+def _negotiate(accept: Optional[str], stream: bool = False) -> str:
+    """Response media type for an Accept header, or 406"""
+    try:
+        return negotiate(accept, stream=stream)
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+async def _convert_response(request: ConversionRequest, paths: Optional[List[str]], media_type: str) -> Response:
+    """Run a conversion and encode its response body"""
+    try:
+        body = _response_body(await _run_conversion(request, admit=True))
+        if paths is not None:
+            # status is always kept so a trimmed error response is still recognisable
+            body = select_fields(body, ["status"] + paths)
+        return encoded_response(body, media_type)
         
+    except ConversionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error processing conversion request: {str(e)}")
         raise HTTPException(
@@ -62,8 +356,380 @@ async def convert_html_to_lcnc(request: ConversionRequest) -> ConversionResponse
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.post("/convert/{conversion_id}/resume", response_model=ConversionResponse)
+async def resume_conversion(
+    conversion_id: str,
+    x_deadline_ms: Optional[int] = Header(None, gt=0)
+) -> ConversionResponse:
+    """Re-run a failed checkpointed conversion from its last completed node"""
+    deadline = time.time() + x_deadline_ms / 1000 if x_deadline_ms else None
+    try:
+        async with admission.admit():
+            result: Dict[str, Any] = {}
+            async for event in astream_resume_html_to_lcnc(conversion_id, deadline):
+                if event["event"] == "result":
+                    result = event["data"]
+        return _to_response(result)
+
+    except ConversionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.error(f"Error resuming conversion {conversion_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.get("/conversions/{conversion_id}/structure")
+async def get_conversion_structure(
+    conversion_id: str,
+    pointer: str = Query("", description="JSON Pointer into lcnc_structure, e.g. /0/children/2"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, gt=0, le=RESULT_PAGE_MAX),
+    depth: int = Query(1, ge=1, le=16, description="Levels of descendants to include per child")
+):
+    """Serve one page of the children of a node of a stored lcnc_structure"""
+    try:
+        record = await aload_conversion_result(conversion_id)
+        page = await asyncio.to_thread(
+            page_structure,
+            record["result"].get("lcnc_structure") or [],
+            pointer, cursor, limit, depth, record["created_at"]
+        )
+    except ConversionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InvalidPointer as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"conversion_id": conversion_id, **page}
+
+def _sse_message(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/convert/stream")
+async def convert_html_to_lcnc_stream(
+    request: ConversionRequest,
+    x_deadline_ms: Optional[int] = Header(None, gt=0)
+) -> StreamingResponse:
+    """Convert HTML/CSS to LCNC components, streaming each stage's output as SSE"""
+    _with_deadline_header(request, x_deadline_ms)
+    if request.base_conversion_id:
+        # Fail before the response starts so a missing base can still be a 404
+        try:
+            await aload_conversion(request.base_conversion_id)
+        except ConversionNotFound as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    # Cache hits are served without a slot; anything else is admitted before
+    # the response starts so a rejection can still be a 429
+    cached, _ = await asyncio.to_thread(get_result_cache().get, _cache_key(request))
+    admitted = cached is None
+    if admitted:
+        await admission.acquire()
+
+    async def event_stream():
+        try:
+            # A hit that expires before the stream looks it up again is admitted there
+            async for event in _conversion_events(request, admit=not admitted):
+                if event["event"] == "result":
+                    yield _sse_message("result", event["data"])
+                else:
+                    yield _sse_message("stage", {
+                        key: event[key]
+                        for key in ("node", "section", "elapsed_ms", "data")
+                        if key in event
+                    })
+        except AdmissionRejected as e:
+            # The 200 has already been sent, so the rejection becomes the last event
+            yield _sse_message("error", {"detail": str(e), "retry_after": e.retry_after})
+
+    return (AdmittedStreamingResponse if admitted else StreamingResponse)(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _batch_item(
+    index: int,
+    request: ConversionRequest,
+    started: float
+) -> Dict[str, Any]:
+    """Convert one page of a batch into its record; never raises"""
+    item_started = time.perf_counter()
+    # Like a queued job, the page's deadline runs from when a worker picks it up
+    request._received_at = time.time()
+    record: Dict[str, Any] = {"index": index}
+    try:
+        body = _response_body(await _run_conversion(request))
+        record.update(status=body["status"], result=body)
+    except ConversionNotFound as e:
+        record.update(status="not_found", error=str(e))
+    except Exception as e:
+        logger.error(f"Error processing batch item {index}: {str(e)}")
+        record.update(status="error", error=f"Internal server error: {str(e)}")
+    finished = time.perf_counter()
+    record.update(
+        started_ms=round((item_started - started) * 1000, 1),
+        duration_ms=round((finished - item_started) * 1000, 1),
+        finished_ms=round((finished - started) * 1000, 1)
+    )
+    return record
+
+async def _batch_lines(items: List[ConversionRequest], concurrency: int, media_type: str) -> AsyncIterator[bytes]:
+    """Convert a batch with a fixed pool of workers, yielding one encoded record
+    per page in completion order and a summary record last.
+
+    The caller holds one admission slot for the batch (released by
+    AdmittedStreamingResponse); see run_admitted for how the pool shares it.
+    """
+    started = time.perf_counter()
+    statuses: Counter = Counter()
+    records = run_admitted(
+        range(len(items)),
+        lambda index: _batch_item(index, items[index], started),
+        concurrency
+    )
+    try:
+        async for record in records:
+            statuses[record["status"]] += 1
+            yield encode_record(record, media_type)
+    finally:
+        # Cancels the workers if the client goes away mid-batch
+        await records.aclose()
+    yield encode_record({"summary": {
+        "items": len(items),
+        "statuses": dict(statuses),
+        "concurrency": concurrency,
+        "wall_ms": round((time.perf_counter() - started) * 1000, 1)
+    }}, media_type)
+
+@app.post(
+    "/convert/batch",
+    responses={
+        200: {"content": {"application/x-ndjson": {}, MSGPACK: {}}},
+        406: {"description": "Accept rules out NDJSON and MessagePack"}
+    }
+)
+async def convert_html_to_lcnc_batch(
+    request: BatchConversionRequest,
+    x_deadline_ms: Optional[int] = Header(None, gt=0),
+    accept: Optional[str] = Header(None)
+) -> StreamingResponse:
+    """Convert many pages, streaming one record per page as it completes.
+
+    Records are NDJSON lines, or concatenated MessagePack objects when the
+    Accept header prefers application/msgpack.
+    """
+    media_type = _negotiate(accept, stream=True)
+    for item in request.items:
+        _with_deadline_header(item, x_deadline_ms)
+    concurrency = min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY, len(request.items))
+
+    # Admit before the response starts so a rejection can still be a 429
+    await admission.acquire()
+    return AdmittedStreamingResponse(
+        _batch_lines(request.items, concurrency, media_type),
+        media_type=stream_media_type(media_type),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Vary": "Accept"}
+    )
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """Request body, refused with 413 as soon as it grows past limit bytes"""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise HTTPException(status_code=413, detail=f"Body larger than {limit} bytes")
+    try:
+        return b"".join([chunk async for chunk in limited_stream(request.stream(), limit)])
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@app.post("/convert/site")
+async def convert_site_bundle_to_lcnc(
+    request: Request,
+    profile: Literal["fast", "balanced", "thorough"] = DEFAULT_PROFILE,
+    name: str = Query("site", max_length=200),
+    concurrency: Optional[int] = Query(None, ge=1),
+    accept: Optional[str] = Header(None)
+):
+    """Convert a zipped static site (application/zip body) into one LCNC project manifest.
+
+    Linked stylesheets and their @imports are resolved inside the bundle and
+    each one is parsed once; the pages are then converted concurrently
+    through the pipelined stages of the profile against those shared styles.
+    """
+    media_type = _negotiate(accept)
+    data = await _read_body(request, BUNDLE_MAX_BYTES)
+    # Admit before converting so an overloaded service answers 429
+    await admission.acquire()
+    try:
+        manifest = await convert_site_bundle(
+            data, name, PROFILES[profile]["nodes"], concurrency=min(concurrency or BUNDLE_CONCURRENCY, BUNDLE_CONCURRENCY)
+        )
+    except SiteBundleError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    finally:
+        admission.release()
+    manifest["project"]["profile"] = profile
+    return encoded_response(manifest, media_type)
+
+@app.post(
+    "/convert/upload",
+    response_model=ConversionResponse,
+    responses={413: {"description": "Upload over LCNC_UPLOAD_MAX_BYTES, _ELEMENTS or _DEPTH"}}
+)
+async def convert_uploaded_html(
+    request: Request,
+    profile: Literal["fast", "balanced", "thorough"] = DEFAULT_PROFILE,
+    pipelined: bool = False,
+    x_deadline_ms: Optional[int] = Header(None, gt=0),
+    fields: Optional[str] = Query(None),
+    accept: Optional[str] = Header(None)
+) -> Response:
+    """Convert a page uploaded as a raw text/html body or as multipart/form-data (html, css parts).
+
+    The body is read in chunks through an incremental tokenizer, so a page
+    over the byte, element or depth limits gets 413 while it is still
+    arriving and before any LLM call. Otherwise it behaves like /convert.
+    """
+    received_at = time.time()
+    paths = _parse_fields(fields)
+    media_type = _negotiate(accept)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Body larger than {UPLOAD_MAX_BYTES} bytes")
+    try:
+        html, css, stats = await ingest_upload(request.stream(), request.headers.get("content-type", "text/html"))
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    logger.info(f"Upload ingested: {stats}")
+    conversion = ConversionRequest(
+        html_content=html, css_content=css, profile=profile, pipelined=pipelined, deadline_ms=x_deadline_ms
+    )
+    # The deadline counts from arrival, not from the end of the upload
+    conversion._received_at = received_at
+    return await _convert_response(conversion, paths, media_type)
+
+async def _run_job(payload: Dict[str, Any], on_stage: Callable[[str, float], Awaitable[None]]) -> Dict[str, Any]:
+    """Job queue handler: run a queued conversion request"""
+    return await _run_conversion(ConversionRequest(**payload), on_stage)
+
+# Background conversions, persisted so queued jobs survive a restart
+job_queue: Optional[JobQueue] = None
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Open the job queue and start its worker pool"""
+    global job_queue
+    job_queue = JobQueue(JOB_DB_PATH, _run_job)
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    """Stop the job workers; unfinished jobs are re-queued on next startup"""
+    if job_queue is not None:
+        await job_queue.stop()
+    await aclose_workflow_checkpointer()
+
+@app.post("/jobs", status_code=202)
+async def submit_conversion_job(
+    request: ConversionRequest,
+    x_deadline_ms: Optional[int] = Header(None, gt=0)
+):
+    """Queue a conversion and return its job id immediately; a deadline counts from when the job starts"""
+    _with_deadline_header(request, x_deadline_ms)
+    job_id = await job_queue.submit(request.model_dump())
+    stats = await job_queue.stats()
+    return {"job_id": job_id, "status": "queued", "queue_depth": stats["depth"]}
+
+@app.get("/jobs")
+async def job_queue_stats():
+    """Queue depth and job counts by status"""
+    return await job_queue.stats()
+
+@app.get("/jobs/{job_id}")
+async def get_conversion_job(job_id: str):
+    """Poll a job's status, per-stage timings and, once finished, its result"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["result"] is not None:
+        job["result"] = _to_response(job["result"]).model_dump()
+    return job
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     logger.info("Health check requested")
-    return {"status": "healthy"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "admission": admission.stats(),
+        "singleflight": inflight.stats()
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint() -> Response:
+    """Prometheus metrics: request, node and tool latency, LLM calls and tokens, ReAct steps, parse fallbacks"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+def _require_admin(authorization: Optional[str]) -> None:
+    """Reject a request that does not carry the admin bearer token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+async def _pipeline_result(request: ConversionRequest) -> Dict[str, Any]:
+    """Result of running the pipeline for a request, bypassing the result cache"""
+    result: Dict[str, Any] = {}
+    async for event in _pipeline_events(request):
+        if event["event"] == "result":
+            result = event["data"]
+    return result
+
+@app.post("/debug/profile")
+async def profile_conversion(
+    request: ConversionRequest,
+    format: Literal["json", "collapsed"] = "json",
+    authorization: Optional[str] = Header(None),
+    x_deadline_ms: Optional[int] = Header(None, gt=0)
+):
+    """Run one conversion, bypassing the result cache, under the sampling profiler (admin only).
+
+    Returns the wall time split between the conversion's CPU work, awaiting
+    I/O, event loop callbacks, other requests and offloaded thread work,
+    the CPU time by package, and collapsed stacks for flamegraph.pl or
+    speedscope (format=collapsed returns only those, as text). Runs the
+    same configuration /convert would: pipelined, profile and deadline
+    (deadline_ms or X-Deadline-Ms).
+    """
+    _require_admin(authorization)
+    _with_deadline_header(request, x_deadline_ms)
+    try:
+        async with admission.admit():
+            result, report, collapsed = await profile_coroutine(_pipeline_result(request))
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ConversionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if format == "collapsed":
+        return Response(content=collapsed, media_type="text/plain; charset=utf-8")
+    response = _to_response(result)
+    return {
+        "status": response.status,
+        "error": response.error,
+        "conversion_id": response.conversion_id,
+        **report,
+        "collapsed_stacks": collapsed
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until the workflow graph has been warmed up"""
+    if not is_workflow_ready():
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True}
\ No newline at end of file
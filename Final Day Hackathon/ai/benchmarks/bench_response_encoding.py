@@ -0,0 +1,111 @@
+# ai/benchmarks/bench_response_encoding.py
+"""Encode time and payload size of /convert responses on deep component trees.
+
+Builds synthetic lcnc_structure trees (every node has `--breadth` children
+down to each depth) with an analysis_report of matching size, and encodes
+each response the ways the service can:
+
+  pydantic+json  ConversionResponse validated and serialized the way FastAPI
+                 does for a response_model, then json.dumps
+  json           the plain dict through json.dumps (no orjson installed)
+  orjson         the plain dict through orjson (application/json)
+  msgpack        the plain dict through MessagePack (application/msgpack)
+
+No LLM calls are made.
+
+    python benchmarks/bench_response_encoding.py [--depths 4 6 8] [--breadth 3] [--runs 5]
+"""
+import os
+import sys
+import json
+import gzip
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_tree(depth: int, breadth: int, path: str = "0") -> dict:
+    node = {
+        "lcnc_type": "Container" if depth else "Text",
+        "source_tag": "div" if depth else "p",
+        "id": f"node-{path}",
+        "properties": {"layout": "flex", "direction": "row", "gap": "16px", "padding": [8, 16, 8, 16]},
+        "styles": {"color": "#1f2937", "font-size": "14px", "confidence": 0.87},
+        "children": []
+    }
+    if depth:
+        node["children"] = [make_tree(depth - 1, breadth, f"{path}.{i}") for i in range(breadth)]
+    return node
+
+def make_body(depth: int, breadth: int) -> tuple:
+    tree = make_tree(depth, breadth)
+    nodes = sum(breadth ** level for level in range(depth + 1))
+    return {
+        "status": "success",
+        "lcnc_structure": [tree],
+        "analysis_report": {
+            "compatibility": [
+                {"component": f"node-{i}", "score": 0.9, "issues": ["unsupported pseudo-element"]}
+                for i in range(nodes // 4)
+            ],
+            "matched_patterns": [{"pattern": "card-grid", "similarity": 0.82}] * 10,
+            "fixes": [],
+            "responsive_config": {"breakpoints": [{"breakpoint": "768px", "changes": {"direction": "column"}}]}
+        },
+        "error": None,
+        "conversion_id": "bench",
+        "profile": "thorough"
+    }, nodes
+
+def encoders() -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from app import ConversionResponse
+    import response_encoding
+
+    def via_pydantic(body: dict) -> bytes:
+        # FastAPI: validate into the response model, serialize it, then JSONResponse.render
+        content = jsonable_encoder(ConversionResponse.model_validate(body).model_dump(mode="json"))
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+    def via_json(body: dict) -> bytes:
+        return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    found = {"pydantic+json": via_pydantic, "json": via_json}
+    if response_encoding.orjson is not None:
+        found["orjson"] = lambda body: response_encoding.encode(body, response_encoding.JSON)
+    else:
+        print("orjson not installed; skipping")
+    if response_encoding.msgpack is not None:
+        found["msgpack"] = lambda body: response_encoding.encode(body, response_encoding.MSGPACK)
+    else:
+        print("msgpack not installed; skipping")
+    return found
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", type=int, nargs="+", default=[4, 6, 8])
+    parser.add_argument("--breadth", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    found = encoders()
+    for depth in args.depths:
+        body, nodes = make_body(depth, args.breadth)
+        print(f"depth={depth} breadth={args.breadth} nodes={nodes}")
+        baseline = None
+        for name, encode in found.items():
+            times = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                payload = encode(body)
+                times.append((time.perf_counter() - started) * 1000)
+            median = statistics.median(times)
+            baseline = baseline or median
+            print(
+                f"  {name:>14}: {median:8.1f}ms ({baseline / median:4.1f}x) "
+                f"{len(payload) / 1024:9.1f} KB, gzip {len(gzip.compress(payload, 6)) / 1024:8.1f} KB"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# ai/benchmarks/bench_single_call.py
+"""Latency and output parity of the single-call fast path vs the full workflow.
+
+Each sample page is converted both ways with the real LLM (OPENAI_API_KEY
+must be set): once through the single combined prompt, once through the
+agent graph with the fast path disabled. Parity compares the mapped LCNC
+component types and layout types of the two outputs (Jaccard similarity)
+and their component counts. LLM calls per run are counted with a callback.
+
+    python benchmarks/bench_single_call.py [--runs 3] [--profile thorough]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+PAGES = {
+    "hero": (
+        '<header class="hero"><h1>Ship faster</h1><p>Build apps without code.</p>'
+        '<a class="btn" href="/signup">Get started</a></header>',
+        ".hero { display: flex; flex-direction: column; align-items: center; padding: 64px; }"
+        " .btn { background: #2563eb; color: #fff; border-radius: 6px; }"
+    ),
+    "nav_form": (
+        '<nav class="top"><a href="/">Home</a><a href="/pricing">Pricing</a><a href="/docs">Docs</a></nav>'
+        '<form class="contact"><label>Email<input type="email" name="email"></label>'
+        '<textarea name="message"></textarea><button type="submit">Send</button></form>',
+        ".top { display: flex; gap: 16px; } .contact { display: grid; gap: 8px; max-width: 480px; }"
+    ),
+    "card_grid": (
+        '<section class="cards">' + "".join(
+            f'<article class="card"><img src="/img/{i}.png" alt=""><h3>Plan {i}</h3>'
+            f'<p>Everything in plan {i - 1}, and more.</p><button>Choose</button></article>'
+            for i in range(1, 4)
+        ) + "</section>",
+        ".cards { display: grid; grid-template-columns: repeat(3, 1fr); gap: 24px; }"
+        " @media (max-width: 768px) { .cards { grid-template-columns: 1fr; } }"
+    ),
+}
+
+class LLMCallCounter(BaseCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+
+    def on_chat_model_start(self, *args, **kwargs):
+        self.calls += 1
+
+    def on_llm_start(self, *args, **kwargs):
+        self.calls += 1
+
+def _types(items, *keys) -> Counter:
+    counts = Counter()
+    for item in items or []:
+        if isinstance(item, dict):
+            counts[next((str(item[k]) for k in keys if item.get(k)), "?")] += 1
+    return counts
+
+def _jaccard(a: Counter, b: Counter) -> float:
+    union = sum((a | b).values())
+    return round(sum((a & b).values()) / union, 2) if union else 1.0
+
+async def convert(html: str, css: str, profile: str, single_call: bool, counter: LLMCallCounter) -> dict:
+    import single_call as fast_path
+    from agent import astream_html_to_lcnc
+
+    fast_path.SINGLE_CALL_MAX_TOKENS = 10 ** 6 if single_call else 0
+    mapped = []
+    calls_before = counter.calls
+    started = time.perf_counter()
+    async for event in astream_html_to_lcnc(html, css, profile=profile):
+        if event["event"] == "stage" and event["data"].get("mapped_components"):
+            mapped = event["data"]["mapped_components"]
+        elif event["event"] == "result":
+            result = event["data"]
+    return {
+        "wall_ms": (time.perf_counter() - started) * 1000,
+        "llm_calls": counter.calls - calls_before,
+        "error": result.get("error"),
+        "mapped": _types(mapped, "lcnc_type", "component", "type"),
+        "layout": _types(result.get("lcnc_structure"), "type", "layout", "lcnc_type"),
+    }
+
+async def main_async(runs: int, profile: str) -> None:
+    from utils import get_llm
+
+    counter = LLMCallCounter()
+    llm = get_llm()
+    llm.callbacks = (llm.callbacks or []) + [counter]
+
+    print(f"profile={profile} runs={runs}")
+    for name, (html, css) in PAGES.items():
+        rows = {True: [], False: []}
+        for _ in range(runs):
+            for single_call in (True, False):
+                rows[single_call].append(await convert(html, css, profile, single_call, counter))
+        fast, full = rows[True], rows[False]
+        print(
+            f"{name:>10}: single-call {statistics.median(r['wall_ms'] for r in fast):7.0f}ms "
+            f"({statistics.mean(r['llm_calls'] for r in fast):.1f} calls) | "
+            f"graph {statistics.median(r['wall_ms'] for r in full):7.0f}ms "
+            f"({statistics.mean(r['llm_calls'] for r in full):.1f} calls) | "
+            f"mapped-type parity {statistics.mean(_jaccard(a['mapped'], b['mapped']) for a, b in zip(fast, full)):.2f} "
+            f"layout parity {statistics.mean(_jaccard(a['layout'], b['layout']) for a, b in zip(fast, full)):.2f} "
+            f"components {statistics.mean(sum(r['mapped'].values()) for r in fast):.1f} vs "
+            f"{statistics.mean(sum(r['mapped'].values()) for r in full):.1f} "
+            f"errors {sum(bool(r['error']) for r in fast)}/{sum(bool(r['error']) for r in full)}"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--profile", choices=["fast", "balanced", "thorough"], default="thorough")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.runs, args.profile))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# ai/benchmarks/bench_state_memory.py
+"""Peak memory of one workflow run on a large page: full-state copies vs deltas.
+
+The five agent nodes are replaced by stubs that produce stage outputs
+proportional to the page size, so only the state handling is measured
+(no LLM calls). Each mode runs in a fresh subprocess so peak RSS is not
+shared between them; the Python heap peak during the run is reported
+alongside it. Progress events are serialized the way
+/convert/stream does.
+
+    python benchmarks/bench_state_memory.py [--size-mb 2]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NODES = ["HTML_PARSER", "COMPONENT_MAPPER", "LAYOUT_TRANSLATOR", "RAG_PATTERN", "COMPATIBILITY_RANKER"]
+OUTPUT_KEYS = {
+    "HTML_PARSER": "parsed_components",
+    "COMPONENT_MAPPER": "mapped_components",
+    "LAYOUT_TRANSLATOR": "layout_structure",
+    "RAG_PATTERN": "matched_patterns",
+    "COMPATIBILITY_RANKER": "compatibility",
+}
+
+def make_page(size_bytes: int) -> str:
+    block = '<section class="card"><h2>Title</h2><p>%s</p><a href="#">More</a></section>\n' % ("lorem ipsum " * 20)
+    return "<html><body>" + block * (size_bytes // len(block) + 1) + "</body></html>"
+
+def make_node(name: str, mode: str):
+    key = OUTPUT_KEYS[name]
+
+    async def node(state: dict) -> dict:
+        # Stages see their input serialized, as the real agents do
+        source = state["html_content"] if name == "HTML_PARSER" else json.dumps(state.get("mapped_components") or state["parsed_components"])
+        output = [{"tag": "section", "text": source[i:i + 2000]} for i in range(0, len(source), 2000)]
+        update = {key: output, "current_agent": f"{name}_COMPLETE"}
+        return {**state, **update} if mode == "copy" else update
+    return node
+
+def build_graph(mode: str):
+    from langgraph.graph import StateGraph, END
+    from agent import WorkflowState
+
+    workflow = StateGraph(WorkflowState)
+    for name in NODES:
+        workflow.add_node(name, make_node(name, mode))
+    workflow.set_entry_point("HTML_PARSER")
+    workflow.add_edge("HTML_PARSER", "COMPONENT_MAPPER")
+    if mode == "copy":
+        # The old graph ran every stage in sequence
+        workflow.add_edge("COMPONENT_MAPPER", "LAYOUT_TRANSLATOR")
+        workflow.add_edge("LAYOUT_TRANSLATOR", "RAG_PATTERN")
+        workflow.add_edge("RAG_PATTERN", "COMPATIBILITY_RANKER")
+    else:
+        workflow.add_edge("COMPONENT_MAPPER", "LAYOUT_TRANSLATOR")
+        workflow.add_edge("COMPONENT_MAPPER", "RAG_PATTERN")
+        workflow.add_edge(["LAYOUT_TRANSLATOR", "RAG_PATTERN"], "COMPATIBILITY_RANKER")
+    workflow.add_edge("COMPATIBILITY_RANKER", END)
+    return workflow.compile()
+
+async def run_once(mode: str, size_bytes: int) -> dict:
+    from agent import create_initial_state
+
+    graph = build_graph(mode)
+    page = make_page(size_bytes)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    started = time.perf_counter()
+    streamed = 0
+    async for chunk in graph.astream(create_initial_state(page, ""), stream_mode="updates"):
+        for node, update in chunk.items():
+            streamed += len(json.dumps({k: v for k, v in update.items() if k not in ("html_content", "css_content")}))
+    wall_ms = round((time.perf_counter() - started) * 1000, 1)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "page_bytes": len(page),
+        "wall_ms": wall_ms,
+        "streamed_bytes": streamed,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(peak / 1024, 1),
+        "rss_growth_mb": round((peak - baseline) / 1024, 1),
+        "heap_peak_mb": round(heap_peak / 1024 / 1024, 1),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--mode", choices=["copy", "delta"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size_bytes = int(args.size_mb * 1024 * 1024)
+
+    if args.mode:
+        print(json.dumps(asyncio.run(run_once(args.mode, size_bytes))))
+        return
+
+    for mode in ("copy", "delta"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--size-mb", str(args.size_mb), "--mode", mode],
+            capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{result['mode']:>5}: page={result['page_bytes'] / 1e6:.1f}MB "
+              f"peak_rss={result['peak_rss_mb']}MB (+{result['rss_growth_mb']}MB) "
+              f"heap_peak={result['heap_peak_mb']}MB "
+              f"streamed={result['streamed_bytes'] / 1e6:.1f}MB wall={result['wall_ms']}ms")
+
+if __name__ == "__main__":
+    main()
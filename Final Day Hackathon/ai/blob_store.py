@@ -0,0 +1,214 @@
+# ai/blob_store.py
+import os
+import json
+import asyncio
+import shutil
+import logging
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional, Union
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Values whose JSON is smaller than this stay inline in the workflow state
+BLOB_MIN_BYTES = int(os.getenv("LCNC_BLOB_MIN_BYTES", str(64 * 1024)))
+# Per-run memory budget; beyond it the largest blobs are spilled to disk
+BLOB_MEMORY_MAX_BYTES = int(os.getenv("LCNC_BLOB_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+BLOB_SPILL_DIR = os.getenv("LCNC_BLOB_SPILL_DIR", os.path.join(tempfile.gettempdir(), "lcnc-blobs"))
+
+# Key marking a state value as a handle into a run's blob store
+HANDLE_KEY = "$blob"
+
+class BlobNotFound(KeyError):
+    """Raised when a handle points at a blob (or a run) that is no longer stored"""
+
+class BlobStore:
+    """Large artifacts of one conversion run, stored once and referenced by handle.
+
+    Lists are kept as one JSON text per item, so a node that needs the
+    JSON of a list (or of a range of its items) gets it by joining those
+    texts instead of re-serializing the objects. Blobs spill to files under
+    spill_dir/run_id when the run exceeds its memory budget, or all at once
+    on persist() so a checkpointed run can be resumed by another process.
+    Spilling writes files, so writers (stash) run off the event loop; the
+    store is locked because the sections of a run share it.
+    """
+
+    def __init__(self, run_id: str, spill_dir: Optional[str] = None,
+                 memory_max_bytes: Optional[int] = None):
+        self.run_id = run_id
+        self.memory_max_bytes = BLOB_MEMORY_MAX_BYTES if memory_max_bytes is None else memory_max_bytes
+        self.memory_bytes = 0
+        self._dir = os.path.join(spill_dir or BLOB_SPILL_DIR, run_id)
+        self._blobs: Dict[str, Union[str, List[str]]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._next = len(os.listdir(self._dir)) if os.path.isdir(self._dir) else 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._dir, key)
+
+    def put(self, value: Any, encoded: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Store a list or string; returns its handle"""
+        with self._lock:
+            key = f"b{self._next}"
+            self._next += 1
+        if isinstance(value, str):
+            blob: Union[str, List[str]] = value
+            size = len(value)
+            handle = {HANDLE_KEY: f"{self.run_id}/{key}", "kind": "text", "bytes": size}
+        else:
+            blob = encoded if encoded is not None else [json.dumps(item) for item in value]
+            size = sum(len(text) for text in blob)
+            handle = {HANDLE_KEY: f"{self.run_id}/{key}", "kind": "list", "bytes": size, "items": len(blob)}
+        with self._lock:
+            self._blobs[key] = blob
+            self._sizes[key] = size
+            self.memory_bytes += size
+            while self.memory_bytes > self.memory_max_bytes and self._blobs:
+                self._spill(max(self._blobs, key=lambda k: self._sizes[k]))
+        return handle
+
+    def _spill(self, key: str) -> None:
+        # Called with the lock held. The file is complete before the blob
+        # leaves memory, so a concurrent reader always finds one or the other
+        blob = self._blobs[key]
+        os.makedirs(self._dir, exist_ok=True)
+        with open(self._path(key), "w", encoding="utf-8") as f:
+            if isinstance(blob, str):
+                f.write(blob)
+            else:
+                # One item per line; json.dumps never emits raw newlines
+                f.write("\n".join(blob))
+        del self._blobs[key]
+        self.memory_bytes -= self._sizes[key]
+        logger.info(f"Spilled blob {self.run_id}/{key} ({self._sizes[key]} bytes) to disk")
+
+    def _read(self, key: str, kind: str) -> Union[str, List[str]]:
+        blob = self._blobs.get(key)
+        if blob is not None:
+            return blob
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            raise BlobNotFound(f"Blob {self.run_id}/{key} is no longer available")
+        if kind == "text":
+            return text
+        return text.split("\n") if text else []
+
+    def get_json(self, handle: Dict[str, Any], start: Optional[int] = None, stop: Optional[int] = None) -> str:
+        """JSON text of a blob, or of items [start:stop] of a list blob"""
+        key = handle[HANDLE_KEY].rsplit("/", 1)[1]
+        blob = self._read(key, handle["kind"])
+        if isinstance(blob, str):
+            return json.dumps(blob[start:stop])
+        return "[" + ",".join(blob[start:stop]) + "]"
+
+    def get(self, handle: Dict[str, Any], start: Optional[int] = None, stop: Optional[int] = None) -> Any:
+        """Value of a blob, or the slice [start:stop] of it"""
+        key = handle[HANDLE_KEY].rsplit("/", 1)[1]
+        blob = self._read(key, handle["kind"])
+        if isinstance(blob, str):
+            return blob[start:stop]
+        return [json.loads(text) for text in blob[start:stop]]
+
+    def persist(self) -> None:
+        """Spill every in-memory blob so the run can be resumed later"""
+        with self._lock:
+            for key in list(self._blobs):
+                self._spill(key)
+
+    def close(self) -> None:
+        with self._lock:
+            self._blobs.clear()
+            self.memory_bytes = 0
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+# Stores of the runs in progress, by run id (the conversion id)
+_stores: Dict[str, BlobStore] = {}
+_stores_lock = threading.Lock()
+
+def open_blob_store(run_id: str) -> BlobStore:
+    """Return the blob store of a run, creating it (or reopening blobs a previous
+    process spilled) if needed. Only writers open stores; readers use _store_for."""
+    with _stores_lock:
+        store = _stores.get(run_id)
+        if store is None:
+            store = BlobStore(run_id)
+            _stores[run_id] = store
+    return store
+
+def close_blob_store(run_id: str, keep: bool = False) -> None:
+    """Drop a run's blobs; with keep=True they are persisted to disk for a resume.
+    Blocking file I/O: call it off the event loop."""
+    with _stores_lock:
+        store = _stores.pop(run_id, None)
+    if store is None:
+        return
+    if keep:
+        store.persist()
+    else:
+        store.close()
+
+def is_handle(value: Any) -> bool:
+    return isinstance(value, dict) and HANDLE_KEY in value
+
+def _store_for(handle: Dict[str, Any]) -> BlobStore:
+    """Store a handle points into: an open one, or one a run persisted to disk.
+    Never creates an empty store for a run that is gone."""
+    run_id = handle[HANDLE_KEY].rsplit("/", 1)[0]
+    store = _stores.get(run_id)
+    if store is not None:
+        return store
+    if not os.path.isdir(os.path.join(BLOB_SPILL_DIR, run_id)):
+        raise BlobNotFound(f"Blobs of run {run_id} are no longer available")
+    return open_blob_store(run_id)
+
+def stash(state: Dict[str, Any], value: Any) -> Any:
+    """Move a large list or string into the run's blob store and return its handle.
+
+    Small values, and values of runs without a store (state["blob_run"]
+    unset), are returned unchanged. May spill to disk, so async callers run
+    it in a thread.
+    """
+    run_id = state.get("blob_run")
+    if not run_id or is_handle(value):
+        return value
+    if isinstance(value, str):
+        if len(value) < BLOB_MIN_BYTES:
+            return value
+        return open_blob_store(run_id).put(value)
+    if isinstance(value, list):
+        encoded = [json.dumps(item) for item in value]
+        if sum(len(text) for text in encoded) < BLOB_MIN_BYTES:
+            return value
+        return open_blob_store(run_id).put(value, encoded)
+    return value
+
+def load(value: Any, start: Optional[int] = None, stop: Optional[int] = None) -> Any:
+    """Resolve a state value that may be a handle; start/stop select a slice"""
+    if is_handle(value):
+        return _store_for(value).get(value, start, stop)
+    if (start is not None or stop is not None) and isinstance(value, (list, str)):
+        return value[start:stop]
+    return value
+
+def load_json(value: Any, start: Optional[int] = None, stop: Optional[int] = None) -> str:
+    """JSON text of a state value that may be a handle, without re-serializing stored lists"""
+    if is_handle(value):
+        return _store_for(value).get_json(value, start, stop)
+    if (start is not None or stop is not None) and isinstance(value, (list, str)):
+        value = value[start:stop]
+    return json.dumps(value)
+
+async def aload(value: Any, start: Optional[int] = None, stop: Optional[int] = None) -> Any:
+    """load() for async callers: a handle may point at a spilled file, so it is read in a thread"""
+    if is_handle(value):
+        return await asyncio.to_thread(load, value, start, stop)
+    return load(value, start, stop)
+
+async def aload_json(value: Any, start: Optional[int] = None, stop: Optional[int] = None) -> str:
+    """load_json() for async callers, reading and serializing in a thread"""
+    return await asyncio.to_thread(load_json, value, start, stop)
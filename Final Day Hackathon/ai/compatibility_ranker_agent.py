@@ -6,12 +6,15 @@ from typing import Dict, Any
 from langchain.tools import Tool
 from langchain.prompts import PromptTemplate
 from langchain.agents import create_react_agent, AgentExecutor
-from utils import get_llm, normalize_to_list
+from utils import get_llm, normalize_to_list, capped_executor, ReActIterationCallback
+from metrics import timed_tool, record_parse_fallback
+from blob_store import aload_json
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def analyze_component_compatibility(args: dict) -> str:
+@timed_tool
+async def analyze_component_compatibility(args: dict) -> str:
     components = args.get("components", "")
     patterns = args.get("patterns", "")
     try:
@@ -51,7 +54,7 @@ Return ONLY a valid JSON object with this structure:
     "responsive_design": 0.85
   }}
 }}""")
-        response = llm.invoke(prompt.format(
+        response = await llm.ainvoke(prompt.format(
             components=components,
             patterns=patterns
         ))
@@ -60,7 +63,8 @@ Return ONLY a valid JSON object with this structure:
         logger.error(f"Error in analyze_component_compatibility: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def rank_implementation_options(args: dict) -> str:
+@timed_tool
+async def rank_implementation_options(args: dict) -> str:
     components = args.get("components", "")
     compatibility = args.get("compatibility", "")
     try:
@@ -104,7 +108,7 @@ Return ONLY a valid JSON object with this structure:
     "scalability_weight": 0.2
   }}
 }}""")
-        response = llm.invoke(prompt.format(
+        response = await llm.ainvoke(prompt.format(
             components=components,
             compatibility=compatibility
         ))
@@ -113,7 +117,8 @@ Return ONLY a valid JSON object with this structure:
         logger.error(f"Error in rank_implementation_options: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def optimize_component_selection(args: dict) -> str:
+@timed_tool
+async def optimize_component_selection(args: dict) -> str:
     rankings = args.get("rankings", "")
     compatibility = args.get("compatibility", "")
     try:
@@ -164,7 +169,7 @@ Return ONLY a valid JSON object with this structure:
     ]
   }}
 }}""")
-        response = llm.invoke(prompt.format(
+        response = await llm.ainvoke(prompt.format(
             rankings=rankings,
             compatibility=compatibility
         ))
@@ -173,7 +178,8 @@ Return ONLY a valid JSON object with this structure:
         logger.error(f"Error in optimize_component_selection: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def rank_component_compatibility(args) -> str:
+@timed_tool
+async def rank_component_compatibility(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -199,13 +205,14 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(components=components))
+        response = await llm.ainvoke(prompt.format(components=components))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in rank_component_compatibility: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def suggest_compatibility_fixes(args) -> str:
+@timed_tool
+async def suggest_compatibility_fixes(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -229,7 +236,7 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(compatibility=compatibility))
+        response = await llm.ainvoke(prompt.format(compatibility=compatibility))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in suggest_compatibility_fixes: {str(e)}")
@@ -243,35 +250,40 @@ def create_compatibility_ranker_agent():
     tools = [
         Tool(
             name="analyze_component_compatibility",
-            func=analyze_component_compatibility,
+            func=None,
+            coroutine=analyze_component_compatibility,
             description="""Analyze component compatibility.
             Input: dict with keys 'components' (JSON string) and 'patterns' (JSON string)
             Output: JSON with compatibility scores"""
         ),
         Tool(
             name="rank_implementation_options",
-            func=rank_implementation_options,
+            func=None,
+            coroutine=rank_implementation_options,
             description="""Rank implementation options.
             Input: dict with keys 'components' (JSON string) and 'compatibility' (JSON string)
             Output: JSON with ranked options"""
         ),
         Tool(
             name="optimize_component_selection",
-            func=optimize_component_selection,
+            func=None,
+            coroutine=optimize_component_selection,
             description="""Optimize component selection.
             Input: dict with keys 'rankings' (JSON string) and 'compatibility' (JSON string)
             Output: JSON with optimized selections"""
         ),
         Tool(
             name="rank_component_compatibility",
-            func=rank_component_compatibility,
+            func=None,
+            coroutine=rank_component_compatibility,
             description="""Rank component compatibility for LCNC platforms.
             Input: dict with key 'components' (JSON string)
             Output: JSON with ranked compatibility"""
         ),
         Tool(
             name="suggest_compatibility_fixes",
-            func=suggest_compatibility_fixes,
+            func=None,
+            coroutine=suggest_compatibility_fixes,
             description="""Suggest compatibility fixes for LCNC platforms.
             Input: dict with key 'compatibility' (JSON string)
             Output: JSON with suggested fixes"""
@@ -323,15 +335,22 @@ Current task: Rank and improve compatibility for these components: {optimized_co
     agent = create_react_agent(llm, tools, prompt)
     
     # Create the agent executor
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+    agent_executor = AgentExecutor(
+        agent=agent, tools=tools, verbose=True, handle_parsing_errors=True,
+        callbacks=[ReActIterationCallback("COMPATIBILITY_RANKER")]
+    )
     
-    def process_compatibility(state: dict) -> dict:
+    async def process_compatibility(state: dict) -> dict:
         logger.info("Compatibility Ranker: Starting processing")
+        if state.get("error"):
+            # One of the parallel branches failed; nothing to rank
+            logger.info("Compatibility Ranker: Skipping after upstream error")
+            return {}
         try:
             # Defensive fallback: use mapped_components if optimized_components is missing
             optimized_components = state.get("optimized_components", state.get("mapped_components", []))
-            result = agent_executor.invoke({
-                "optimized_components": json.dumps(optimized_components),
+            result = await capped_executor(agent_executor, state).ainvoke({
+                "optimized_components": await aload_json(optimized_components),
                 "tool_names": tool_names
             })
             output = result.get("output", "{}")
@@ -340,7 +359,6 @@ Current task: Rank and improve compatibility for these components: {optimized_co
                 if isinstance(parsed_result, dict) and "compatibility" in parsed_result:
                     compatibility = normalize_to_list(parsed_result["compatibility"])
                     return {
-                        **state,
                         "compatibility": compatibility,
                         "fixes": parsed_result.get("fixes", []),
                         "current_agent": "COMPATIBILITY_RANKER_COMPLETE"
@@ -348,7 +366,6 @@ Current task: Rank and improve compatibility for these components: {optimized_co
                 else:
                     compatibility = normalize_to_list(parsed_result)
                     return {
-                        **state,
                         "compatibility": compatibility,
                         "fixes": parsed_result.get("fixes", []),
                         "current_agent": "COMPATIBILITY_RANKER_COMPLETE"
@@ -357,10 +374,10 @@ Current task: Rank and improve compatibility for these components: {optimized_co
                 logger.error(f"Error parsing result: {str(e)}")
                 json_match = re.search(r'\{[\s\S]*\}', output)
                 if json_match:
+                    record_parse_fallback("COMPATIBILITY_RANKER")
                     try:
                         parsed_result = json.loads(json_match.group(0))
                         return {
-                            **state,
                             "compatibility": normalize_to_list(parsed_result),
                             "fixes": parsed_result.get("fixes", []),
                             "current_agent": "COMPATIBILITY_RANKER_COMPLETE"
@@ -369,7 +386,6 @@ Current task: Rank and improve compatibility for these components: {optimized_co
                         pass
                 # Fallback: return empty compatibility but continue workflow
                 return {
-                    **state,
                     "compatibility": [],
                     "fixes": [],
                     "current_agent": "COMPATIBILITY_RANKER_COMPLETE"
@@ -377,7 +393,6 @@ Current task: Rank and improve compatibility for these components: {optimized_co
         except Exception as e:
             logger.error(f"Compatibility Ranker Error: {str(e)}")
             return {
-                **state,
                 "error": f"Compatibility Ranker Error: {str(e)}",
                 "current_agent": "ERROR",
                 "compatibility": [],
@@ -5,13 +5,16 @@ import logging
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain.tools import Tool
 from langchain.prompts import PromptTemplate
-from utils import get_llm, normalize_to_list
+from utils import get_llm, normalize_to_list, capped_executor, ReActIterationCallback
+from metrics import timed_tool, record_parse_fallback
+from blob_store import aload_json
 from typing import Dict, Any
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def map_semantic_components(args) -> str:
+@timed_tool
+async def map_semantic_components(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -54,13 +57,14 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(component_data=component_data))
+        response = await llm.ainvoke(prompt.format(component_data=component_data))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in map_semantic_components: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def analyze_component_patterns(args) -> str:
+@timed_tool
+async def analyze_component_patterns(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -100,13 +104,14 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(components=components))
+        response = await llm.ainvoke(prompt.format(components=components))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in analyze_component_patterns: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def optimize_component_structure(args) -> str:
+@timed_tool
+async def optimize_component_structure(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -158,7 +163,7 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(
+        response = await llm.ainvoke(prompt.format(
             components=components,
             patterns=patterns
         ))
@@ -175,21 +180,24 @@ def create_component_mapper_agent():
     tools = [
         Tool(
             name="map_semantic_components",
-            func=map_semantic_components,
+            func=None,
+            coroutine=map_semantic_components,
             description="""Map HTML components to semantic LCNC components.
             Input: dict with key 'component_data' (JSON string of HTML component data)
             Output: JSON with mapped LCNC components"""
         ),
         Tool(
             name="analyze_component_patterns",
-            func=analyze_component_patterns,
+            func=None,
+            coroutine=analyze_component_patterns,
             description="""Analyze components for patterns and optimizations.
             Input: dict with key 'components' (JSON string of component data)
             Output: JSON with identified patterns and optimizations"""
         ),
         Tool(
             name="optimize_component_structure",
-            func=optimize_component_structure,
+            func=None,
+            coroutine=optimize_component_structure,
             description="""Optimize component structure using identified patterns.
             Input: dict with keys 'components' (JSON string) and 'patterns' (JSON string)
             Output: JSON with optimized component structure"""
@@ -236,16 +244,19 @@ Current task: Map and optimize these components: {parsed_components}
     agent = create_react_agent(llm, tools, prompt)
     
     # Create the agent executor
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+    agent_executor = AgentExecutor(
+        agent=agent, tools=tools, verbose=True, handle_parsing_errors=True,
+        callbacks=[ReActIterationCallback("COMPONENT_MAPPER")]
+    )
     
-    def process_mapping(state: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_mapping(state: Dict[str, Any]) -> Dict[str, Any]:
         """Process component mapping using LLM-orchestrated tools"""
         logger.info("Component Mapper: Starting processing")
         
         try:
             # Let the LLM orchestrate the tool calling
-            result = agent_executor.invoke({
-                "parsed_components": json.dumps(state["parsed_components"]),
+            result = await capped_executor(agent_executor, state).ainvoke({
+                "parsed_components": await aload_json(state["parsed_components"]),
                 "tool_names": tool_names
             })
             
@@ -256,7 +267,6 @@ Current task: Map and optimize these components: {parsed_components}
                 if isinstance(parsed_result, dict) and "mapped_components" in parsed_result:
                     mapped_components = normalize_to_list(parsed_result["mapped_components"])
                     return {
-                        **state,
                         "mapped_components": mapped_components,
                         "applied_patterns": parsed_result.get("applied_patterns", []),
                         "current_agent": "COMPONENT_MAPPER_COMPLETE"
@@ -264,7 +274,6 @@ Current task: Map and optimize these components: {parsed_components}
                 else:
                     mapped_components = normalize_to_list(parsed_result)
                     return {
-                        **state,
                         "mapped_components": mapped_components,
                         "applied_patterns": parsed_result.get("applied_patterns", []),
                         "current_agent": "COMPONENT_MAPPER_COMPLETE"
@@ -273,10 +282,10 @@ Current task: Map and optimize these components: {parsed_components}
                 logger.error(f"Error parsing result: {str(e)}")
                 json_match = re.search(r'\{[\s\S]*\}', output)
                 if json_match:
+                    record_parse_fallback("COMPONENT_MAPPER")
                     try:
                         parsed_result = json.loads(json_match.group(0))
                         return {
-                            **state,
                             "mapped_components": normalize_to_list(parsed_result),
                             "applied_patterns": parsed_result.get("applied_patterns", []),
                             "current_agent": "COMPONENT_MAPPER_COMPLETE"
@@ -286,7 +295,6 @@ Current task: Map and optimize these components: {parsed_components}
                 
                 # Return error state if all parsing fails
                 return {
-                    **state,
                     "error": f"Failed to parse result: {str(e)}",
                     "current_agent": "ERROR",
                     "mapped_components": [],
@@ -296,7 +304,6 @@ Current task: Map and optimize these components: {parsed_components}
         except Exception as e:
             logger.error(f"Component Mapper Error: {str(e)}")
             return {
-                **state,
                 "error": f"Component Mapper Error: {str(e)}",
                 "current_agent": "ERROR",
                 "mapped_components": [],
@@ -0,0 +1,250 @@
+# ai/component_pipeline.py
+import time
+import asyncio
+import logging
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional
+from html_parser_agent import parse_html_structure, parse_css_styles, merge_html_css
+from component_mapper_agent import map_semantic_components
+from layout_translator_agent import analyze_layout_structure
+from rag_pattern_agent import retrieve_similar_patterns
+from compatibility_ranker_agent import rank_component_compatibility
+from sectioning import split_into_sections, stitch_results
+from utils import normalize_to_list, parse_llm_json, prompt_batches
+from blob_store import aload, aload_json
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Marks the end of the item stream on a stage's input queue
+_DONE = object()
+# Stages a deadline may skip; without the parser and mapper there is no result
+_SKIPPABLE_STAGES = {"LAYOUT_TRANSLATOR", "COMPATIBILITY_RANKER"}
+
+def _tool_result(output: str, stage: str) -> Dict[str, Any]:
+    """Decode a tool's JSON output, raising if the tool reported an error"""
+    data = parse_llm_json(output, source=stage)
+    if isinstance(data, dict) and data.get("error") and len(data) == 1:
+        raise ValueError(data["error"])
+    return data if isinstance(data, dict) else {"items": data}
+
+async def _parse(item: Dict[str, Any]) -> Dict[str, Any]:
+    html_data = await parse_html_structure({"html_content": await aload(item["html_content"])})
+    css = item.get("css")
+    css_data = None
+    if css is not None:
+        # In the pipeline the stylesheet is parsed once per page (or per site) and
+        # shared; a deadline or a cancelled consumer must not cancel it for the rest
+        css_data = await asyncio.shield(css)
+    else:
+        css_content = await aload(item.get("css_content", ""))
+        if css_content.strip():
+            css_data = await parse_css_styles({"css_content": css_content})
+    if css_data is not None:
+        html_data = await merge_html_css({"html_data": html_data, "css_data": css_data})
+    data = _tool_result(html_data, "HTML_PARSER")
+    return {"parsed_components": normalize_to_list(data.get("components", data))}
+
+async def _map(item: Dict[str, Any]) -> Dict[str, Any]:
+    data = _tool_result(await map_semantic_components({
+        "component_data": await aload_json(item["parsed_components"])
+    }), "COMPONENT_MAPPER")
+    return {"mapped_components": normalize_to_list(data.get("mapped_components", data))}
+
+async def _layout(item: Dict[str, Any]) -> Dict[str, Any]:
+    # Components longer than one prompt are analyzed in batches, joined in order
+    batches = prompt_batches(normalize_to_list(await aload(item["mapped_components"])))
+    outputs = await asyncio.gather(*(analyze_layout_structure({"components": batch}) for batch in batches))
+    layout_structure: List[Any] = []
+    breakpoints: List[Any] = []
+    for output in outputs:
+        data = _tool_result(output, "LAYOUT_TRANSLATOR")
+        layout_structure.extend(normalize_to_list(data.get("layout_structure", data)))
+        breakpoints.extend(normalize_to_list(data.get("responsive_breakpoints")))
+    return {
+        "layout_structure": layout_structure,
+        "responsive_config": {item["name"]: breakpoints}
+    }
+
+async def _patterns(item: Dict[str, Any]) -> Dict[str, Any]:
+    data = _tool_result(await retrieve_similar_patterns({
+        "component_data": await aload_json(item["mapped_components"])
+    }), "RAG_PATTERN")
+    return {"matched_patterns": normalize_to_list(data.get("matched_patterns") or data.get("patterns"))}
+
+async def _ranking(item: Dict[str, Any]) -> Dict[str, Any]:
+    data = _tool_result(await rank_component_compatibility({
+        "components": await aload_json(item["mapped_components"])
+    }), "COMPATIBILITY_RANKER")
+    return {
+        "compatibility": normalize_to_list(data.get("compatibility")),
+        "fixes": normalize_to_list(data.get("fixes"))
+    }
+
+async def _rank(item: Dict[str, Any]) -> Dict[str, Any]:
+    patterns, ranking = await asyncio.gather(_patterns(item), _ranking(item))
+    return {**patterns, **ranking}
+
+# Stages in pipeline order; each consumes the previous stage's items as they arrive
+STAGES: List[Any] = [
+    ("HTML_PARSER", _parse),
+    ("COMPONENT_MAPPER", _map),
+    ("LAYOUT_TRANSLATOR", _layout),
+    ("COMPATIBILITY_RANKER", _rank),
+]
+
+# The same direct tool calls, one per workflow graph node
+_DIRECT_NODES: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {
+    "HTML_PARSER": _parse,
+    "COMPONENT_MAPPER": _map,
+    "LAYOUT_TRANSLATOR": _layout,
+    "RAG_PATTERN": _patterns,
+    "COMPATIBILITY_RANKER": _ranking,
+}
+
+def create_direct_node(node: str) -> Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+    """Workflow node that calls the agent's main tool once instead of running a ReAct loop"""
+    run = _DIRECT_NODES[node]
+
+    async def process_direct(state: Dict[str, Any]) -> Dict[str, Any]:
+        if state.get("error"):
+            return {}
+        logger.info(f"{node}: Starting direct processing")
+        item = {**state, "name": (state.get("section") or {}).get("name", "page")}
+        try:
+            update = await run(item)
+        except Exception as e:
+            logger.error(f"{node} Error: {str(e)}")
+            return {"error": f"{node} Error: {str(e)}", "current_agent": "ERROR"}
+        return {**update, "current_agent": f"{node}_COMPLETE"}
+
+    return process_direct
+
+async def astream_pipelined(
+    html_content: str,
+    css_content: str,
+    conversion_id: Optional[str] = None,
+    stages: Optional[List[str]] = None,
+    css_data: Optional[Awaitable[str]] = None,
+    deadline: Optional[float] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Convert a page with one worker per stage connected by async queues.
+
+    The page is cut into top-level components (sections) which the parser
+    emits one by one; the mapper starts on the header while the parser is
+    still on the footer, and so on down the chain. Events match
+    astream_html_to_lcnc; the result's analysis_report carries a "timeline"
+    of (stage, section, start_ms, end_ms) spans showing the overlap.
+    stages limits the run to the named stages (e.g. a profile's).
+    css_data is an already started parse_css_styles result shared with other
+    pages (see site_bundle); it is used instead of parsing css_content.
+    deadline (absolute time.time()) caps every stage call; once it has
+    passed, layout and ranking are skipped (listed in degraded_nodes) and
+    the parser and mapper fail the section. The result event also carries
+    "section_results", each section's own result.
+    """
+    started = time.perf_counter()
+    sections = await asyncio.to_thread(split_into_sections, html_content)
+    css = css_data
+    own_css = None
+    if css is None and css_content.strip():
+        css = own_css = asyncio.ensure_future(parse_css_styles({"css_content": css_content}))
+    items = [
+        {"index": i, "name": s["name"], "html_content": s["html"], "css": css}
+        for i, s in enumerate(sections)
+    ]
+    pipeline = [(stage, run) for stage, run in STAGES if stages is None or stage in stages]
+    queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(len(pipeline) + 1)]
+    events: asyncio.Queue = asyncio.Queue()
+    timeline: List[Dict[str, Any]] = []
+
+    def now_ms() -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    async def worker(stage: str, run: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                     inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                await outbox.put(_DONE)
+                return
+            if not item.get("error"):
+                span = {"stage": stage, "section": item["name"], "start_ms": now_ms()}
+                try:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    update = await asyncio.wait_for(run(item), timeout=remaining)
+                    item.update(update)
+                    await events.put({
+                        "event": "stage", "node": stage, "section": item["name"],
+                        "data": update, "elapsed_ms": now_ms()
+                    })
+                except asyncio.TimeoutError:
+                    logger.warning(f"Pipeline {stage} ran out of time on {item['name']}")
+                    if stage in _SKIPPABLE_STAGES:
+                        item.setdefault("degraded_nodes", []).append(
+                            {"node": stage, "mode": "skipped", "section": item["name"]}
+                        )
+                    else:
+                        item["error"] = f"{stage}: deadline exceeded"
+                except Exception as e:
+                    logger.error(f"Pipeline {stage} failed on {item['name']}: {str(e)}")
+                    item["error"] = f"{stage} error: {str(e)}"
+                span["end_ms"] = now_ms()
+                timeline.append(span)
+            await outbox.put(item)
+
+    async def feed() -> None:
+        for item in items:
+            await queues[0].put(item)
+        await queues[0].put(_DONE)
+
+    tasks = [asyncio.create_task(feed())] + [
+        asyncio.create_task(worker(stage, run, queues[i], queues[i + 1]))
+        for i, (stage, run) in enumerate(pipeline)
+    ]
+
+    async def close_events() -> None:
+        await asyncio.gather(*tasks)
+        await events.put(_DONE)
+
+    closer = asyncio.create_task(close_events())
+    try:
+        while True:
+            event = await events.get()
+            if event is _DONE:
+                break
+            yield event
+    finally:
+        # A shared css_data belongs to the caller and may still be awaited by other pages
+        for task in tasks + [closer] + ([own_css] if own_css is not None else []):
+            task.cancel()
+
+    finished: List[Dict[str, Any]] = []
+    while not queues[-1].empty():
+        item = queues[-1].get_nowait()
+        if item is not _DONE:
+            finished.append(item)
+    finished.sort(key=lambda item: item["index"])
+
+    results = [{
+        "error": item.get("error"),
+        "lcnc_structure": item.get("layout_structure") or item.get("mapped_components") or [],
+        "analysis_report": {
+            "matched_patterns": item.get("matched_patterns", []),
+            "compatibility": item.get("compatibility", []),
+            "fixes": item.get("fixes", []),
+            "responsive_config": item.get("responsive_config", {}),
+            "degraded_nodes": item.get("degraded_nodes", [])
+        }
+    } for item in finished]
+    result = stitch_results(sections, results)
+    result["conversion_id"] = conversion_id
+    wall_ms = now_ms()
+    result["analysis_report"]["timeline"] = sorted(timeline, key=lambda span: span["start_ms"])
+    result["analysis_report"]["pipeline"] = {
+        "wall_ms": wall_ms,
+        # Sum of all stage spans; the gap to wall_ms is the overlap gained
+        "serial_ms": round(sum(span["end_ms"] - span["start_ms"] for span in timeline), 1)
+    }
+    yield {"event": "result", "data": result, "section_results": results}
@@ -0,0 +1,132 @@
+# ai/conversion_store.py
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Where finished conversions are kept for incremental re-conversion; empty disables
+CONVERSION_DB_PATH = os.getenv(
+    "LCNC_CONVERSION_DB_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "conversions.sqlite3")
+)
+# Conversions older than this (seconds) are pruned
+CONVERSION_TTL = float(os.getenv("LCNC_CONVERSION_TTL", str(7 * 24 * 3600)))
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class ConversionStore:
+    """SQLite record of each conversion: its result and every section's own result.
+
+    A record is {"conversion_id", "profile", "css_hash", "sections", "result",
+    "created_at"}, where sections is a list of {"name", "tag", "chars",
+    "fingerprint", "result"} in document order.
+    """
+
+    def __init__(self, db_path: str, ttl: float = CONVERSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS conversions (
+                id TEXT PRIMARY KEY,
+                profile TEXT NOT NULL,
+                css_hash TEXT NOT NULL,
+                sections TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS conversions_created ON conversions (created_at)")
+        self._conn.commit()
+
+    def _save(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversions (id, profile, css_hash, sections, result, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    record["conversion_id"],
+                    record["profile"],
+                    record["css_hash"],
+                    json.dumps(record["sections"]),
+                    json.dumps(record["result"]),
+                    now
+                )
+            )
+            self._conn.execute("DELETE FROM conversions WHERE created_at < ?", (now - self.ttl,))
+            self._conn.commit()
+
+    def _load(self, conversion_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, profile, css_hash, sections, result, created_at FROM conversions "
+                "WHERE id = ? AND created_at >= ?",
+                (conversion_id, time.time() - self.ttl)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "conversion_id": row[0],
+            "profile": row[1],
+            "css_hash": row[2],
+            "sections": json.loads(row[3]),
+            "result": json.loads(row[4]),
+            "created_at": row[5]
+        }
+
+    def _load_result(self, conversion_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM conversions WHERE id = ? AND created_at >= ?",
+                (conversion_id, time.time() - self.ttl)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"result": json.loads(row[0]), "created_at": row[1]}
+
+    async def save(
+        self,
+        conversion_id: str,
+        profile: str,
+        css_hash: str,
+        sections: List[Dict[str, Any]],
+        result: Dict[str, Any]
+    ) -> None:
+        await asyncio.to_thread(self._save, {
+            "conversion_id": conversion_id,
+            "profile": profile,
+            "css_hash": css_hash,
+            "sections": sections,
+            "result": result
+        })
+
+    async def get(self, conversion_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._load, conversion_id)
+
+    async def get_result(self, conversion_id: str) -> Optional[Dict[str, Any]]:
+        """Only the stored result and its created_at, without the per-section results"""
+        return await asyncio.to_thread(self._load_result, conversion_id)
+
+_store: Optional[ConversionStore] = None
+_store_lock = threading.Lock()
+
+def get_conversion_store() -> Optional[ConversionStore]:
+    """Process-wide conversion store, or None when LCNC_CONVERSION_DB_PATH is empty"""
+    global _store
+    if not CONVERSION_DB_PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConversionStore(CONVERSION_DB_PATH)
+    return _store
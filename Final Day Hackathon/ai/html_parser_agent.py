@@ -5,13 +5,16 @@ import logging
 from langchain.tools import Tool
 from langchain.prompts import PromptTemplate
 from langchain.agents import create_react_agent, AgentExecutor
-from utils import get_llm, normalize_to_list
+from utils import get_llm, normalize_to_list, capped_executor, ReActIterationCallback
+from metrics import timed_tool, record_parse_fallback
+from blob_store import aload
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Tool functions that use LLM
-def parse_html_structure(args) -> str:
+@timed_tool
+async def parse_html_structure(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -55,13 +58,14 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(html_content=html_content))
+        response = await llm.ainvoke(prompt.format(html_content=html_content))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in parse_html_structure: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def parse_css_styles(args) -> str:
+@timed_tool
+async def parse_css_styles(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -99,13 +103,14 @@ Return ONLY a valid JSON object with this structure:
     }}
   }}
 }}""")
-        response = llm.invoke(prompt.format(css_content=css_content))
+        response = await llm.ainvoke(prompt.format(css_content=css_content))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in parse_css_styles: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def merge_html_css(args) -> str:
+@timed_tool
+async def merge_html_css(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -147,7 +152,7 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(html_data=html_data, css_data=css_data))
+        response = await llm.ainvoke(prompt.format(html_data=html_data, css_data=css_data))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in merge_html_css: {str(e)}")
@@ -161,21 +166,24 @@ def create_html_parser_agent():
     tools = [
         Tool(
             name="parse_html_structure",
-            func=parse_html_structure,
+            func=None,
+            coroutine=parse_html_structure,
             description="""Parse HTML content and extract structured component data. 
             Input: dict with key 'html_content' (raw HTML string)
             Output: JSON with component hierarchy, semantic types, and attributes"""
         ),
         Tool(
             name="parse_css_styles",
-            func=parse_css_styles,
+            func=None,
+            coroutine=parse_css_styles,
             description="""Parse CSS content and extract style rules and patterns. 
             Input: dict with key 'css_content' (raw CSS string)
             Output: JSON with grouped styles and identified patterns"""
         ),
         Tool(
             name="merge_html_css",
-            func=merge_html_css,
+            func=None,
+            coroutine=merge_html_css,
             description="""Merge HTML structure with CSS styles.
             Input: dict with keys 'html_data' (JSON string) and 'css_data' (JSON string)
             Output: JSON with combined component and style data"""
@@ -222,17 +230,20 @@ Current task: Parse and analyze this HTML content: {html_content} and CSS conten
     agent = create_react_agent(llm, tools, prompt)
     
     # Create the agent executor
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+    agent_executor = AgentExecutor(
+        agent=agent, tools=tools, verbose=True, handle_parsing_errors=True,
+        callbacks=[ReActIterationCallback("HTML_PARSER")]
+    )
     
-    def process_parsing(state: dict) -> dict:
+    async def process_parsing(state: dict) -> dict:
         """Process HTML/CSS content using LLM-orchestrated tools"""
         logger.info("HTML Parser: Starting processing")
         
         try:
             # Let the LLM orchestrate the tool calling
-            result = agent_executor.invoke({
-                "html_content": state["html_content"],
-                "css_content": state["css_content"],
+            result = await capped_executor(agent_executor, state).ainvoke({
+                "html_content": await aload(state["html_content"]),
+                "css_content": await aload(state["css_content"]),
                 "tool_names": tool_names
             })
             
@@ -243,7 +254,6 @@ Current task: Parse and analyze this HTML content: {html_content} and CSS conten
                 if isinstance(parsed_result, dict) and "components" in parsed_result:
                     components = normalize_to_list(parsed_result["components"])
                     return {
-                        **state,
                         "parsed_components": components,
                         "current_agent": "HTML_PARSER_COMPLETE"
                     }
@@ -251,7 +261,6 @@ Current task: Parse and analyze this HTML content: {html_content} and CSS conten
                     # fallback: return the whole parsed_result as parsed_components
                     components = normalize_to_list(parsed_result)
                     return {
-                        **state,
                         "parsed_components": components,
                         "current_agent": "HTML_PARSER_COMPLETE"
                     }
@@ -260,10 +269,10 @@ Current task: Parse and analyze this HTML content: {html_content} and CSS conten
                 # Try to extract JSON from text if direct parsing fails
                 json_match = re.search(r'\{[\s\S]*\}', output)
                 if json_match:
+                    record_parse_fallback("HTML_PARSER")
                     try:
                         parsed_result = json.loads(json_match.group(0))
                         return {
-                            **state,
                             "parsed_components": normalize_to_list(parsed_result),
                             "current_agent": "HTML_PARSER_COMPLETE"
                         }
@@ -272,7 +281,6 @@ Current task: Parse and analyze this HTML content: {html_content} and CSS conten
                 
                 # Return error state if all parsing fails
                 return {
-                    **state,
                     "error": f"Failed to parse result: {str(e)}",
                     "current_agent": "ERROR",
                     "parsed_components": []
@@ -281,7 +289,6 @@ Current task: Parse and analyze this HTML content: {html_content} and CSS conten
         except Exception as e:
             logger.error(f"HTML Parser Error: {str(e)}")
             return {
-                **state,
                 "error": f"HTML Parser Error: {str(e)}",
                 "current_agent": "ERROR",
                 "parsed_components": []
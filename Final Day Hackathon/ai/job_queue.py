@@ -0,0 +1,186 @@
+# ai/job_queue.py
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Queue settings
+JOB_WORKERS = int(os.getenv("LCNC_JOB_WORKERS", "2"))
+JOB_DB_PATH = os.getenv(
+    "LCNC_JOB_DB_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "jobs.sqlite3")
+)
+# How often idle workers re-check the table in case a wake-up was missed
+JOB_POLL_INTERVAL = float(os.getenv("LCNC_JOB_POLL_INTERVAL", "2.0"))
+
+# handler(payload, on_stage) -> result; on_stage(node, duration_ms) records progress
+JobHandler = Callable[[Dict[str, Any], Callable[[str, float], Awaitable[None]]], Awaitable[Dict[str, Any]]]
+
+class JobQueue:
+    """Persistent SQLite-backed queue drained by a pool of in-process workers"""
+
+    def __init__(self, db_path: str, handler: JobHandler, workers: int = JOB_WORKERS):
+        self.handler = handler
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._wake = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                stage_timings TEXT NOT NULL DEFAULT '[]',
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        # Jobs that were running when the process stopped go back on the queue
+        self._conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, stage_timings = '[]' "
+            "WHERE status = 'running'"
+        )
+        self._conn.commit()
+
+    # --- storage (blocking, called through asyncio.to_thread) ---
+
+    def _insert(self, job_id: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(payload), time.time())
+            )
+            self._conn.commit()
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                (time.time(), row[0])
+            )
+            self._conn.commit()
+            return {"id": row[0], "payload": json.loads(row[1])}
+
+    def _append_timing(self, job_id: str, node: str, duration_ms: float) -> None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stage_timings FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            timings = json.loads(row[0]) if row else []
+            timings.append({"node": node, "duration_ms": duration_ms})
+            self._conn.execute(
+                "UPDATE jobs SET stage_timings = ? WHERE id = ?", (json.dumps(timings), job_id)
+            )
+            self._conn.commit()
+
+    def _finish(self, job_id: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (
+                    "failed" if error else "completed",
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id
+                )
+            )
+            self._conn.commit()
+
+    def _fetch(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, result, error, stage_timings, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "result": json.loads(row[2]) if row[2] else None,
+            "error": row[3],
+            "stage_timings": json.loads(row[4]),
+            "created_at": row[5],
+            "started_at": row[6],
+            "finished_at": row[7]
+        }
+
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    # --- public API ---
+
+    async def submit(self, payload: Dict[str, Any]) -> str:
+        """Persist a job and wake a worker; returns the job id"""
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._insert, job_id, payload)
+        self._wake.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._fetch, job_id)
+
+    async def stats(self) -> Dict[str, int]:
+        counts = await asyncio.to_thread(self._counts)
+        return {"depth": counts["queued"], "workers": self.workers, **counts}
+
+    def start(self) -> None:
+        """Start the worker pool on the running event loop"""
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._wake.set()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int) -> None:
+        logger.info(f"Job worker {index} started")
+        while True:
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id = job["id"]
+            logger.info(f"Job worker {index}: running job {job_id}")
+
+            async def on_stage(node: str, duration_ms: float) -> None:
+                await asyncio.to_thread(self._append_timing, job_id, node, duration_ms)
+
+            try:
+                result = await self.handler(job["payload"], on_stage)
+                await asyncio.to_thread(self._finish, job_id, result, result.get("error"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}")
+                await asyncio.to_thread(self._finish, job_id, None, str(e))
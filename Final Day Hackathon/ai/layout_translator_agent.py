@@ -1,17 +1,21 @@
 # ai/layout_translator_agent.py
 import json
+import asyncio
 import logging
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List
 from langchain.tools import Tool
 from langchain.prompts import PromptTemplate
 from langchain.agents import create_react_agent, AgentExecutor
-from utils import get_llm, normalize_to_list
+from utils import get_llm, normalize_to_list, capped_executor, prompt_batches, ReActIterationCallback
+from metrics import timed_tool, record_parse_fallback
+from blob_store import aload
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def analyze_layout_structure(args) -> str:
+@timed_tool
+async def analyze_layout_structure(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -62,13 +66,16 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(components=components))
+        if not isinstance(components, str):
+            components = json.dumps(components)
+        response = await llm.ainvoke(prompt.format(components=components))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in analyze_layout_structure: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def translate_layout_styles(args) -> str:
+@timed_tool
+async def translate_layout_styles(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -117,13 +124,14 @@ Return ONLY a valid JSON object with this structure:
     }}
   }}
 }}""")
-        response = llm.invoke(prompt.format(styles=styles))
+        response = await llm.ainvoke(prompt.format(styles=styles))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in translate_layout_styles: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def optimize_layout_structure(args) -> str:
+@timed_tool
+async def optimize_layout_structure(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -184,7 +192,7 @@ Return ONLY a valid JSON object with this structure:
     "spacing_scale": "geometric"
   }}
 }}""")
-        response = llm.invoke(prompt.format(
+        response = await llm.ainvoke(prompt.format(
             layout=layout,
             styles=styles
         ))
@@ -201,21 +209,24 @@ def create_layout_translator_agent():
     tools = [
         Tool(
             name="analyze_layout_structure",
-            func=analyze_layout_structure,
+            func=None,
+            coroutine=analyze_layout_structure,
             description="""Analyze component layout structure.
             Input: dict with key 'components' (JSON string of component data)
             Output: JSON with layout structure and responsive breakpoints"""
         ),
         Tool(
             name="translate_layout_styles",
-            func=translate_layout_styles,
+            func=None,
+            coroutine=translate_layout_styles,
             description="""Translate CSS styles to LCNC layout properties.
             Input: dict with key 'styles' (JSON string of style data)
             Output: JSON with translated layout properties"""
         ),
         Tool(
             name="optimize_layout_structure",
-            func=optimize_layout_structure,
+            func=None,
+            coroutine=optimize_layout_structure,
             description="""Optimize layout structure with translated styles.
             Input: dict with keys 'layout' (JSON string) and 'styles' (JSON string)
             Output: JSON with optimized layout structure"""
@@ -262,71 +273,77 @@ Current task: Analyze and optimize this layout: {mapped_components}
     agent = create_react_agent(llm, tools, prompt)
     
     # Create the agent executor
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+    agent_executor = AgentExecutor(
+        agent=agent, tools=tools, verbose=True, handle_parsing_errors=True,
+        callbacks=[ReActIterationCallback("LAYOUT_TRANSLATOR")]
+    )
     
-    def process_layout(state: Dict[str, Any]) -> Dict[str, Any]:
-        """Process layout translation using LLM-orchestrated tools"""
-        logger.info("Layout Translator: Starting processing")
-        
+    async def translate_batch(state: Dict[str, Any], mc_json: str) -> Dict[str, Any]:
+        """Layout of one batch of mapped components"""
+        # Let the LLM orchestrate the tool calling
+        result = await capped_executor(agent_executor, state).ainvoke({
+            "mapped_components": mc_json,
+            "tool_names": tool_names
+        })
+
+        # Parse the final result
+        output = result.get("output", "{}")
         try:
-            # Let the LLM orchestrate the tool calling
-            mc_json = json.dumps(state["mapped_components"])
-            # Hard cap to avoid 16k-token overflow (≈4 chars ≈1 token simplistically)
-            if len(mc_json) > 12000:
-                mc_json = mc_json[:12000] + "...TRUNCATED"  # indicate truncation
-
-            result = agent_executor.invoke({
-                "mapped_components": mc_json,
-                "tool_names": tool_names
-            })
-            
-            # Parse the final result
-            output = result.get("output", "{}")
-            try:
-                parsed_result = json.loads(output)
-                if isinstance(parsed_result, dict) and "layout_structure" in parsed_result:
-                    layout_structure = normalize_to_list(parsed_result["layout_structure"])
-                    return {
-                        **state,
-                        "layout_structure": layout_structure,
-                        "responsive_config": parsed_result.get("responsive_config", {}),
-                        "current_agent": "LAYOUT_TRANSLATOR_COMPLETE"
-                    }
-                else:
-                    layout_structure = normalize_to_list(parsed_result)
-                    return {
-                        **state,
-                        "layout_structure": layout_structure,
-                        "responsive_config": parsed_result.get("responsive_config", {}),
-                        "current_agent": "LAYOUT_TRANSLATOR_COMPLETE"
-                    }
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.error(f"Error parsing result: {str(e)}")
-                json_match = re.search(r'\{[\s\S]*\}', output)
-                if json_match:
-                    try:
-                        parsed_result = json.loads(json_match.group(0))
-                        return {
-                            **state,
-                            "layout_structure": normalize_to_list(parsed_result),
-                            "responsive_config": parsed_result.get("responsive_config", {}),
-                            "current_agent": "LAYOUT_TRANSLATOR_COMPLETE"
-                        }
-                    except:
-                        pass
-                
-                # Graceful fallback: continue with empty layout_structure
+            parsed_result = json.loads(output)
+            if isinstance(parsed_result, dict) and "layout_structure" in parsed_result:
                 return {
-                    **state,
-                    "layout_structure": normalize_to_list({}),
-                    "responsive_config": {},
-                    "current_agent": "LAYOUT_TRANSLATOR_COMPLETE"
+                    "layout_structure": normalize_to_list(parsed_result["layout_structure"]),
+                    "responsive_config": parsed_result.get("responsive_config", {})
                 }
+            return {
+                "layout_structure": normalize_to_list(parsed_result),
+                "responsive_config": parsed_result.get("responsive_config", {})
+            }
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Error parsing result: {str(e)}")
+            json_match = re.search(r'\{[\s\S]*\}', output)
+            if json_match:
+                record_parse_fallback("LAYOUT_TRANSLATOR")
+                try:
+                    parsed_result = json.loads(json_match.group(0))
+                    return {
+                        "layout_structure": normalize_to_list(parsed_result),
+                        "responsive_config": parsed_result.get("responsive_config", {})
+                    }
+                except:
+                    pass
+
+            # Graceful fallback: continue with empty layout_structure
+            return {"layout_structure": normalize_to_list({}), "responsive_config": {}}
+
+    async def process_layout(state: Dict[str, Any]) -> Dict[str, Any]:
+        """Process layout translation using LLM-orchestrated tools.
+
+        Mapped components longer than one prompt are translated in batches
+        (see prompt_batches) and their layouts joined in order. Runs in
+        parallel with the RAG pattern agent, so only the keys this node
+        changes are returned.
+        """
+        logger.info("Layout Translator: Starting processing")
+        
+        try:
+            batches = prompt_batches(normalize_to_list(await aload(state["mapped_components"])))
+            results = await asyncio.gather(*(translate_batch(state, batch) for batch in batches))
+            layout_structure: List[Any] = []
+            responsive_config: Dict[str, Any] = {}
+            for result in results:
+                layout_structure.extend(result["layout_structure"])
+                if isinstance(result["responsive_config"], dict):
+                    responsive_config.update(result["responsive_config"])
+            return {
+                "layout_structure": layout_structure,
+                "responsive_config": responsive_config,
+                "current_agent": "LAYOUT_TRANSLATOR_COMPLETE"
+            }
                 
         except Exception as e:
             logger.error(f"Layout Translator Error: {str(e)}")
             return {
-                **state,
                 "error": f"Layout Translator Error: {str(e)}",
                 "current_agent": "ERROR",
                 "layout_structure": normalize_to_list({}),
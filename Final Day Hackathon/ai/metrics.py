@@ -0,0 +1,158 @@
+# ai/metrics.py
+import time
+import logging
+import functools
+import threading
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Prometheus text exposition format served by GET /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets (seconds): LLM-backed stages take from under a second to minutes
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        for key, values in series:
+            for bound, count in zip(self.buckets, values):
+                labels = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(count)}")
+            labels = _format_labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(values[-1])}")
+        return lines
+
+REQUEST_LATENCY = Histogram(
+    "lcnc_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+NODE_LATENCY = Histogram(
+    "lcnc_node_duration_seconds", "Workflow graph node latency", ("node",)
+)
+TOOL_LATENCY = Histogram(
+    "lcnc_tool_duration_seconds", "Agent tool function latency", ("tool",)
+)
+LLM_CALLS = Counter("lcnc_llm_calls_total", "LLM calls started", ("model",))
+LLM_TOKENS = Counter("lcnc_llm_tokens_total", "LLM tokens used", ("model", "kind"))
+REACT_ITERATIONS = Counter(
+    "lcnc_react_iterations_total", "ReAct agent steps (tool actions and final answers)", ("node",)
+)
+PARSE_FALLBACKS = Counter(
+    "lcnc_parse_fallbacks_total", "LLM outputs that needed the {...} regex to parse as JSON", ("source",)
+)
+
+_METRICS = [REQUEST_LATENCY, NODE_LATENCY, TOOL_LATENCY, LLM_CALLS, LLM_TOKENS, REACT_ITERATIONS, PARSE_FALLBACKS]
+
+def render() -> str:
+    """Every metric in the Prometheus text format"""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Hooks called by the agents, tools and app
+
+def timed_tool(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorate an async tool function to record its latency under its name"""
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - started, tool=func.__name__)
+    return wrapper
+
+def timed_node(name: str, node: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a workflow graph node (state, config) to record its latency"""
+    async def run(state: Dict[str, Any], config: Any) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            return await node(state, config)
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - started, node=name)
+    return run
+
+def record_request(method: str, route: str, status: int, seconds: float) -> None:
+    REQUEST_LATENCY.observe(seconds, method=method, route=route, status=status)
+
+def record_llm_call(model: str) -> None:
+    LLM_CALLS.inc(model=model)
+
+def record_llm_tokens(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+def record_react_iteration(node: str) -> None:
+    REACT_ITERATIONS.inc(node=node)
+
+def record_parse_fallback(source: str) -> None:
+    PARSE_FALLBACKS.inc(source=source)
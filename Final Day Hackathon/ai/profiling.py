@@ -0,0 +1,221 @@
+# ai/profiling.py
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+import weakref
+from collections import Counter
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# How often the sampler looks at every thread's stack
+PROFILE_INTERVAL_SECONDS = float(os.getenv("LCNC_PROFILE_INTERVAL_MS", "5")) / 1000
+
+# Set in the context of the profiled coroutine; tasks it spawns inherit it
+_profiled: contextvars.ContextVar = contextvars.ContextVar("lcnc_profiled", default=False)
+
+# asyncio.to_thread work runs in the loop's default executor, whose threads are named asyncio_N
+_EXECUTOR_THREAD_PREFIX = "asyncio_"
+
+# Running task of each loop. There is no public way to read another thread's
+# current task, so this is CPython's private registry; without it the sampler
+# falls back to matching stacks (see SamplingProfiler._running_category)
+_CURRENT_TASKS = getattr(asyncio.tasks, "_current_tasks", None)
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/")
+    return f"{code.co_name} ({'/'.join(path.split('/')[-2:])}:{code.co_firstlineno})"
+
+def _stack(frame: Any) -> List[Any]:
+    """Frames of a thread, outermost first"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+def _is(frame: Any, name: str, file_suffix: str) -> bool:
+    return frame.f_code.co_name == name and frame.f_code.co_filename.endswith(file_suffix)
+
+def _package(frame: Any) -> str:
+    """Top-level package a frame's code belongs to, for the CPU breakdown"""
+    path = frame.f_code.co_filename.replace("\\", "/")
+    if "-packages/" in path:
+        return path.split("-packages/", 1)[1].split("/", 1)[0].removesuffix(".py")
+    if os.path.dirname(path) == os.path.dirname(os.path.abspath(__file__)).replace("\\", "/"):
+        return "app"
+    parts = path.split("/")
+    # Standard library: the module or package under lib/pythonX.Y
+    for i, part in enumerate(parts[:-1]):
+        if part.startswith("python3"):
+            return parts[i + 1].removesuffix(".py")
+    return "other"
+
+class SamplingProfiler:
+    """Samples the event loop thread and the executor threads while one coroutine runs.
+
+    Each loop-thread sample is classified as:
+
+      cpu      the loop is running a task that belongs to the profiled coroutine
+               (itself or a task it spawned)
+      io_wait  the loop is idle in select(), i.e. everything is awaiting I/O
+      loop     the loop runs callbacks outside any task (transports, timers)
+      other    the loop is running some other request's task
+
+    Executor-thread samples taken while a worker runs an asyncio.to_thread
+    call are counted as "offloaded" (they may include other requests' work).
+    Stacks of cpu, io_wait, loop and offloaded samples are collapsed into
+    flamegraph.pl / speedscope input.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.loop = loop
+        self.interval = interval
+        self.samples = 0
+        self.split: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self.cpu_by_package: Counter = Counter()
+        self._loop_thread = threading.get_ident()
+        self._tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._previous_factory: Any = None
+
+    def _task_factory(self, loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any) -> asyncio.Task:
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        if (context.get(_profiled, False) if context is not None else _profiled.get()):
+            self._tasks.add(task)
+        return task
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        self.samples += 1
+
+        stack = _stack(frames.get(self._loop_thread))
+        category = self._running_category(stack)
+        self.split[category] += 1
+        if category == "io_wait":
+            self.stacks["[awaiting I/O]"] += 1
+        elif category in ("cpu", "loop"):
+            # Drop the event loop's own frames below the running handle
+            start = next((i + 1 for i, f in enumerate(stack) if _is(f, "_run", "events.py")), 0)
+            frames_run = stack[start:] or stack
+            self.stacks[";".join([f"[{category}]"] + [_frame_label(f) for f in frames_run])] += 1
+            if category == "cpu" and frames_run:
+                self.cpu_by_package[_package(frames_run[-1])] += 1
+
+        for ident, frame in frames.items():
+            if not names.get(ident, "").startswith(_EXECUTOR_THREAD_PREFIX):
+                continue
+            worker = _stack(frame)
+            start = next(
+                (i + 1 for i, f in enumerate(worker) if _is(f, "run", "concurrent/futures/thread.py")), None
+            )
+            if start is None:
+                continue  # idle worker waiting for work
+            self.split["offloaded"] += 1
+            self.stacks[";".join(["[offloaded]"] + [_frame_label(f) for f in worker[start:]])] += 1
+
+    def _running_category(self, stack: List[Any]) -> str:
+        """cpu, io_wait, loop or other for the loop thread's current stack"""
+        if _CURRENT_TASKS is not None:
+            task = _CURRENT_TASKS.get(self.loop)
+            if task is not None:
+                return "cpu" if task in self._tasks else "other"
+        else:
+            # A profiled task is running if its coroutine's frame is on the stack
+            on_stack = {id(frame) for frame in stack}
+            for task in list(self._tasks):
+                frame = getattr(task.get_coro(), "cr_frame", None)
+                if frame is not None and id(frame) in on_stack:
+                    return "cpu"
+        if stack and _is(stack[-1], "select", "selectors.py"):
+            return "io_wait"
+        # Without the task registry other requests' tasks are counted here too
+        return "loop"
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:  # never let the sampler take the process down
+                logger.warning(f"Profiler sample failed: {str(e)}")
+
+    def start(self) -> None:
+        self._previous_factory = self.loop.get_task_factory()
+        self.loop.set_task_factory(self._task_factory)
+        self._thread = threading.Thread(target=self._run, name="lcnc-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.loop.set_task_factory(self._previous_factory)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks ("frame;frame;frame count" per line), heaviest first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def report(self, wall_seconds: float) -> Dict[str, Any]:
+        """Wall time split and the CPU breakdown, in milliseconds"""
+        per_sample_ms = wall_seconds * 1000 / self.samples if self.samples else 0.0
+
+        def ms(count: float) -> float:
+            return round(count * per_sample_ms, 1)
+
+        return {
+            "wall_ms": round(wall_seconds * 1000, 1),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "split_ms": {
+                category: ms(self.split[category]) for category in ("cpu", "io_wait", "loop", "other", "offloaded")
+            },
+            "cpu_by_package_ms": {package: ms(count) for package, count in self.cpu_by_package.most_common()}
+        }
+
+# One profile at a time: the task factory is per loop
+_profile_lock = threading.Lock()
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+async def profile_coroutine(coro: Awaitable[Any], interval: float = PROFILE_INTERVAL_SECONDS) -> Tuple[Any, Dict[str, Any], str]:
+    """Run coro on the current loop under the sampling profiler.
+
+    Returns (coro's result, report, collapsed stacks). Raises ProfilerBusy
+    if another profile is in progress, closing coro unstarted.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        if asyncio.iscoroutine(coro):
+            coro.close()
+        raise ProfilerBusy("Another profile is already running")
+    try:
+        profiler = SamplingProfiler(asyncio.get_running_loop(), interval)
+        profiler.start()
+        started = time.perf_counter()
+        try:
+            token = _profiled.set(True)
+            try:
+                # Its own task, so it is marked like every task it spawns
+                result = await asyncio.ensure_future(coro)
+            finally:
+                _profiled.reset(token)
+        finally:
+            wall = time.perf_counter() - started
+            profiler.stop()
+        return result, profiler.report(wall), profiler.collapsed()
+    finally:
+        _profile_lock.release()
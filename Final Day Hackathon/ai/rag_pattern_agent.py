@@ -1,12 +1,15 @@
 # ai/rag_pattern_agent.py
 import json
+import asyncio
 import logging
 import re
 from typing import Dict, Any
 from langchain.tools import Tool
 from langchain.prompts import PromptTemplate
 from langchain.agents import create_react_agent, AgentExecutor
-from utils import get_llm, normalize_to_list
+from utils import get_llm, normalize_to_list, ReActIterationCallback
+from metrics import timed_tool
+from blob_store import aload_json
 try:
     from .vector_store import get_store  # when ai is a package
 except ImportError:
@@ -23,7 +26,8 @@ def _ensure_store():
     if _store is None:
         _store = get_store()
 
-def retrieve_similar_patterns(args: dict) -> str:
+@timed_tool
+async def retrieve_similar_patterns(args: dict) -> str:
     # Defensive handling if args is passed as a raw JSON string
     if isinstance(args, str):
         try:
@@ -71,13 +75,14 @@ Return ONLY a valid JSON object with this structure:
     "content"
   ]
 }}""")
-        response = llm.invoke(prompt.format(component_data=component_data))
+        response = await llm.ainvoke(prompt.format(component_data=component_data))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in retrieve_similar_patterns: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def analyze_pattern_compatibility(args: dict) -> str:
+@timed_tool
+async def analyze_pattern_compatibility(args: dict) -> str:
     patterns = args.get("patterns", "")
     layout = args.get("layout", "")
     try:
@@ -116,7 +121,7 @@ Return ONLY a valid JSON object with this structure:
   ],
   "overall_compatibility": 0.85
 }}""")
-        response = llm.invoke(prompt.format(
+        response = await llm.ainvoke(prompt.format(
             patterns=patterns,
             layout=layout
         ))
@@ -125,7 +130,8 @@ Return ONLY a valid JSON object with this structure:
         logger.error(f"Error in analyze_pattern_compatibility: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def generate_pattern_implementation(args: dict) -> str:
+@timed_tool
+async def generate_pattern_implementation(args: dict) -> str:
     patterns = args.get("patterns", "")
     compatibility = args.get("compatibility", "")
     try:
@@ -184,7 +190,7 @@ Return ONLY a valid JSON object with this structure:
     "required_dependencies": []
   }}
 }}""")
-        response = llm.invoke(prompt.format(
+        response = await llm.ainvoke(prompt.format(
             patterns=patterns,
             compatibility=compatibility
         ))
@@ -193,7 +199,8 @@ Return ONLY a valid JSON object with this structure:
         logger.error(f"Error in generate_pattern_implementation: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def retrieve_pattern_matches(args: dict) -> str:
+@timed_tool
+async def retrieve_pattern_matches(args: dict) -> str:
     """Retrieve pattern docs from vector DB most similar to query/component text."""
     if isinstance(args, str):
         query = args
@@ -202,14 +209,16 @@ def retrieve_pattern_matches(args: dict) -> str:
 
     try:
         _ensure_store()
-        docs = _store.similarity_search(query, k=5)
+        # Chroma search is blocking; keep it off the event loop
+        docs = await asyncio.to_thread(_store.similarity_search, query, k=5)
         patterns = [d.metadata for d in docs]
         return json.dumps({"patterns": patterns})
     except Exception as e:
         logger.error(f"Error in retrieve_pattern_matches: {str(e)}")
         return json.dumps({"error": str(e)})
 
-def suggest_pattern_applications(args) -> str:
+@timed_tool
+async def suggest_pattern_applications(args) -> str:
     if isinstance(args, str):
         try:
             args = json.loads(args)
@@ -238,7 +247,7 @@ Return ONLY a valid JSON object with this structure:
     }}
   ]
 }}""")
-        response = llm.invoke(prompt.format(patterns=patterns, components=components))
+        response = await llm.ainvoke(prompt.format(patterns=patterns, components=components))
         return response.content if hasattr(response, 'content') else str(response)
     except Exception as e:
         logger.error(f"Error in suggest_pattern_applications: {str(e)}")
@@ -252,35 +261,40 @@ def create_rag_pattern_agent():
     tools = [
         Tool(
             name="retrieve_similar_patterns",
-            func=retrieve_similar_patterns,
+            func=None,
+            coroutine=retrieve_similar_patterns,
             description="""Search for UI patterns matching components.
             Input: dict with key 'component_data' (JSON string of component data)
             Output: JSON with matched patterns and categories"""
         ),
         Tool(
             name="analyze_pattern_compatibility",
-            func=analyze_pattern_compatibility,
+            func=None,
+            coroutine=analyze_pattern_compatibility,
             description="""Analyze pattern compatibility with layout.
             Input: dict with keys 'patterns' (JSON string) and 'layout' (JSON string)
             Output: JSON with compatibility analysis"""
         ),
         Tool(
             name="generate_pattern_implementation",
-            func=generate_pattern_implementation,
+            func=None,
+            coroutine=generate_pattern_implementation,
             description="""Generate pattern implementation details.
             Input: dict with keys 'patterns' (JSON string) and 'compatibility' (JSON string)
             Output: JSON with implementation details"""
         ),
         Tool(
             name="retrieve_pattern_matches",
-            func=retrieve_pattern_matches,
+            func=None,
+            coroutine=retrieve_pattern_matches,
             description="""Retrieve UI/UX patterns from a knowledge base.
             Input: query string or dict with key 'query'
             Output: JSON with retrieved patterns"""
         ),
         Tool(
             name="suggest_pattern_applications",
-            func=suggest_pattern_applications,
+            func=None,
+            coroutine=suggest_pattern_applications,
             description="""Suggest pattern applications to component structures.
             Input: dict with keys 'patterns' (JSON string) and 'components' (JSON string)
             Output: JSON with suggested pattern applications"""
@@ -332,27 +346,32 @@ Current task: Retrieve and apply patterns for these components: {mapped_componen
     agent = create_react_agent(llm, tools, prompt)
     
     # Create the agent executor
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+    agent_executor = AgentExecutor(
+        agent=agent, tools=tools, verbose=True, handle_parsing_errors=True,
+        callbacks=[ReActIterationCallback("RAG_PATTERN")]
+    )
     
-    def process_rag(state: dict) -> dict:
-        """Deterministic RAG retrieval without LLM orchestration"""
+    async def process_rag(state: dict) -> dict:
+        """Deterministic RAG retrieval without LLM orchestration.
+
+        Runs in parallel with the layout translator, so only the keys this
+        node changes are returned.
+        """
         logger.info("RAG Pattern Agent: Deterministic retrieval start")
         try:
-            comp_json = json.dumps(state.get("mapped_components", []))
-            raw = retrieve_similar_patterns({"component_data": comp_json})
+            comp_json = await aload_json(state.get("mapped_components", []))
+            raw = await retrieve_similar_patterns({"component_data": comp_json})
             data = json.loads(raw) if isinstance(raw, str) else raw
             patterns = normalize_to_list(data.get("matched_patterns") or data.get("patterns"))
             return {
-                **state,
-                "patterns": patterns,
+                "matched_patterns": patterns,
                 "current_agent": "RAG_PATTERN_COMPLETE"
             }
         except Exception as e:
             logger.error(f"RAG Pattern deterministic error: {str(e)}")
             return {
-                **state,
                 "error": f"RAG Pattern error: {str(e)}",
                 "current_agent": "ERROR",
-                "patterns": []
+                "matched_patterns": []
             }
     return process_rag
\ No newline at end of file
@@ -0,0 +1,116 @@
+# ai/response_encoding.py
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi.responses import Response
+try:
+    import orjson
+except ImportError:  # falls back to the standard json module
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # application/msgpack is then not offered
+    msgpack = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+NDJSON = "application/x-ndjson"
+# Media types a client may ask for, mapped to the one served
+_ALIASES = {
+    JSON: JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+# Streamed record by record, JSON is sent as NDJSON, so asking for that means JSON too
+_STREAM_ALIASES = {**_ALIASES, NDJSON: JSON, "application/jsonl": JSON}
+
+class NotAcceptable(Exception):
+    """Raised when the Accept header rules out every encoding on offer"""
+
+def available_types() -> List[str]:
+    """Media types this process can encode, preferred first"""
+    return [JSON] + ([MSGPACK] if msgpack is not None else [])
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    """(media range, q) pairs of an Accept header, in header order"""
+    ranges = []
+    for part in accept.split(","):
+        media, _, params = part.strip().partition(";")
+        if not media:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media.strip().lower(), q))
+    return ranges
+
+def _quality(ranges: List[Tuple[str, float]], offered: str, aliases: Dict[str, str]) -> float:
+    """q the client gives an offered type; the most specific matching range wins"""
+    kind = offered.split("/")[0]
+    best: Optional[Tuple[int, float]] = None
+    for media, q in ranges:
+        if aliases.get(media) == offered:
+            specificity = 2
+        elif media == f"{kind}/*":
+            specificity = 1
+        elif media == "*/*":
+            specificity = 0
+        else:
+            continue
+        if best is None or specificity > best[0]:
+            best = (specificity, q)
+    return best[1] if best else 0.0
+
+def negotiate(accept: Optional[str], stream: bool = False) -> str:
+    """Media type to answer with; JSON unless the client prefers MessagePack.
+
+    With stream=True the answer is a sequence of records, and an Accept of
+    application/x-ndjson counts as asking for JSON.
+    """
+    if not accept:
+        return JSON
+    ranges = _parse_accept(accept)
+    aliases = _STREAM_ALIASES if stream else _ALIASES
+    scored = [(_quality(ranges, offered, aliases), offered) for offered in available_types()]
+    # max() keeps the first of equal scores, so JSON wins ties
+    q, media_type = max(scored, key=lambda pair: pair[0])
+    if q <= 0:
+        raise NotAcceptable(f"Can only respond with {', '.join(available_types())}")
+    return media_type
+
+def encode(data: Any, media_type: str = JSON) -> bytes:
+    """Serialize a JSON-compatible value; orjson is used for JSON when installed"""
+    if media_type == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True, default=str)
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def encode_record(data: Any, media_type: str = JSON) -> bytes:
+    """One record of a streamed response: an NDJSON line, or a MessagePack object
+    (which delimits itself, so records are simply concatenated)"""
+    if media_type == MSGPACK:
+        return encode(data, media_type)
+    return encode(data) + b"\n"
+
+def stream_media_type(media_type: str) -> str:
+    """Content-Type of a record stream in a negotiated encoding"""
+    return NDJSON if media_type == JSON else media_type
+
+def encoded_response(data: Any, media_type: str = JSON, status_code: int = 200) -> Response:
+    """Response carrying data in the negotiated encoding"""
+    return Response(
+        content=encode(data, media_type),
+        status_code=status_code,
+        media_type=media_type,
+        headers={"Vary": "Accept"}
+    )
@@ -0,0 +1,208 @@
+# ai/result_cache.py
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from utils import LLM_MODEL, PROMPT_TEMPLATE_VERSION
+
+try:
+    import zstandard  # optional, falls back to zlib
+except ImportError:
+    zstandard = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache settings (sizes in bytes, TTLs in seconds)
+MEMORY_MAX_BYTES = int(os.getenv("LCNC_CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+MEMORY_TTL = float(os.getenv("LCNC_CACHE_MEMORY_TTL", "3600"))
+DISK_PATH = os.getenv(
+    "LCNC_CACHE_DB_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "results.sqlite3")
+)
+DISK_MAX_BYTES = int(os.getenv("LCNC_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+DISK_TTL = float(os.getenv("LCNC_CACHE_DISK_TTL", str(7 * 24 * 3600)))
+
+def make_cache_key(html_content: str, css_content: str, **options: Any) -> str:
+    """Content-addressed key for a conversion request"""
+    digest = hashlib.sha256()
+    for part in (LLM_MODEL, PROMPT_TEMPLATE_VERSION, html_content, css_content,
+                 json.dumps(options, sort_keys=True)):
+        data = part.encode("utf-8")
+        # Length-prefix each part so boundaries are unambiguous
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+def _compress(data: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor().compress(data)
+    return "zlib", zlib.compress(data)
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is required to read this cache entry")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+class MemoryTier:
+    """LRU of serialized results bounded by total size and entry age"""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, payload = entry
+        if time.time() - stored_at > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def set(self, key: str, payload: str) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (time.time(), payload)
+        self.size += len(payload)
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+class DiskTier:
+    """SQLite-backed store of compressed results bounded by total size and entry age"""
+
+    def __init__(self, path: str, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT codec, value, stored_at FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        codec, value, stored_at = row
+        now = time.time()
+        if now - stored_at > self.ttl:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return _decompress(codec, value).decode("utf-8")
+
+    def set(self, key: str, payload: str) -> None:
+        codec, value = _compress(payload.encode("utf-8"))
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (key, codec, value, size, stored_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, codec, value, len(value), now, now)
+        )
+        self._evict(now)
+        self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM results WHERE stored_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under budget
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM results ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+
+class ResultCache:
+    """Two-tier (memory LRU + SQLite) cache of successful conversion results"""
+
+    def __init__(self, memory: MemoryTier, disk: Optional[DiskTier] = None):
+        self.memory = memory
+        self.disk = disk
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Return (result, tier) where tier is "memory", "disk" or None on a miss"""
+        with self._lock:
+            payload = self.memory.get(key)
+            if payload is not None:
+                self.counters["memory_hits"] += 1
+                return json.loads(payload), "memory"
+            if self.disk is not None:
+                try:
+                    payload = self.disk.get(key)
+                except Exception as e:
+                    logger.error(f"Result cache disk read failed: {str(e)}")
+                    payload = None
+                if payload is not None:
+                    self.memory.set(key, payload)
+                    self.counters["disk_hits"] += 1
+                    return json.loads(payload), "disk"
+            self.counters["misses"] += 1
+            return None, None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        payload = json.dumps(result)
+        with self._lock:
+            self.memory.set(key, payload)
+            if self.disk is not None:
+                try:
+                    self.disk.set(key, payload)
+                except Exception as e:
+                    logger.error(f"Result cache disk write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+_cache: Optional[ResultCache] = None
+
+def get_result_cache() -> ResultCache:
+    """Return (and cache) the process-wide result cache"""
+    global _cache
+    if _cache is None:
+        disk = None
+        if DISK_PATH:
+            try:
+                disk = DiskTier(DISK_PATH, DISK_MAX_BYTES, DISK_TTL)
+            except Exception as e:
+                logger.error(f"Result cache disk tier disabled: {str(e)}")
+        _cache = ResultCache(MemoryTier(MEMORY_MAX_BYTES, MEMORY_TTL), disk)
+    return _cache
@@ -0,0 +1,145 @@
+# ai/result_views.py
+import os
+import json
+import base64
+import logging
+from typing import Dict, Any, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Largest page of children one stored-structure request may ask for
+RESULT_PAGE_MAX = int(os.getenv("LCNC_RESULT_PAGE_MAX", "500"))
+
+# Keys under which an LCNC node lists its child nodes
+CHILD_KEYS = ("children", "components")
+
+class InvalidPointer(ValueError):
+    """Raised when a JSON Pointer does not resolve"""
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to another result"""
+
+def select_fields(data: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Project data onto dotted field paths, e.g. ["analysis_report.fixes"].
+
+    Paths that do not exist are left out; a path that ends at a list keeps
+    the whole list.
+    """
+    selected: Dict[str, Any] = {}
+    for field in fields:
+        source: Any = data
+        target = selected
+        parts = field.split(".")
+        for part in parts[:-1]:
+            if not isinstance(source, dict) or part not in source:
+                break
+            source = source[part]
+            target = target.setdefault(part, {})
+        else:
+            if isinstance(source, dict) and parts[-1] in source:
+                target[parts[-1]] = source[parts[-1]]
+    return selected
+
+def resolve_pointer(document: Any, pointer: str) -> Any:
+    """Value at an RFC 6901 JSON Pointer ("" is the whole document)"""
+    if pointer == "":
+        return document
+    if not pointer.startswith("/"):
+        raise InvalidPointer(f"JSON Pointer must be empty or start with '/': {pointer}")
+    value = document
+    for token in pointer[1:].split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(value, list):
+            if not token.isdigit() or (token.startswith("0") and token != "0") or int(token) >= len(value):
+                raise InvalidPointer(f"No list index {token!r} at {pointer}")
+            value = value[int(token)]
+        elif isinstance(value, dict):
+            if token not in value:
+                raise InvalidPointer(f"No key {token!r} at {pointer}")
+            value = value[token]
+        else:
+            raise InvalidPointer(f"Cannot descend into a scalar at {pointer}")
+    return value
+
+def child_key(node: Any) -> Optional[str]:
+    """Key holding a node's children, or None for a leaf"""
+    if isinstance(node, dict):
+        for key in CHILD_KEYS:
+            if isinstance(node.get(key), list):
+                return key
+    return None
+
+def encode_cursor(pointer: str, offset: int, version: float) -> str:
+    """Opaque cursor for the children of pointer from offset on"""
+    text = json.dumps({"p": pointer, "o": offset, "v": version})
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, pointer: str, version: float) -> int:
+    """Offset a cursor resumes from; raises InvalidCursor"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset = int(data["o"])
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    if data.get("p") != pointer:
+        raise InvalidCursor("Cursor belongs to another pointer")
+    if data.get("v") != version:
+        raise InvalidCursor("Cursor is stale: the conversion has been stored again since")
+    return max(offset, 0)
+
+def _summarize(node: Any, pointer: str, depth: int) -> Any:
+    """Copy of node with child lists deeper than depth replaced by a reference"""
+    key = child_key(node)
+    if key is None:
+        return node
+    children = node[key]
+    summary = {k: v for k, v in node.items() if k != key}
+    if depth <= 0:
+        summary[f"{key}_count"] = len(children)
+        summary[f"{key}_pointer"] = f"{pointer}/{key}"
+    else:
+        summary[key] = [
+            _summarize(child, f"{pointer}/{key}/{i}", depth - 1) for i, child in enumerate(children)
+        ]
+    return summary
+
+def page_structure(
+    structure: Any,
+    pointer: str,
+    cursor: Optional[str],
+    limit: int,
+    depth: int,
+    version: float
+) -> Dict[str, Any]:
+    """One page of the children of the node at pointer in an lcnc_structure.
+
+    The node itself is returned without its child list; "items" holds up to
+    limit children, each with its own descendants cut off below depth (a cut
+    list is replaced by "<key>_count" and a "<key>_pointer" to fetch it
+    with). next_cursor is None on the last page.
+    """
+    node = resolve_pointer(structure, pointer)
+    if isinstance(node, list):
+        children, base, summary = node, pointer, None
+    else:
+        key = child_key(node)
+        children = node[key] if key else []
+        base = f"{pointer}/{key}" if key else pointer
+        summary = {k: v for k, v in node.items() if k != key} if isinstance(node, dict) else node
+
+    offset = decode_cursor(cursor, pointer, version) if cursor else 0
+    end = offset + limit
+    items = [
+        _summarize(child, f"{base}/{i}", depth - 1)
+        for i, child in enumerate(children[offset:end], start=offset)
+    ]
+    return {
+        "pointer": pointer,
+        "node": summary,
+        "children_pointer": base if children else None,
+        "offset": offset,
+        "total": len(children),
+        "items": items,
+        "next_cursor": encode_cursor(pointer, end, version) if end < len(children) else None
+    }
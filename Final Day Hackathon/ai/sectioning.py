@@ -0,0 +1,137 @@
+# ai/sectioning.py
+import os
+import hashlib
+import logging
+from typing import Dict, Any, List
+from bs4 import BeautifulSoup, Tag
+from utils import normalize_to_list
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pages larger than this (in characters) are converted section by section
+SECTION_SPLIT_CHARS = int(os.getenv("LCNC_SECTION_SPLIT_CHARS", "12000"))
+# Sections smaller than this are merged into their neighbour to save LLM calls
+SECTION_MIN_CHARS = int(os.getenv("LCNC_SECTION_MIN_CHARS", "1500"))
+# Upper bound on sections converted at the same time for one page
+SECTION_CONCURRENCY = int(os.getenv("LCNC_SECTION_CONCURRENCY", "8"))
+
+# Containers whose children are the page's real sections
+_WRAPPER_TAGS = {"main"}
+# Elements that carry no renderable structure
+_SKIPPED_TAGS = {"script", "style", "noscript", "template", "link", "meta"}
+
+def _section_name(element: Tag, index: int) -> str:
+    if element.get("id"):
+        return f"{element.name}#{element['id']}"
+    return f"{element.name}[{index}]"
+
+def _children(element: Tag) -> List[Tag]:
+    return [c for c in element.children if isinstance(c, Tag) and c.name not in _SKIPPED_TAGS]
+
+def _expand(elements: List[Tag]) -> List[Tag]:
+    """Replace wrappers and elements over SECTION_SPLIT_CHARS by their children, recursively.
+
+    This descends through single-child wrappers such as an app's
+    <div id="root">, so such pages still split; an element with no
+    children is kept whatever its size.
+    """
+    expanded: List[Tag] = []
+    for element in elements:
+        children = _children(element)
+        if children and (element.name in _WRAPPER_TAGS or len(str(element)) > SECTION_SPLIT_CHARS):
+            expanded.extend(_expand(children))
+        else:
+            expanded.append(element)
+    return expanded
+
+def split_into_sections(html_content: str) -> List[Dict[str, Any]]:
+    """Split a page into sections (header, nav, main's sections, footer).
+
+    Returns a list of {"name", "tag", "html"} in document order. Sections
+    over LCNC_SECTION_SPLIT_CHARS are split again into their children. A
+    page that has no usable structure comes back as a single section.
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    root = soup.body or soup
+    elements = _expand(_children(root))
+
+    if len(elements) <= 1:
+        return [{"name": "page", "tag": "body", "html": html_content}]
+
+    sections: List[Dict[str, Any]] = []
+    for index, element in enumerate(elements):
+        markup = str(element)
+        if sections and len(sections[-1]["html"]) < SECTION_MIN_CHARS:
+            # Fold small fragments (e.g. a lone nav) into the previous section
+            sections[-1]["html"] += "\n" + markup
+            continue
+        sections.append({"name": _section_name(element, index), "tag": element.name, "html": markup})
+
+    if len(sections) > 1 and len(sections[-1]["html"]) < SECTION_MIN_CHARS:
+        tail = sections.pop()
+        sections[-1]["html"] += "\n" + tail["html"]
+
+    logger.info(f"Split page into {len(sections)} sections")
+    return sections
+
+def section_fingerprint(html_content: str) -> str:
+    """Hash of a section's markup after re-serializing it with html.parser and
+    collapsing whitespace runs to single spaces.
+
+    Equal for markup that differs only in whitespace (including inside text)
+    or in how attributes are quoted; any change to tags, attribute values or
+    text changes it.
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    normalized = " ".join(str(soup).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def stitch_results(sections: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-section conversion results into one result in document order"""
+    lcnc_structure: List[Any] = []
+    analysis_report: Dict[str, Any] = {
+        "matched_patterns": [],
+        "pattern_metadata": {},
+        "compatibility": [],
+        "fixes": [],
+        "degraded_nodes": [],
+        "attempts": {},
+        "ranking_metadata": {},
+        "responsive_config": {},
+        "workflow_agent": None,
+        "sections": []
+    }
+    errors: List[str] = []
+
+    for section, result in zip(sections, results):
+        report = result.get("analysis_report") or {}
+        structure = normalize_to_list(result.get("lcnc_structure"))
+        lcnc_structure.extend(structure)
+        for key in ("matched_patterns", "compatibility", "fixes", "degraded_nodes"):
+            analysis_report[key].extend(normalize_to_list(report.get(key)))
+        for key in ("pattern_metadata", "ranking_metadata", "responsive_config"):
+            if isinstance(report.get(key), dict):
+                analysis_report[key].update(report[key])
+        # Node attempts are totalled over the sections
+        for node, count in (report.get("attempts") or {}).items():
+            analysis_report["attempts"][node] = analysis_report["attempts"].get(node, 0) + count
+        if report.get("workflow_agent") and analysis_report["workflow_agent"] != "ERROR":
+            # The last node the sections reached, which depends on the profile
+            analysis_report["workflow_agent"] = report["workflow_agent"]
+        if result.get("error"):
+            errors.append(f"{section['name']}: {result['error']}")
+            analysis_report["workflow_agent"] = "ERROR"
+        analysis_report["sections"].append({
+            "name": section["name"],
+            "tag": section["tag"],
+            "chars": section["chars"] if "chars" in section else len(section["html"]),
+            "components": len(structure),
+            "error": result.get("error")
+        })
+
+    return {
+        "error": "; ".join(errors) or None,
+        "lcnc_structure": lcnc_structure,
+        "analysis_report": analysis_report
+    }
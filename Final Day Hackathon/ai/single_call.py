@@ -0,0 +1,142 @@
+# ai/single_call.py
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+from langchain.prompts import PromptTemplate
+from utils import get_llm, normalize_to_list, parse_llm_json, LLM_MODEL, LCNC_MAPPING_SCHEMA
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to a character estimate
+    tiktoken = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pages (HTML + CSS) up to this many tokens are converted with one combined
+# LLM call instead of the agent workflow; 0 disables the fast path
+SINGLE_CALL_MAX_TOKENS = int(os.getenv("LCNC_SINGLE_CALL_MAX_TOKENS", "1500"))
+
+# Tokenizer for LLM_MODEL, loaded once
+_encoding: Any = None
+
+def load_tokenizer() -> None:
+    """Load LLM_MODEL's tokenizer, which may download its BPE file; blocking,
+    so it is called from workflow warm-up rather than on the event loop"""
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            try:
+                _encoding = tiktoken.encoding_for_model(LLM_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # The BPE files are downloaded on first use; work offline without them
+            logger.warning(f"tiktoken unavailable, estimating token counts: {str(e)}")
+            _encoding = False
+
+def count_tokens(text: str) -> int:
+    """Number of tokens text takes in LLM_MODEL's tokenizer"""
+    load_tokenizer()
+    if not _encoding:
+        return len(text) // 4
+    return len(_encoding.encode(text, disallowed_special=()))
+
+def use_single_call(html_content: str, css_content: str) -> bool:
+    """Whether a page is small enough for the single-call fast path"""
+    if SINGLE_CALL_MAX_TOKENS <= 0:
+        return False
+    # Cheap pre-check so large pages are never tokenized
+    if len(html_content) + len(css_content) > SINGLE_CALL_MAX_TOKENS * 8:
+        return False
+    return count_tokens(html_content) + count_tokens(css_content) <= SINGLE_CALL_MAX_TOKENS
+
+_PROMPT = PromptTemplate.from_template("""You are an expert at converting HTML/CSS into Low-Code/No-Code (LCNC) components. Do all three steps below in one pass.
+
+HTML Content:
+{html_content}
+
+CSS Content:
+{css_content}
+
+1. Parse: extract the component hierarchy (tag, semantic type, role, important attributes, computed styles from inline and matching CSS rules).
+2. Map: map every parsed component to an LCNC component using this schema:
+{mapping_schema}
+3. Layout: describe how the mapped components are laid out (flex/grid/stack, direction, spacing, alignment) and the responsive breakpoints.
+
+Return ONLY a valid JSON object with this structure:
+{{
+  "parsed_components": [
+    {{
+      "tag": "header",
+      "semantic_type": "container",
+      "role": "banner",
+      "attributes": {{"class": "main-header"}},
+      "computed_styles": {{"display": "flex"}},
+      "children": []
+    }}
+  ],
+  "mapped_components": [
+    {{
+      "lcnc_type": "Container",
+      "source_tag": "header",
+      "properties": {{"layout": "flex"}},
+      "children": []
+    }}
+  ],
+  "layout_structure": [
+    {{
+      "type": "flex",
+      "direction": "row",
+      "components": ["Container"],
+      "properties": {{"justify": "space-between", "gap": "16px"}}
+    }}
+  ],
+  "responsive_breakpoints": [
+    {{"breakpoint": "768px", "changes": {{"direction": "column"}}}}
+  ]
+}}""")
+
+async def convert_single_call(
+    html_content: str,
+    css_content: str,
+    deadline: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """Parse, map and lay out a small page with one LLM call.
+
+    Returns the state keys HTML_PARSER, COMPONENT_MAPPER and
+    LAYOUT_TRANSLATOR would have produced, or None if the call failed,
+    ran past deadline (absolute time.time()) or its answer was unusable,
+    in which case the caller runs the full workflow.
+    """
+    try:
+        timeout = None if deadline is None else deadline - time.time()
+        if timeout is not None and timeout <= 0:
+            logger.warning("Single-call conversion skipped: deadline already passed")
+            return None
+        llm = get_llm()
+        response = await asyncio.wait_for(llm.ainvoke(_PROMPT.format(
+            html_content=html_content,
+            css_content=css_content or "(none)",
+            mapping_schema=json.dumps(LCNC_MAPPING_SCHEMA, indent=2)
+        )), timeout=timeout)
+        data = parse_llm_json(response.content if hasattr(response, 'content') else str(response), source="SINGLE_CALL")
+    except asyncio.TimeoutError:
+        logger.warning("Single-call conversion ran out of time")
+        return None
+    except Exception as e:
+        logger.error(f"Single-call conversion failed: {str(e)}")
+        return None
+
+    if not isinstance(data, dict) or not (data.get("mapped_components") or data.get("layout_structure")):
+        logger.warning("Single-call conversion returned no components, falling back to the workflow")
+        return None
+    return {
+        "parsed_components": normalize_to_list(data.get("parsed_components")),
+        "mapped_components": normalize_to_list(data.get("mapped_components")),
+        "layout_structure": normalize_to_list(data.get("layout_structure")),
+        "responsive_config": {"breakpoints": normalize_to_list(data.get("responsive_breakpoints"))},
+        "current_agent": "LAYOUT_TRANSLATOR_COMPLETE"
+    }
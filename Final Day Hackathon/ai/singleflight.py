@@ -0,0 +1,59 @@
+# ai/singleflight.py
+import copy
+import asyncio
+import logging
+from typing import Dict, Any, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Coalesce identical in-flight conversions onto one execution.
+
+    The first caller for a fingerprint becomes the leader and runs the
+    pipeline; callers arriving while it runs await the leader's result.
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    def claim(self, key: str) -> Tuple[asyncio.Future, bool]:
+        """Return (future, is_leader) for a request fingerprint"""
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            logger.info(f"Coalescing conversion {key[:12]} onto in-flight run")
+            return future, False
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executions += 1
+        return future, True
+
+    def resolve(self, key: str, result: Dict[str, Any]) -> None:
+        """Publish the leader's result to every waiting follower"""
+        future = self._calls.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(copy.deepcopy(result))
+
+    def fail(self, key: str, error: BaseException) -> None:
+        """Propagate a leader failure to every waiting follower"""
+        future = self._calls.pop(key, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+            # Avoid "exception was never retrieved" warnings when nobody waited
+            future.exception()
+
+    async def wait(self, future: asyncio.Future) -> Dict[str, Any]:
+        """Await a leader's result as a follower; each follower gets its own copy"""
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
+
+inflight = SingleFlight()
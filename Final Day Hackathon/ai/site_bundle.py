@@ -0,0 +1,294 @@
+# ai/site_bundle.py
+import io
+import zlib
+import os
+import re
+import json
+import time
+import asyncio
+import zipfile
+import hashlib
+import logging
+import posixpath
+import mimetypes
+from typing import Dict, Any, List, Optional, Tuple
+from bs4 import BeautifulSoup
+from html_parser_agent import parse_css_styles
+from component_pipeline import astream_pipelined
+from admission import run_admitted
+from utils import parse_llm_json
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bundle limits: upload size, total uncompressed size and number of files
+BUNDLE_MAX_BYTES = int(os.getenv("LCNC_BUNDLE_MAX_BYTES", str(20 * 1024 * 1024)))
+BUNDLE_MAX_UNCOMPRESSED_BYTES = int(os.getenv("LCNC_BUNDLE_MAX_UNCOMPRESSED_BYTES", str(100 * 1024 * 1024)))
+BUNDLE_MAX_FILES = int(os.getenv("LCNC_BUNDLE_MAX_FILES", "2000"))
+# Pages of one bundle converted at once
+BUNDLE_CONCURRENCY = int(os.getenv("LCNC_BUNDLE_CONCURRENCY", "4"))
+
+_PAGE_EXTENSIONS = (".html", ".htm")
+_IMPORT = re.compile(
+    r"""@import\s+(?:url\(\s*(['"]?)(?P<url>[^'")]*)\1\s*\)|(['"])(?P<str>[^'"]*)\3)\s*(?P<media>[^;]*);""",
+    re.IGNORECASE
+)
+
+class SiteBundleError(ValueError):
+    """Raised for an unreadable or oversized site bundle"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def read_bundle(data: bytes) -> Dict[str, bytes]:
+    """Files of a zipped site by normalized path, refusing zip bombs and paths outside the root"""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise SiteBundleError(f"Not a zip archive: {str(e)}")
+    entries = [info for info in archive.infolist() if not info.is_dir()]
+    if len(entries) > BUNDLE_MAX_FILES:
+        raise SiteBundleError(f"Bundle has {len(entries)} files, more than LCNC_BUNDLE_MAX_FILES", 413)
+    if sum(info.file_size for info in entries) > BUNDLE_MAX_UNCOMPRESSED_BYTES:
+        raise SiteBundleError("Bundle expands beyond LCNC_BUNDLE_MAX_UNCOMPRESSED_BYTES", 413)
+
+    files: Dict[str, bytes] = {}
+    for info in entries:
+        path = posixpath.normpath(info.filename.replace("\\", "/")).lstrip("/")
+        if path.startswith("..") or path.startswith("__MACOSX/"):
+            continue
+        try:
+            files[path] = archive.read(info)
+        except (zipfile.BadZipFile, zlib.error, NotImplementedError, RuntimeError) as e:
+            # Bad CRC, corrupt or unsupported compression, or an encrypted entry
+            raise SiteBundleError(f"Cannot read {info.filename}: {str(e)}")
+    # A site zipped with its enclosing folder: serve paths relative to that folder
+    roots = {path.split("/", 1)[0] for path in files}
+    if len(roots) == 1 and all("/" in path for path in files):
+        root = roots.pop() + "/"
+        files = {path[len(root):]: content for path, content in files.items()}
+    return files
+
+def _decode(content: bytes) -> str:
+    return content.decode("utf-8", errors="replace").lstrip("﻿")
+
+def _resolve(base: str, href: str) -> Optional[str]:
+    """Bundle path an href points to, or None for external URLs"""
+    href = href.strip().split("#", 1)[0].split("?", 1)[0]
+    if not href or re.match(r"^([a-z][a-z0-9+.-]*:|//)", href, re.IGNORECASE):
+        return None
+    if href.startswith("/"):
+        return posixpath.normpath(href.lstrip("/"))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), href))
+
+def inline_imports(
+    files: Dict[str, bytes],
+    base: str,
+    css: str,
+    warnings: List[str],
+    seen: Tuple[str, ...] = ()
+) -> Tuple[str, List[str]]:
+    """Replace local @import rules with the imported stylesheets, recursively.
+
+    Returns the flattened CSS and the bundle paths it pulled in. An import
+    with a media query is wrapped in @media; external, missing and circular
+    imports are left as they are and reported in warnings.
+    """
+    imported: List[str] = []
+
+    def replace(match: "re.Match") -> str:
+        href = match.group("url") if match.group("url") is not None else match.group("str")
+        path = _resolve(base, href)
+        if path is None:
+            return match.group(0)
+        if path in seen or path == base:
+            warnings.append(f"{base}: circular @import of {path}")
+            return ""
+        if path not in files:
+            warnings.append(f"{base}: @import {href} not found in bundle")
+            return match.group(0)
+        text, nested = inline_imports(files, path, _decode(files[path]), warnings, seen + (base,))
+        imported.extend([path] + nested)
+        media = match.group("media").strip()
+        return f"@media {media} {{\n{text}\n}}" if media else text
+
+    return _IMPORT.sub(replace, css), imported
+
+def page_stylesheets(files: Dict[str, bytes], page: str, html: str, warnings: List[str]) -> List[Dict[str, Any]]:
+    """A page's stylesheets in cascade order: linked files and <style> blocks, with @imports inlined"""
+    soup = BeautifulSoup(html, "html.parser")
+    sheets: List[Dict[str, Any]] = []
+    for element in soup.find_all(["link", "style"]):
+        if element.name == "link":
+            rel = element.get("rel") or []
+            rel = rel if isinstance(rel, list) else rel.split()
+            if "stylesheet" not in [r.lower() for r in rel] or not element.get("href"):
+                continue
+            path = _resolve(page, element["href"])
+            if path is None:
+                warnings.append(f"{page}: external stylesheet {element['href']} not bundled")
+                continue
+            if path not in files:
+                warnings.append(f"{page}: stylesheet {element['href']} not found in bundle")
+                continue
+            css, imports = inline_imports(files, path, _decode(files[path]), warnings)
+            sheets.append({"id": path, "css": css, "imports": imports, "media": element.get("media")})
+        else:
+            css, imports = inline_imports(files, page, element.get_text(), warnings)
+            if css.strip():
+                sheets.append({"id": f"{page}#style-{len(sheets)}", "css": css, "imports": imports, "media": element.get("media")})
+    return sheets
+
+def _parse_error(output: str) -> Optional[str]:
+    """Error reported by parse_css_styles, if the output is one"""
+    try:
+        data = json.loads(output)
+    except ValueError:
+        return None
+    return data["error"] if isinstance(data, dict) and set(data) == {"error"} else None
+
+async def _combined_styles(sheets: List[Dict[str, Any]], parsed: Dict[str, asyncio.Task]) -> str:
+    """Parsed styles of a page: its sheets' shared parse results in cascade order.
+
+    Sheets that failed to parse are left out (the manifest reports them), so
+    one broken stylesheet does not fail every page that links it.
+    """
+    # Shielded: the parses are shared with other pages, which must not lose them if this one is cancelled
+    results = await asyncio.gather(*(asyncio.shield(parsed[sheet["hash"]]) for sheet in sheets))
+    usable = [(sheet, output) for sheet, output in zip(sheets, results) if _parse_error(output) is None]
+    if len(usable) == 1:
+        return usable[0][1]
+    combined = []
+    for sheet, output in usable:
+        try:
+            styles = parse_llm_json(output, source="SITE_BUNDLE")
+        except ValueError:
+            styles = output
+        combined.append({"stylesheet": sheet["id"], "media": sheet["media"], "parsed": styles})
+    return json.dumps(combined)
+
+async def _convert_page(
+    path: str,
+    html: str,
+    css_data: Optional["asyncio.Task"],
+    stages: List[str],
+    started: float
+) -> Dict[str, Any]:
+    """Convert one page through the pipelined stages against its shared parsed styles; never raises"""
+    page_started = time.perf_counter()
+    record: Dict[str, Any] = {"path": path}
+    try:
+        result: Dict[str, Any] = {}
+        async for event in astream_pipelined(html, "", stages=stages, css_data=css_data):
+            if event["event"] == "result":
+                result = event["data"]
+        record.update(
+            error=result.get("error"),
+            lcnc_structure=result.get("lcnc_structure", []),
+            analysis_report=result.get("analysis_report", {})
+        )
+    except Exception as e:
+        logger.error(f"Error converting bundle page {path}: {str(e)}")
+        record.update(error=str(e), lcnc_structure=[], analysis_report={})
+    record.update(
+        started_ms=round((page_started - started) * 1000, 1),
+        duration_ms=round((time.perf_counter() - page_started) * 1000, 1)
+    )
+    return record
+
+async def convert_site_bundle(
+    data: bytes,
+    name: str,
+    stages: List[str],
+    concurrency: int = BUNDLE_CONCURRENCY
+) -> Dict[str, Any]:
+    """Convert every page of a zipped static site into one LCNC project manifest.
+
+    Each distinct stylesheet (after inlining its @imports) is parsed by the
+    LLM once, as soon as the bundle is read, and every page that uses it
+    shares the result. Pages then go through the pipelined stages
+    concurrently, at most concurrency at a time, sharing the caller's
+    admission slot as described in run_admitted.
+    """
+    started = time.perf_counter()
+    files = await asyncio.to_thread(read_bundle, data)
+    pages = sorted(path for path in files if path.lower().endswith(_PAGE_EXTENSIONS))
+    if not pages:
+        raise SiteBundleError("Bundle contains no .html pages")
+    warnings: List[str] = []
+
+    def scan() -> Dict[str, Tuple[str, List[Dict[str, Any]]]]:
+        scanned = {}
+        for page in pages:
+            html = _decode(files[page])
+            sheets = page_stylesheets(files, page, html, warnings)
+            for sheet in sheets:
+                sheet["hash"] = hashlib.sha256(sheet["css"].encode("utf-8")).hexdigest()
+            scanned[page] = (html, sheets)
+        return scanned
+
+    scanned = await asyncio.to_thread(scan)
+
+    # One parse per distinct stylesheet, shared by every page that links it
+    parsed: Dict[str, asyncio.Task] = {}
+    stylesheets: Dict[str, Dict[str, Any]] = {}
+    for page, (_, sheets) in scanned.items():
+        for sheet in sheets:
+            if sheet["hash"] not in parsed:
+                parsed[sheet["hash"]] = asyncio.ensure_future(parse_css_styles({"css_content": sheet["css"]}))
+            entry = stylesheets.setdefault(sheet["id"], {
+                "id": sheet["id"],
+                "sha256": sheet["hash"],
+                "bytes": len(sheet["css"]),
+                "imports": sheet["imports"],
+                "used_by": []
+            })
+            entry["used_by"].append(page)
+
+    page_styles = {
+        page: asyncio.ensure_future(_combined_styles(sheets, parsed)) if sheets else None
+        for page, (_, sheets) in scanned.items()
+    }
+    converted = run_admitted(
+        pages,
+        lambda page: _convert_page(page, scanned[page][0], page_styles[page], stages, started),
+        concurrency
+    )
+    try:
+        records = [record async for record in converted]
+    finally:
+        await converted.aclose()
+        for task in list(parsed.values()) + [task for task in page_styles.values() if task is not None]:
+            task.cancel()
+
+    for entry in stylesheets.values():
+        task = parsed[entry["sha256"]]
+        entry["error"] = _parse_error(task.result()) if task.done() and not task.cancelled() else None
+
+    records.sort(key=lambda record: pages.index(record["path"]))
+    for record in records:
+        record["stylesheets"] = [sheet["id"] for sheet in scanned[record["path"]][1]]
+    inlined = {path for entry in stylesheets.values() for path in entry["imports"]}
+    assets = [
+        {"path": path, "bytes": len(content), "type": mimetypes.guess_type(path)[0] or "application/octet-stream"}
+        for path, content in sorted(files.items())
+        if path not in scanned and path not in stylesheets and path not in inlined
+    ]
+    errors = [f"{record['path']}: {record['error']}" for record in records if record.get("error")]
+    return {
+        "project": {
+            "name": name,
+            "pages": len(pages),
+            "stylesheets": len(stylesheets),
+            "stylesheet_parses": len(parsed),
+            "assets": len(assets)
+        },
+        "error": "; ".join(errors) or None,
+        "pages": records,
+        "stylesheets": list(stylesheets.values()),
+        "assets": assets,
+        # A stylesheet shared by many pages reports its problems once
+        "warnings": list(dict.fromkeys(warnings)),
+        "wall_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
@@ -0,0 +1,6 @@
+# ai/tests/conftest.py
+import os
+import sys
+
+# The service modules import each other as top-level modules (run from ai/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,165 @@
+# ai/tests/test_admission.py
+import asyncio
+import pytest
+from admission import AdmissionController, AdmissionRejected, admission
+
+def test_queue_then_reject():
+    async def main():
+        controller = AdmissionController(max_concurrent=1, max_queued=1, retry_after=7)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == 1
+        with pytest.raises(AdmissionRejected) as e:
+            await controller.acquire()
+        assert e.value.retry_after == 7
+        controller.release()
+        await waiter
+        assert controller.stats()["in_flight"] == 1
+        controller.release()
+        assert controller.stats() == {"in_flight": 0, "queued": 0, "rejected": 1, "max_concurrent": 1, "max_queued": 1}
+    asyncio.run(main())
+
+def test_admitted_stream_releases_when_body_never_starts():
+    from app import AdmittedStreamingResponse
+
+    async def main():
+        await admission.acquire()
+        started = []
+
+        async def body():
+            started.append(True)
+            yield b"never sent"
+
+        async def send(message):
+            raise OSError("client went away")
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        response = AdmittedStreamingResponse(body())
+        # Starlette reports the failed send as ClientDisconnect
+        with pytest.raises(Exception):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+        assert not started
+        assert admission.in_flight == 0
+    asyncio.run(main())
+
+def test_admitted_stream_releases_after_full_body():
+    from app import AdmittedStreamingResponse
+
+    async def main():
+        await admission.acquire()
+        sent = []
+
+        async def body():
+            yield b"a"
+            yield b"b"
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        await AdmittedStreamingResponse(body())({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+        assert b"".join(m.get("body", b"") for m in sent) == b"ab"
+        assert admission.in_flight == 0
+    asyncio.run(main())
+
+def test_run_admitted_hands_items_back_when_queue_is_full(monkeypatch):
+    import admission as admission_module
+    # No free slots and no queue: every extra worker is rejected at once
+    controller = AdmissionController(max_concurrent=0, max_queued=0, retry_after=1)
+    monkeypatch.setattr(admission_module, "admission", controller)
+
+    async def run(item):
+        await asyncio.sleep(0)
+        return item * 10
+
+    async def main():
+        return [result async for result in admission_module.run_admitted(range(6), run, concurrency=3)]
+
+    assert sorted(asyncio.run(main())) == [0, 10, 20, 30, 40, 50]
+    assert controller.stats()["rejected"] == 2
+    assert controller.in_flight == 0
+
+def test_run_admitted_extra_workers_wait_for_slots(monkeypatch):
+    import admission as admission_module
+    controller = AdmissionController(max_concurrent=2, max_queued=4, retry_after=1)
+    monkeypatch.setattr(admission_module, "admission", controller)
+    running = []
+    peak = []
+
+    async def run(item):
+        running.append(item)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(item)
+        return item
+
+    async def main():
+        return [result async for result in admission_module.run_admitted(range(8), run, concurrency=4)]
+
+    assert sorted(asyncio.run(main())) == list(range(8))
+    # The caller's slot plus the controller's two
+    assert max(peak) == 3
+    assert controller.stats()["rejected"] == 0
+    assert controller.in_flight == 0
+
+def test_run_admitted_cancels_workers_when_closed_early(monkeypatch):
+    import admission as admission_module
+    controller = AdmissionController(max_concurrent=4, max_queued=4, retry_after=1)
+    monkeypatch.setattr(admission_module, "admission", controller)
+
+    async def run(item):
+        await asyncio.sleep(0 if item == 0 else 10)
+        return item
+
+    async def main():
+        results = admission_module.run_admitted(range(4), run, concurrency=4)
+        first = await results.__anext__()
+        await results.aclose()
+        await asyncio.sleep(0)
+        return first
+
+    assert asyncio.run(main()) == 0
+    assert controller.in_flight == 0
+
+def test_stream_admits_a_cache_hit_that_expires_before_the_run(monkeypatch):
+    import httpx
+    import app as app_module
+
+    class ExpiringCache:
+        """Hit on the endpoint's check, miss when the stream looks again"""
+        def __init__(self):
+            self.lookups = 0
+
+        def get(self, key):
+            self.lookups += 1
+            return ({"lcnc_structure": [], "analysis_report": {}}, "memory") if self.lookups == 1 else (None, None)
+
+        def set(self, key, value):
+            pass
+
+        def stats(self):
+            return {}
+
+    in_flight = []
+
+    async def fake_pipeline(request):
+        in_flight.append(admission.in_flight)
+        yield {"event": "result", "data": {"lcnc_structure": [], "analysis_report": {}}}
+
+    monkeypatch.setattr(app_module, "get_result_cache", lambda cache=ExpiringCache(): cache)
+    monkeypatch.setattr(app_module, "_pipeline_events", fake_pipeline)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/convert/stream", json={"html_content": "<p>x</p>", "css_content": ""})
+
+    response = asyncio.run(main())
+    assert response.status_code == 200 and "event: result" in response.text
+    assert in_flight == [1]
+    assert admission.in_flight == 0
@@ -0,0 +1,34 @@
+# ai/tests/test_agent_sync.py
+import asyncio
+import agent
+
+def test_sync_wrapper_reuses_one_loop(monkeypatch):
+    loops = []
+    # Stands in for a client whose connection pool is bound to its first loop
+    bound = {}
+
+    async def fake_aprocess(html_content, css_content, profile=agent.DEFAULT_PROFILE):
+        loop = asyncio.get_running_loop()
+        bound.setdefault("loop", loop)
+        assert bound["loop"] is loop, "client used from a second event loop"
+        loops.append(loop)
+        await asyncio.sleep(0)
+        return {"lcnc_structure": [html_content], "profile": profile}
+
+    monkeypatch.setattr(agent, "aprocess_html_to_lcnc", fake_aprocess)
+    first = agent.process_html_to_lcnc("<p>1</p>", "")
+    second = agent.process_html_to_lcnc("<p>2</p>", "", profile="fast")
+    assert first["lcnc_structure"] == ["<p>1</p>"]
+    assert second == {"lcnc_structure": ["<p>2</p>"], "profile": "fast"}
+    assert loops[0] is loops[1] and not loops[0].is_closed()
+
+def test_sync_wrapper_works_inside_a_running_loop(monkeypatch):
+    async def fake_aprocess(html_content, css_content, profile=agent.DEFAULT_PROFILE):
+        return {"lcnc_structure": [html_content]}
+
+    monkeypatch.setattr(agent, "aprocess_html_to_lcnc", fake_aprocess)
+
+    async def notebook_cell():
+        return agent.process_html_to_lcnc("<p>nb</p>", "")
+
+    assert asyncio.run(notebook_cell()) == {"lcnc_structure": ["<p>nb</p>"]}
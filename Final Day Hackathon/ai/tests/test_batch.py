@@ -0,0 +1,79 @@
+# ai/tests/test_batch.py
+import json
+import time
+import asyncio
+import httpx
+import pytest
+import app as app_module
+from admission import admission
+
+def _post_batch(payload, headers=None):
+    async def main():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/convert/batch", json=payload, headers=headers or {})
+            return response.status_code, [json.loads(line) for line in response.text.splitlines()]
+    return asyncio.run(main())
+
+def test_item_deadline_starts_when_picked_up(monkeypatch):
+    deadlines = []
+
+    async def fake_run_conversion(request, on_stage=None, admit=False):
+        deadlines.append(app_module._deadline(request) - time.time())
+        await asyncio.sleep(0.2)
+        return {"lcnc_structure": [], "analysis_report": {}}
+
+    monkeypatch.setattr(app_module, "_run_conversion", fake_run_conversion)
+    items = [{"html_content": f"<p>{i}</p>", "css_content": ""} for i in range(3)]
+    status, lines = _post_batch({"items": items, "concurrency": 1}, {"X-Deadline-Ms": "1000"})
+    assert status == 200
+    assert [line["status"] for line in lines[:-1]] == ["success"] * 3
+    # The third item waited 0.4s in the batch but still gets its whole second
+    assert min(deadlines) > 0.9
+    assert admission.in_flight == 0
+
+def test_batch_records_and_summary(monkeypatch):
+    async def fake_run_conversion(request, on_stage=None, admit=False):
+        if "missing" in request.html_content:
+            raise app_module.ConversionNotFound("No stored conversion nope")
+        return {"lcnc_structure": [{"type": "text"}], "analysis_report": {}}
+
+    monkeypatch.setattr(app_module, "_run_conversion", fake_run_conversion)
+    items = [{"html_content": f"<p>{text}</p>", "css_content": ""} for text in ("a", "missing", "b")]
+    status, lines = _post_batch({"items": items, "concurrency": 2})
+    assert status == 200
+    records = {line["index"]: line for line in lines[:-1]}
+    assert records[0]["result"]["lcnc_structure"] == [{"type": "text"}]
+    assert records[1]["status"] == "not_found"
+    assert lines[-1]["summary"]["statuses"] == {"success": 2, "not_found": 1}
+    assert admission.in_flight == 0
+
+def test_batch_honours_accept(monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+
+    async def fake_run_conversion(request, on_stage=None, admit=False):
+        return {"lcnc_structure": [{"type": "text"}], "analysis_report": {}}
+
+    monkeypatch.setattr(app_module, "_run_conversion", fake_run_conversion)
+    payload = {"items": [{"html_content": "<p>a</p>", "css_content": ""}] * 2}
+
+    async def main():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            packed = await client.post("/convert/batch", json=payload, headers={"Accept": "application/msgpack"})
+            refused = await client.post("/convert/batch", json=payload, headers={"Accept": "text/html"})
+            ndjson = await client.post("/convert/batch", json=payload, headers={"Accept": "application/x-ndjson"})
+            return packed, refused, ndjson
+
+    packed, refused, ndjson = asyncio.run(main())
+    assert packed.headers["content-type"] == "application/msgpack"
+    unpacker = msgpack.Unpacker()
+    unpacker.feed(packed.content)
+    records = list(unpacker)
+    assert [record.get("status") for record in records[:-1]] == ["success", "success"]
+    assert records[0]["result"]["lcnc_structure"] == [{"type": "text"}]
+    assert records[-1]["summary"]["items"] == 2
+    assert refused.status_code == 406
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert len(ndjson.text.splitlines()) == 3
+    assert admission.in_flight == 0
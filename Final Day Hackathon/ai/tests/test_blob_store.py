@@ -0,0 +1,96 @@
+# ai/tests/test_blob_store.py
+import os
+import json
+import asyncio
+import threading
+import pytest
+import blob_store
+from blob_store import BlobStore, BlobNotFound, close_blob_store, is_handle, load, load_json, stash
+
+@pytest.fixture(autouse=True)
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "BLOB_SPILL_DIR", str(tmp_path))
+    monkeypatch.setattr(blob_store, "BLOB_MIN_BYTES", 100)
+    monkeypatch.setattr(blob_store, "_stores", {})
+    return tmp_path
+
+ITEMS = [{"tag": "div", "id": i, "text": "x" * 20} for i in range(10)]
+
+def test_small_values_and_runs_without_a_store_stay_inline():
+    assert stash({"blob_run": "r1"}, [1, 2]) == [1, 2]
+    assert stash({}, ITEMS) is ITEMS
+    assert blob_store._stores == {}
+
+def test_large_list_round_trips_by_handle():
+    handle = stash({"blob_run": "r1"}, ITEMS)
+    assert is_handle(handle) and handle["items"] == 10
+    assert load(handle) == ITEMS
+    assert load(handle, 2, 4) == ITEMS[2:4]
+    assert json.loads(load_json(handle, 8)) == ITEMS[8:]
+    text = stash({"blob_run": "r1"}, "y" * 500)
+    assert load(text, 0, 3) == "yyy"
+
+def test_spills_largest_blob_over_budget(spill_dir):
+    store = BlobStore("r2", memory_max_bytes=1000)
+    small = store.put("s" * 300)
+    large = store.put("l" * 900)
+    # Only the large blob had to go to disk
+    assert os.listdir(spill_dir / "r2") == [large["$blob"].split("/")[1]]
+    assert store.memory_bytes == 300
+    assert store.get(large) == "l" * 900 and store.get(small) == "s" * 300
+
+def test_persisted_run_is_reopened_from_disk():
+    handle = stash({"blob_run": "r3"}, ITEMS)
+    close_blob_store("r3", keep=True)
+    # Another process: nothing open, only the spilled files
+    blob_store._stores.clear()
+    assert load(handle) == ITEMS
+    assert "r3" in blob_store._stores
+    close_blob_store("r3")
+
+def test_closed_run_raises_without_leaking_a_store(spill_dir):
+    handle = stash({"blob_run": "r4"}, ITEMS)
+    close_blob_store("r4")
+    with pytest.raises(BlobNotFound):
+        load(handle)
+    with pytest.raises(KeyError):
+        load_json(handle)
+    assert blob_store._stores == {}
+    assert not (spill_dir / "r4").exists()
+
+def test_concurrent_stashes_get_distinct_keys():
+    state = {"blob_run": "r5"}
+    handles = []
+
+    def worker(n):
+        for i in range(20):
+            handles.append((n, i, stash(state, [{"n": n, "i": i, "pad": "p" * 100}])))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({handle["$blob"] for _, _, handle in handles}) == 80
+    assert all(load(handle) == [{"n": n, "i": i, "pad": "p" * 100}] for n, i, handle in handles)
+
+def test_async_loads_read_spilled_blobs_off_the_event_loop(monkeypatch):
+    handle = stash({"blob_run": "r1"}, ITEMS)
+    close_blob_store("r1", keep=True)
+    readers = []
+    read = BlobStore._read
+
+    def recording_read(self, key, kind):
+        readers.append(threading.get_ident())
+        return read(self, key, kind)
+
+    monkeypatch.setattr(BlobStore, "_read", recording_read)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        values = await blob_store.aload(handle, 0, 2), await blob_store.aload_json(handle), await blob_store.aload([1])
+        return loop_thread, values
+
+    loop_thread, (items, text, inline) = asyncio.run(main())
+    assert items == ITEMS[:2] and json.loads(text) == ITEMS and inline == [1]
+    assert len(readers) == 2 and loop_thread not in readers
@@ -0,0 +1,135 @@
+# ai/tests/test_component_pipeline.py
+import json
+import time
+import asyncio
+import functools
+import pytest
+import agent
+import component_pipeline
+import sectioning
+import site_bundle
+import utils
+from conversion_store import ConversionStore
+
+PAGE = "<body><header><p>top</p></header><main><section id='a'><p>a</p></section></main><footer><p>end</p></footer></body>"
+
+@pytest.fixture(autouse=True)
+def split_small_sections(monkeypatch):
+    monkeypatch.setattr(sectioning, "SECTION_MIN_CHARS", 0)
+
+def _stages(delays=None):
+    """Stand-in stages that echo the section they work on after an optional delay"""
+    delays = delays or {}
+
+    def stage(name, key):
+        async def run(item):
+            await asyncio.sleep(delays.get(name, 0))
+            return {key: [{"stage": name, "section": item["name"]}]}
+        return name, run
+
+    return [
+        stage("HTML_PARSER", "parsed_components"),
+        stage("COMPONENT_MAPPER", "mapped_components"),
+        stage("LAYOUT_TRANSLATOR", "layout_structure"),
+        stage("COMPATIBILITY_RANKER", "compatibility"),
+    ]
+
+def _run(html, **kwargs):
+    async def main():
+        return [event async for event in component_pipeline.astream_pipelined(html, "", **kwargs)]
+    return asyncio.run(main())
+
+def test_sections_come_back_in_document_order(monkeypatch):
+    monkeypatch.setattr(component_pipeline, "STAGES", _stages())
+    events = _run(PAGE)
+    result = events[-1]["data"]
+    assert [item["section"] for item in result["lcnc_structure"]] == ["header[0]", "section#a", "footer[2]"]
+    assert len(events[-1]["section_results"]) == 3
+    assert {event["node"] for event in events[:-1]} == {"HTML_PARSER", "COMPONENT_MAPPER", "LAYOUT_TRANSLATOR", "COMPATIBILITY_RANKER"}
+    assert result["error"] is None
+
+def test_deadline_skips_late_optional_stages(monkeypatch):
+    monkeypatch.setattr(component_pipeline, "STAGES", _stages({"LAYOUT_TRANSLATOR": 5, "COMPATIBILITY_RANKER": 5}))
+    started = time.perf_counter()
+    result = _run(PAGE, deadline=time.time() + 0.2)[-1]["data"]
+    assert time.perf_counter() - started < 2
+    assert result["error"] is None
+    skipped = {(entry["node"], entry["mode"]) for entry in result["analysis_report"]["degraded_nodes"]}
+    assert skipped == {("LAYOUT_TRANSLATOR", "skipped"), ("COMPATIBILITY_RANKER", "skipped")}
+    # The mapper's output stands in for the skipped layout
+    assert result["lcnc_structure"][0]["stage"] == "COMPONENT_MAPPER"
+
+def test_deadline_fails_sections_without_required_stages(monkeypatch):
+    monkeypatch.setattr(component_pipeline, "STAGES", _stages({"COMPONENT_MAPPER": 5}))
+    result = _run(PAGE, deadline=time.time() + 0.2)[-1]["data"]
+    assert "COMPONENT_MAPPER: deadline exceeded" in result["error"]
+
+def test_pipelined_conversion_is_recorded(tmp_path, monkeypatch):
+    store = ConversionStore(str(tmp_path / "conversions.sqlite3"))
+    monkeypatch.setattr(agent, "get_conversion_store", lambda: store)
+    monkeypatch.setattr(component_pipeline, "STAGES", _stages())
+
+    async def main():
+        events = [event async for event in agent.astream_pipelined_html_to_lcnc(PAGE, "", profile="thorough")]
+        result = events[-1]["data"]
+        return result, await agent.aload_conversion(result["conversion_id"])
+
+    result, record = asyncio.run(main())
+    assert result["conversion_id"] and result["profile"] == "thorough"
+    # Below the split size the page is recorded whole, as a fresh conversion would be
+    assert [section["name"] for section in record["sections"]] == ["page"]
+    assert record["result"]["lcnc_structure"] == result["lcnc_structure"]
+
+def test_layout_of_a_large_section_is_built_from_every_batch(monkeypatch):
+    seen = []
+
+    async def fake_analyze(args):
+        components = json.loads(args["components"])
+        seen.append(len(components))
+        return json.dumps({
+            "layout_structure": [{"ids": [c["id"] for c in components]}],
+            "responsive_breakpoints": [{"width": "sm"}]
+        })
+
+    monkeypatch.setattr(component_pipeline, "analyze_layout_structure", fake_analyze)
+    monkeypatch.setattr(component_pipeline, "prompt_batches", functools.partial(utils.prompt_batches, limit=200))
+    mapped = [{"id": i, "text": "x" * 30} for i in range(20)]
+    update = asyncio.run(component_pipeline._layout({"name": "main", "mapped_components": mapped}))
+    assert len(seen) > 1 and sum(seen) == 20
+    assert [i for part in update["layout_structure"] for i in part["ids"]] == list(range(20))
+    assert update["responsive_config"] == {"main": [{"width": "sm"}] * len(seen)}
+
+def test_cancelling_one_consumer_keeps_the_shared_css_parse(monkeypatch):
+    async def fake_parse_html(args):
+        return json.dumps({"components": [{"tag": "p"}]})
+
+    async def fake_merge(args):
+        return json.dumps({"components": [{"tag": "p", "styles": args["css_data"]}]})
+
+    monkeypatch.setattr(component_pipeline, "parse_html_structure", fake_parse_html)
+    monkeypatch.setattr(component_pipeline, "merge_html_css", fake_merge)
+
+    async def main():
+        async def slow_css():
+            await asyncio.sleep(0.1)
+            return "parsed-css"
+
+        css = asyncio.ensure_future(slow_css())
+        # One page gives up on its deadline while another keeps waiting
+        cut_off = asyncio.wait_for(component_pipeline._parse({"html_content": "<p>a</p>", "css": css}), 0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await cut_off
+        assert not css.cancelled()
+        update = await component_pipeline._parse({"html_content": "<p>b</p>", "css": css})
+
+        # site_bundle's per-page styles gather the same shared parses
+        sheets = [{"hash": "h"}]
+        styles = asyncio.ensure_future(site_bundle._combined_styles(sheets, {"h": css}))
+        other = asyncio.ensure_future(site_bundle._combined_styles(sheets, {"h": css}))
+        await asyncio.sleep(0)
+        styles.cancel()
+        return update, await other
+
+    update, other = asyncio.run(main())
+    assert update["parsed_components"] == [{"tag": "p", "styles": "parsed-css"}]
+    assert other == "parsed-css"
@@ -0,0 +1,46 @@
+# ai/tests/test_conversion_store.py
+import os
+import time
+import asyncio
+import conversion_store
+from conversion_store import ConversionStore, content_hash, get_conversion_store
+
+SECTIONS = [{"name": "header#top", "tag": "header", "chars": 10, "fingerprint": "f0", "result": {"lcnc_structure": [1]}}]
+
+def test_records_round_trip_and_survive_reopening(tmp_path):
+    path = str(tmp_path / "db" / "conversions.sqlite3")
+
+    async def main():
+        store = ConversionStore(path)
+        await store.save("c1", "fast", content_hash("a{}"), SECTIONS, {"lcnc_structure": [1]})
+        await store.save("c1", "fast", content_hash("a{}"), SECTIONS, {"lcnc_structure": [2]})
+        return await ConversionStore(path).get("c1"), await store.get_result("c1"), await store.get("missing")
+
+    record, result, missing = asyncio.run(main())
+    assert record["profile"] == "fast" and record["css_hash"] == content_hash("a{}")
+    assert record["sections"] == SECTIONS
+    # Saving the same id again replaces the record
+    assert record["result"] == {"lcnc_structure": [2]}
+    assert set(result) == {"result", "created_at"} and result["result"] == {"lcnc_structure": [2]}
+    assert missing is None
+
+def test_expired_records_are_hidden_and_pruned(tmp_path, monkeypatch):
+    store = ConversionStore(str(tmp_path / "c.sqlite3"), ttl=10)
+    later = time.time() + 11
+
+    async def main():
+        await store.save("old", "fast", "h", [], {})
+        monkeypatch.setattr(conversion_store.time, "time", lambda: later)
+        assert await store.get("old") is None and await store.get_result("old") is None
+        await store.save("new", "fast", "h", [], {})
+
+    asyncio.run(main())
+    assert [row[0] for row in store._conn.execute("SELECT id FROM conversions")] == ["new"]
+
+def test_empty_path_disables_the_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(conversion_store, "_store", None)
+    monkeypatch.setattr(conversion_store, "CONVERSION_DB_PATH", "")
+    assert get_conversion_store() is None
+    monkeypatch.setattr(conversion_store, "CONVERSION_DB_PATH", str(tmp_path / "c.sqlite3"))
+    assert get_conversion_store() is get_conversion_store()
+    assert os.path.exists(tmp_path / "c.sqlite3")
@@ -0,0 +1,98 @@
+# ai/tests/test_deadlines.py
+import time
+import asyncio
+import agent
+import utils
+from agent import _with_deadline
+
+def _nodes(agent_delay: float = 0.0, agent_error: str = None):
+    calls = []
+
+    async def node(state):
+        calls.append(("agent", state.get("max_iterations")))
+        await asyncio.sleep(agent_delay)
+        if agent_error:
+            return {"error": agent_error, "current_agent": "ERROR"}
+        return {"current_agent": "MAPPER_COMPLETE", "mapped_components": ["agent"]}
+
+    async def direct(state):
+        calls.append(("direct", None))
+        return {"current_agent": "MAPPER_COMPLETE", "mapped_components": ["direct"]}
+
+    return node, direct, calls
+
+def _run(wrapped, deadline, config=None, **state):
+    return asyncio.run(wrapped({"deadline": deadline, **state}, config or {}))
+
+def test_without_a_deadline_the_agent_runs_uncapped():
+    node, direct, calls = _nodes()
+    update = _run(_with_deadline("COMPONENT_MAPPER", node, direct, 2, True), None)
+    assert update["mapped_components"] == ["agent"] and calls == [("agent", None)]
+
+def test_short_budget_caps_iterations(monkeypatch):
+    monkeypatch.setattr(agent, "DEADLINE_DIRECT_SECONDS", 0.1)
+    monkeypatch.setattr(agent, "DEADLINE_ITERATION_SECONDS", 0.1)
+    node, direct, calls = _nodes()
+    # 1s shared by two stages: 0.5s for this one, i.e. 4-5 iterations of 0.1s
+    update = _run(_with_deadline("COMPONENT_MAPPER", node, direct, 2, True), time.time() + 1)
+    assert calls[0][1] in (4, 5)
+    assert update["degraded_nodes"] == [{"node": "COMPONENT_MAPPER", "mode": "capped", "max_iterations": calls[0][1]}]
+
+def test_tiny_budget_or_failed_capped_agent_falls_back_to_the_direct_call(monkeypatch):
+    monkeypatch.setattr(agent, "DEADLINE_DIRECT_SECONDS", 1.0)
+    monkeypatch.setattr(agent, "DEADLINE_ITERATION_SECONDS", 0.1)
+    node, direct, calls = _nodes()
+    update = _run(_with_deadline("COMPONENT_MAPPER", node, direct, 1, True), time.time() + 0.5, section={"name": "s0"})
+    assert calls == [("direct", None)] and update["mapped_components"] == ["direct"]
+    assert update["degraded_nodes"][0]["section"] == "s0"
+
+    monkeypatch.setattr(agent, "DEADLINE_DIRECT_SECONDS", 0.1)
+    node, direct, calls = _nodes(agent_error="Agent stopped due to iteration limit")
+    update = _run(_with_deadline("COMPONENT_MAPPER", node, direct, 1, True), time.time() + 0.5)
+    assert [kind for kind, _ in calls] == ["agent", "direct"]
+    assert update["degraded_nodes"][0]["mode"] == "direct"
+
+def test_overrunning_agent_is_cut_off(monkeypatch):
+    monkeypatch.setattr(agent, "DEADLINE_DIRECT_SECONDS", 0.05)
+    monkeypatch.setattr(agent, "DEADLINE_ITERATION_SECONDS", 0.01)
+    node, direct, calls = _nodes(agent_delay=5)
+    started = time.perf_counter()
+    update = _run(_with_deadline("COMPONENT_MAPPER", node, direct, 2, True), time.time() + 0.4)
+    assert time.perf_counter() - started < 1
+    assert update["mapped_components"] == ["direct"]
+    assert update["degraded_nodes"][0]["reason"] == "agent overran its budget"
+
+def test_past_deadline_skips_optional_stages_and_fails_required_ones():
+    node, direct, calls = _nodes()
+    skipped = _run(_with_deadline("RAG_PATTERN", node, direct, 1, False), time.time() - 1)
+    failed = _run(_with_deadline("HTML_PARSER", node, direct, 3, True), time.time() - 1)
+    assert calls == []
+    assert skipped == {"current_agent": "RAG_PATTERN_COMPLETE", "degraded_nodes": [{"node": "RAG_PATTERN", "mode": "skipped"}]}
+    assert failed == {"error": "HTML_PARSER: deadline exceeded", "current_agent": "ERROR"}
+
+def test_config_deadline_overrides_the_stored_one():
+    node, direct, calls = _nodes()
+    wrapped = _with_deadline("RAG_PATTERN", node, direct, 1, False)
+    # A resumed run replaces the original, long-passed deadline
+    update = _run(wrapped, time.time() - 100, {"configurable": {"deadline": None}})
+    assert update["mapped_components"] == ["agent"]
+
+def test_budget_below_one_iteration_goes_direct(monkeypatch):
+    monkeypatch.setattr(agent, "DEADLINE_DIRECT_SECONDS", 0.1)
+    monkeypatch.setattr(agent, "DEADLINE_ITERATION_SECONDS", 10.0)
+    node, direct, calls = _nodes()
+    update = _run(_with_deadline("COMPONENT_MAPPER", node, direct, 1, True), time.time() + 1)
+    assert calls == [("direct", None)]
+    assert update["degraded_nodes"][0]["reason"] == "budget below LCNC_DEADLINE_ITERATION_MS"
+
+def test_capped_executor_applies_any_cap():
+    class Executor:
+        max_iterations = 15
+
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    executor = Executor(agent=None, tools=[], verbose=False, handle_parsing_errors=True, callbacks=None, max_iterations=15)
+    assert utils.capped_executor(executor, {}) is executor
+    assert utils.capped_executor(executor, {"max_iterations": 0}).max_iterations == 0
+    assert utils.capped_executor(executor, {"max_iterations": 3}).max_iterations == 3
@@ -0,0 +1,106 @@
+# ai/tests/test_html_ingest.py
+import asyncio
+import pytest
+from html_ingest import HTMLGuard, UploadRejected, limited_stream, iter_multipart, ingest_upload, multipart_boundary
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+def _guard(html: str, chunk: int = 7, **limits) -> HTMLGuard:
+    guard = HTMLGuard(**{"max_elements": 10 ** 6, "max_depth": 10 ** 6, **limits})
+    data = html.encode("utf-8")
+    for i in range(0, len(data), chunk):
+        guard.feed_bytes(data[i:i + chunk])
+    guard.text()
+    return guard
+
+def _multipart(parts, boundary: str = "b0undary") -> bytes:
+    body = b""
+    for name, data in parts:
+        body += (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{name}.txt"\r\n'
+                 f"Content-Type: text/plain\r\n\r\n").encode() + data + b"\r\n"
+    return body + f"--{boundary}--\r\n".encode()
+
+def test_depth_tracks_nesting():
+    guard = _guard("<html><body><div><section><p>x</p></section></div></body></html>")
+    assert guard.stats()["max_depth"] == 5
+    with pytest.raises(UploadRejected) as e:
+        _guard("<div>" * 41, max_depth=40)
+    assert e.value.status_code == 413
+
+def test_flat_raw_text_siblings_do_not_deepen():
+    page = "<body>" + "<div>x</div><script>var a = '<div>';</script><style>p>a{}</style>" * 600 + "</body>"
+    guard = _guard(page, chunk=64, max_depth=512)
+    assert guard.stats()["max_depth"] == 2
+
+def test_void_implied_end_and_self_closing_elements():
+    page = "<ul>" + "<li>x" * 100 + "</ul><p>a<p>b<img src=x><br/><svg>" + "<path d='1'/>" * 100 + "</svg>"
+    assert _guard(page, max_depth=10).stats()["max_depth"] == 2
+
+def test_element_limit():
+    with pytest.raises(UploadRejected, match="LCNC_UPLOAD_MAX_ELEMENTS"):
+        _guard("<br>" * 501, max_elements=500)
+    assert _guard("<br>" * 500, max_elements=500).stats()["elements"] == 500
+
+def test_comments_and_raw_text_are_skipped():
+    page = "<!-- <div><div> --><script>if (a<b) { '<div>' }</ScRiPt><title>a<b>c</title><textarea><i></textarea><p>x</p>"
+    guard = _guard(page, chunk=1)
+    assert guard.stats()["elements"] == 4
+    assert guard.stats()["max_depth"] == 1
+
+def test_same_result_for_every_chunk_size():
+    page = ("<!DOCTYPE html><html><head><style>a>b{}</style></head><body><!-- x --><table><tr><td>1<td>2"
+            "<tr><td>3</table><div data-x=\"a>b\"><p>x<p>y</div><script>'</div>'</script></body></html>") * 3
+    reference = _guard(page, chunk=len(page)).stats()
+    for size in range(1, 40):
+        guard = _guard(page, chunk=size)
+        assert guard.stats() == reference
+        assert guard.text() == page
+
+def test_text_is_decoded_across_split_multibyte_characters():
+    page = "<p>héllo wörld ✓</p>"
+    assert _guard(page, chunk=1).text() == page
+
+def test_limited_stream_passes_chunks_until_limit():
+    data = b"x" * 100
+    assert b"".join(asyncio.run(_collect(limited_stream(_chunks(data, 30), 100)))) == data
+    with pytest.raises(UploadRejected) as e:
+        asyncio.run(_collect(limited_stream(_chunks(data, 30), 99)))
+    assert e.value.status_code == 413
+
+def test_iter_multipart_streams_parts():
+    body = _multipart([("html", b"<p>hi</p>"), ("css", b"h1{}\r\n--b0und"), ("other", b"zzz")])
+    for size in (1, 3, 17, len(body)):
+        pairs = asyncio.run(_collect(iter_multipart(_chunks(body, size), b"b0undary")))
+        parts = {}
+        for name, chunk in pairs:
+            parts[name] = parts.get(name, b"") + chunk
+        assert parts == {"html": b"<p>hi</p>", "css": b"h1{}\r\n--b0und", "other": b"zzz"}
+
+def test_iter_multipart_rejects_truncated_body():
+    body = _multipart([("html", b"<p>hi</p>")])[:-12]
+    with pytest.raises(UploadRejected) as e:
+        asyncio.run(_collect(iter_multipart(_chunks(body, 5), b"b0undary")))
+    assert e.value.status_code == 400
+
+def test_multipart_boundary():
+    assert multipart_boundary("text/html") is None
+    assert multipart_boundary('multipart/form-data; boundary="abc"') == b"abc"
+    with pytest.raises(UploadRejected):
+        multipart_boundary("multipart/form-data")
+
+def test_ingest_upload_raw_and_multipart():
+    page = "<html><body><p>x</p></body></html>"
+    html, css, stats = asyncio.run(ingest_upload(_chunks(page.encode(), 4), "text/html; charset=utf-8"))
+    assert (html, css, stats["elements"]) == (page, "", 3)
+    body = _multipart([("html", page.encode()), ("css", b"p{color:red}")])
+    html, css, _ = asyncio.run(ingest_upload(_chunks(body, 9), "multipart/form-data; boundary=b0undary"))
+    assert (html, css) == (page, "p{color:red}")
+    with pytest.raises(UploadRejected, match='no "html" part'):
+        asyncio.run(ingest_upload(_chunks(_multipart([("css", b"p{}")]), 9), "multipart/form-data; boundary=b0undary"))
+    with pytest.raises(UploadRejected, match="Body larger"):
+        asyncio.run(ingest_upload(_chunks(page.encode(), 4), "text/html", max_bytes=10))
@@ -0,0 +1,63 @@
+# ai/tests/test_incremental.py
+import asyncio
+import pytest
+import agent
+import sectioning
+from blob_store import load
+from conversion_store import ConversionStore
+
+class _Workflow:
+    """Graph stand-in whose layout echoes the converted HTML"""
+
+    checkpointer = None
+
+    def __init__(self):
+        self.converted = []
+
+    async def astream(self, graph_input, config, stream_mode):
+        html = load(graph_input["html_content"])
+        self.converted.append(html)
+        yield "values", {**graph_input, "layout_structure": [{"html": html}], "current_agent": "LAYOUT_TRANSLATOR_COMPLETE"}
+
+@pytest.fixture
+def workflow(tmp_path, monkeypatch):
+    workflow = _Workflow()
+
+    async def fake_graph(profile=agent.DEFAULT_PROFILE):
+        return workflow
+
+    store = ConversionStore(str(tmp_path / "conversions.sqlite3"))
+    monkeypatch.setattr(agent, "aget_workflow_graph", fake_graph)
+    monkeypatch.setattr(agent, "get_conversion_store", lambda: store)
+    monkeypatch.setattr(agent, "use_single_call", lambda html, css: False)
+    return workflow
+
+def _convert(html, base=None):
+    return asyncio.run(agent.aprocess_html_to_lcnc(html, "", profile="fast", base_conversion_id=base))
+
+def test_unchanged_small_page_is_reused(workflow):
+    page = "<body><header>Shop</header><main><p>Items</p></main></body>"
+    first = _convert(page)
+    assert workflow.converted == [page]
+    second = _convert(page, base=first["conversion_id"])
+    assert workflow.converted == [page]
+    assert second["analysis_report"]["incremental"]["reused_sections"] == 1
+    assert second["lcnc_structure"] == first["lcnc_structure"]
+
+def test_only_edited_sections_of_a_large_page_are_converted(workflow, monkeypatch):
+    monkeypatch.setattr(agent, "SECTION_SPLIT_CHARS", 500)
+    monkeypatch.setattr(sectioning, "SECTION_SPLIT_CHARS", 500)
+    monkeypatch.setattr(sectioning, "SECTION_MIN_CHARS", 100)
+    cards = [f'<section id="s{i}">' + f"<p>card {i}</p>" * 30 + "</section>" for i in range(3)]
+    first = _convert("<body>" + "".join(cards) + "</body>")
+    assert len(workflow.converted) == 3
+    cards[1] = cards[1].replace("card 1", "edited")
+    workflow.converted.clear()
+    second = _convert("<body>" + "".join(cards) + "</body>", base=first["conversion_id"])
+    assert workflow.converted == [cards[1]]
+    assert second["analysis_report"]["incremental"] == {
+        "base_conversion_id": first["conversion_id"],
+        "reused_sections": 2,
+        "converted_sections": 1,
+        "removed_sections": 1
+    }
@@ -0,0 +1,109 @@
+# ai/tests/test_job_queue.py
+import asyncio
+from job_queue import JobQueue
+
+async def _wait_for(queue, job_id, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        job = await queue.get(job_id)
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+def test_jobs_run_and_record_results_and_stage_timings(tmp_path):
+    async def handler(payload, on_stage):
+        await on_stage("HTML_PARSER", 12.5)
+        await on_stage("COMPONENT_MAPPER", 3.0)
+        if payload["html"] == "bad":
+            raise ValueError("boom")
+        if payload["html"] == "error":
+            return {"error": "LLM said no"}
+        return {"lcnc_structure": [payload["html"]]}
+
+    async def main():
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler, workers=2)
+        queue.start()
+        try:
+            ids = [await queue.submit({"html": html}) for html in ("ok", "bad", "error")]
+            jobs = [await _wait_for(queue, job_id) for job_id in ids]
+            return jobs, await queue.stats()
+        finally:
+            await queue.stop()
+
+    (ok, bad, error), stats = asyncio.run(main())
+    assert ok["status"] == "completed" and ok["result"] == {"lcnc_structure": ["ok"]}
+    assert ok["stage_timings"] == [
+        {"node": "HTML_PARSER", "duration_ms": 12.5},
+        {"node": "COMPONENT_MAPPER", "duration_ms": 3.0}
+    ]
+    assert ok["started_at"] >= ok["created_at"] and ok["finished_at"] >= ok["started_at"]
+    assert bad["status"] == "failed" and bad["error"] == "boom" and bad["result"] is None
+    assert error["status"] == "failed" and error["result"] == {"error": "LLM said no"}
+    assert stats == {"depth": 0, "workers": 2, "queued": 0, "running": 0, "completed": 1, "failed": 2}
+
+def test_single_worker_runs_jobs_in_submission_order(tmp_path):
+    order = []
+
+    async def handler(payload, on_stage):
+        order.append(payload["n"])
+        await asyncio.sleep(0)
+        return {}
+
+    async def main():
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler, workers=1)
+        ids = [await queue.submit({"n": n}) for n in range(5)]
+        queue.start()
+        try:
+            for job_id in ids:
+                await _wait_for(queue, job_id)
+        finally:
+            await queue.stop()
+
+    asyncio.run(main())
+    assert order == [0, 1, 2, 3, 4]
+
+def test_jobs_running_at_shutdown_are_requeued(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def hang(payload, on_stage):
+        await on_stage("HTML_PARSER", 1.0)
+        await asyncio.sleep(60)
+
+    async def first_process():
+        queue = JobQueue(path, hang, workers=1)
+        queue.start()
+        job_id = await queue.submit({"html": "x"})
+        for _ in range(500):
+            job = await queue.get(job_id)
+            if job["stage_timings"]:
+                break
+            await asyncio.sleep(0.01)
+        assert job["status"] == "running"
+        # Simulate a crash: the workers die without finishing the job
+        await queue.stop()
+        return job_id
+
+    job_id = asyncio.run(first_process())
+
+    async def finish(payload, on_stage):
+        return {"resumed": payload["html"]}
+
+    async def second_process():
+        queue = JobQueue(path, finish, workers=1)
+        requeued = await queue.get(job_id)
+        queue.start()
+        try:
+            return requeued, await _wait_for(queue, job_id)
+        finally:
+            await queue.stop()
+
+    requeued, job = asyncio.run(second_process())
+    assert requeued["status"] == "queued" and requeued["stage_timings"] == []
+    assert job["status"] == "completed" and job["result"] == {"resumed": "x"}
+
+def test_unknown_job_is_none(tmp_path):
+    async def handler(payload, on_stage):
+        return {}
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler)
+    assert asyncio.run(queue.get("nope")) is None
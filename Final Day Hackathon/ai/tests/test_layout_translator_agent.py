@@ -0,0 +1,37 @@
+# ai/tests/test_layout_translator_agent.py
+import json
+import asyncio
+import functools
+import layout_translator_agent
+import utils
+
+class FakeExecutor:
+    """Answers each batch with a layout naming the components it was given"""
+
+    def __init__(self, **kwargs):
+        self.prompts = []
+
+    async def ainvoke(self, inputs):
+        components = json.loads(inputs["mapped_components"])
+        self.prompts.append(inputs["mapped_components"])
+        return {"output": json.dumps({
+            "layout_structure": [{"ids": [c["id"] for c in components]}],
+            "responsive_config": {f"batch{components[0]['id']}": True}
+        })}
+
+def test_large_mapped_payload_is_translated_in_batches(monkeypatch):
+    executor = FakeExecutor()
+    monkeypatch.setattr(layout_translator_agent, "get_llm", lambda: None)
+    monkeypatch.setattr(layout_translator_agent, "create_react_agent", lambda *args: None)
+    monkeypatch.setattr(layout_translator_agent, "AgentExecutor", lambda **kwargs: executor)
+    monkeypatch.setattr(layout_translator_agent, "capped_executor", lambda agent_executor, state: agent_executor)
+    monkeypatch.setattr(layout_translator_agent, "prompt_batches", functools.partial(utils.prompt_batches, limit=300))
+    process_layout = layout_translator_agent.create_layout_translator_agent()
+
+    mapped = [{"id": i, "text": "x" * 50} for i in range(12)]
+    update = asyncio.run(process_layout({"mapped_components": mapped}))
+    assert update["current_agent"] == "LAYOUT_TRANSLATOR_COMPLETE"
+    assert len(executor.prompts) > 1 and all(len(prompt) <= 300 for prompt in executor.prompts)
+    # Every component reaches a prompt, and the layouts are joined in order
+    assert [i for part in update["layout_structure"] for i in part["ids"]] == list(range(12))
+    assert len(update["responsive_config"]) == len(executor.prompts)
@@ -0,0 +1,66 @@
+# ai/tests/test_metrics.py
+import asyncio
+import httpx
+import app as app_module
+import metrics
+from metrics import Counter, Histogram
+
+def test_counter_renders_one_line_per_label_set():
+    counter = Counter("c_total", "Things", ("model",))
+    counter.inc(model="a")
+    counter.inc(2, model="a")
+    counter.inc(model='quo"te\n')
+    assert counter.render() == [
+        "# HELP c_total Things",
+        "# TYPE c_total counter",
+        'c_total{model="a"} 3',
+        'c_total{model="quo\\"te\\n"} 1'
+    ]
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("h_seconds", "Latency", ("node",), buckets=(1.0, 0.1))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, node="n")
+    assert histogram.render()[2:] == [
+        'h_seconds_bucket{node="n",le="0.1"} 1',
+        'h_seconds_bucket{node="n",le="1"} 2',
+        'h_seconds_bucket{node="n",le="+Inf"} 3',
+        'h_seconds_count{node="n"} 3',
+        'h_seconds_sum{node="n"} 5.55'
+    ]
+
+def test_timed_node_and_tool_record_latency_even_on_error(monkeypatch):
+    nodes = Histogram("n", "n", ("node",))
+    tools = Histogram("t", "t", ("tool",))
+    monkeypatch.setattr(metrics, "NODE_LATENCY", nodes)
+    monkeypatch.setattr(metrics, "TOOL_LATENCY", tools)
+
+    async def failing(state, config):
+        raise RuntimeError("boom")
+
+    @metrics.timed_tool
+    async def lookup(x):
+        return x * 2
+
+    async def main():
+        assert await lookup(2) == 4
+        try:
+            await metrics.timed_node("MAPPER", failing)({}, None)
+        except RuntimeError:
+            pass
+
+    asyncio.run(main())
+    assert 'n_count{node="MAPPER"} 1' in nodes.render()
+    assert 't_count{tool="lookup"} 1' in tools.render()
+
+def test_metrics_endpoint_reports_requests_by_route():
+    async def main():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/health")
+            return await client.get("/metrics")
+
+    response = asyncio.run(main())
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert 'lcnc_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
+    assert "# TYPE lcnc_llm_tokens_total counter" in response.text
@@ -0,0 +1,124 @@
+# ai/tests/test_node_attempts.py
+import time
+import asyncio
+import agent
+from agent import _add_counts, _with_attempts
+
+def _stuck_node(result=None):
+    calls = []
+
+    async def node(state, config):
+        calls.append(state["node_attempts"].get("COMPONENT_MAPPER", 0))
+        return result or {"current_agent": "COMPONENT_MAPPER"}
+
+    return node, calls
+
+def _loop(wrapped, state, config=None):
+    """Run the node the way its self-loop edge would, until it completes or fails"""
+    async def main():
+        while True:
+            update = await wrapped(state, config or {})
+            state["node_attempts"] = _add_counts(state["node_attempts"], update["node_attempts"])
+            if update.get("error") or update["current_agent"].endswith("_COMPLETE"):
+                return update
+
+    return asyncio.run(main())
+
+def test_counts_from_parallel_branches_add_up():
+    assert _add_counts({"A": 1}, {"A": 1, "B": 1}) == {"A": 2, "B": 1}
+    assert _add_counts(None, None) == {}
+
+def test_self_loop_stops_after_max_attempts_with_exponential_backoff(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(agent.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(agent, "NODE_MAX_ATTEMPTS", 4)
+    monkeypatch.setattr(agent, "NODE_RETRY_BACKOFF_SECONDS", 1.0)
+    monkeypatch.setattr(agent, "NODE_RETRY_BACKOFF_MAX_SECONDS", 3.0)
+    node, calls = _stuck_node()
+    update = _loop(_with_attempts("COMPONENT_MAPPER", node), {"node_attempts": {}})
+    assert calls == [0, 1, 2, 3]
+    assert sleeps == [1.0, 2.0, 3.0]
+    assert update["current_agent"] == "ERROR"
+    assert update["error"] == "COMPONENT_MAPPER: did not complete after 4 attempts (LCNC_NODE_MAX_ATTEMPTS)"
+
+def test_completed_or_failed_nodes_keep_their_own_result(monkeypatch):
+    monkeypatch.setattr(agent, "NODE_MAX_ATTEMPTS", 1)
+    node, _ = _stuck_node({"current_agent": "COMPONENT_MAPPER_COMPLETE"})
+    done = _loop(_with_attempts("COMPONENT_MAPPER", node), {"node_attempts": {}})
+    node, _ = _stuck_node({"current_agent": "ERROR", "error": "boom"})
+    failed = _loop(_with_attempts("COMPONENT_MAPPER", node), {"node_attempts": {}})
+    assert done == {"current_agent": "COMPONENT_MAPPER_COMPLETE", "node_attempts": {"COMPONENT_MAPPER": 1}}
+    assert failed["error"] == "boom"
+
+def test_backoff_never_runs_past_the_deadline(monkeypatch):
+    monkeypatch.setattr(agent, "NODE_RETRY_BACKOFF_SECONDS", 60.0)
+    monkeypatch.setattr(agent, "NODE_RETRY_BACKOFF_MAX_SECONDS", 60.0)
+    node, _ = _stuck_node({"current_agent": "COMPONENT_MAPPER_COMPLETE"})
+    state = {"node_attempts": {"COMPONENT_MAPPER": 1}, "deadline": time.time() + 0.1}
+    started = time.perf_counter()
+    asyncio.run(_with_attempts("COMPONENT_MAPPER", node)(state, {}))
+    assert time.perf_counter() - started < 1
+
+def test_resume_gets_a_fresh_attempt_budget(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(agent.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(agent, "NODE_MAX_ATTEMPTS", 2)
+    node, calls = _stuck_node()
+    config = {"configurable": {"attempts_base": {"COMPONENT_MAPPER": 2}}}
+    update = _loop(_with_attempts("COMPONENT_MAPPER", node), {"node_attempts": {"COMPONENT_MAPPER": 2}}, config)
+    assert calls == [2, 3] and len(sleeps) == 1
+    assert "after 2 attempts" in update["error"]
+
+def test_branch_nodes_retry_in_place_and_fail_when_they_never_complete(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(agent.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(agent, "NODE_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(agent, "NODE_RETRY_BACKOFF_SECONDS", 1.0)
+    results = iter([{"current_agent": "WEIRD"}, {"current_agent": "LAYOUT_TRANSLATOR_COMPLETE", "layout_structure": [1]}])
+
+    async def flaky(state, config):
+        return next(results)
+
+    async def stuck(state, config):
+        return {"current_agent": "WEIRD"}
+
+    recovered = asyncio.run(_with_attempts("LAYOUT_TRANSLATOR", flaky, self_loop=False)({"node_attempts": {}}, {}))
+    assert recovered["current_agent"] == "LAYOUT_TRANSLATOR_COMPLETE"
+    assert recovered["node_attempts"] == {"LAYOUT_TRANSLATOR": 2} and sleeps == [1.0]
+
+    failed = asyncio.run(_with_attempts("RAG_PATTERN", stuck, self_loop=False)({"node_attempts": {}}, {}))
+    assert failed["node_attempts"] == {"RAG_PATTERN": 3}
+    assert failed["error"] == "RAG_PATTERN: did not complete after 3 attempts (LCNC_NODE_MAX_ATTEMPTS)"
+
+def test_graph_does_not_accept_a_branch_that_never_completes(monkeypatch):
+    monkeypatch.setattr(agent, "NODE_RETRY_BACKOFF_SECONDS", 0.0)
+    calls = []
+
+    def fake_direct_node(node):
+        async def run(state):
+            calls.append(node)
+            if node == "LAYOUT_TRANSLATOR":
+                return {"current_agent": "WEIRD"}
+            key = {"HTML_PARSER": "parsed_components", "COMPONENT_MAPPER": "mapped_components"}.get(node, "fixes")
+            return {key: [{"node": node}], "current_agent": f"{node}_COMPLETE"}
+        return run
+
+    monkeypatch.setattr(agent, "create_direct_node", fake_direct_node)
+    workflow = agent.create_workflow_graph(profile="balanced")
+    state = asyncio.run(workflow.ainvoke(agent.create_initial_state("<p>x</p>", "", "balanced")))
+    assert calls.count("LAYOUT_TRANSLATOR") == agent.NODE_MAX_ATTEMPTS
+    assert state["error"] == f"LAYOUT_TRANSLATOR: did not complete after {agent.NODE_MAX_ATTEMPTS} attempts (LCNC_NODE_MAX_ATTEMPTS)"
+    assert state["node_attempts"]["LAYOUT_TRANSLATOR"] == agent.NODE_MAX_ATTEMPTS
+    assert agent.build_conversion_result(state)["error"]
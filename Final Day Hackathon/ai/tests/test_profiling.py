@@ -0,0 +1,110 @@
+# ai/tests/test_profiling.py
+import time
+import warnings
+import asyncio
+import httpx
+import pytest
+import app as app_module
+import profiling
+from profiling import ProfilerBusy, profile_coroutine
+
+def _spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+async def _convert() -> str:
+    _spin(0.1)
+    # A spawned task counts as the profiled coroutine's CPU too
+    await asyncio.ensure_future(asyncio.sleep(0.1))
+    await asyncio.to_thread(_spin, 0.1)
+    return "done"
+
+def test_profile_splits_cpu_io_and_offloaded_work():
+    async def main():
+        loop = asyncio.get_running_loop()
+        factory = loop.get_task_factory()
+        result = await profile_coroutine(_convert(), interval=0.002)
+        assert loop.get_task_factory() is factory
+        return result
+
+    result, report, collapsed = asyncio.run(main())
+    assert result == "done"
+    split = report["split_ms"]
+    assert split["cpu"] > 50 and split["io_wait"] > 50 and split["offloaded"] > 50
+    assert sum(report["cpu_by_package_ms"].values()) == pytest.approx(split["cpu"], abs=1)
+    assert "[cpu];_convert" in collapsed and "[offloaded];_spin" in collapsed
+
+def test_one_profile_at_a_time():
+    async def main():
+        first = asyncio.ensure_future(profile_coroutine(asyncio.sleep(0.05)))
+        await asyncio.sleep(0)
+        with pytest.raises(ProfilerBusy):
+            await profile_coroutine(asyncio.sleep(0))
+        await first
+        # The lock is released again afterwards
+        await profile_coroutine(asyncio.sleep(0))
+
+    asyncio.run(main())
+
+def test_debug_profile_requires_the_admin_token(monkeypatch):
+    async def main():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {"html_content": "<p>x</p>", "css_content": ""}
+            hidden = await client.post("/debug/profile", json=body)
+            monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+            denied = await client.post("/debug/profile", json=body, headers={"Authorization": "Bearer wrong"})
+            return hidden, denied
+
+    hidden, denied = asyncio.run(main())
+    assert hidden.status_code == 404
+    assert denied.status_code == 401 and denied.headers["www-authenticate"] == "Bearer"
+
+def test_busy_profiler_closes_the_coroutine_it_was_given():
+    async def main():
+        first = asyncio.ensure_future(profile_coroutine(asyncio.sleep(0.05)))
+        await asyncio.sleep(0)
+        rejected = asyncio.sleep(0)
+        with pytest.raises(ProfilerBusy):
+            await profile_coroutine(rejected)
+        await first
+        return rejected
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        rejected = asyncio.run(main())
+    assert rejected.cr_frame is None
+
+def test_profile_without_the_private_task_registry(monkeypatch):
+    monkeypatch.setattr(profiling, "_CURRENT_TASKS", None)
+    result, report, collapsed = asyncio.run(profile_coroutine(_convert(), interval=0.002))
+    assert result == "done"
+    assert report["split_ms"]["cpu"] > 50 and report["split_ms"]["io_wait"] > 50
+    assert "[cpu];_convert" in collapsed
+
+def test_debug_profile_runs_the_requested_configuration(monkeypatch):
+    seen = []
+
+    async def fake_pipelined(html, css, profile, deadline):
+        seen.append(("pipelined", profile, deadline))
+        yield {"event": "result", "data": {"lcnc_structure": [], "analysis_report": {}, "conversion_id": "c1"}}
+
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(app_module, "astream_pipelined_html_to_lcnc", fake_pipelined)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/debug/profile",
+                json={"html_content": "<p>x</p>", "css_content": "", "pipelined": True, "profile": "fast"},
+                headers={"Authorization": "Bearer secret", "X-Deadline-Ms": "5000"}
+            )
+
+    started = time.time()
+    response = asyncio.run(main())
+    assert response.status_code == 200 and response.json()["conversion_id"] == "c1"
+    [(mode, profile, deadline)] = seen
+    assert (mode, profile) == ("pipelined", "fast")
+    assert started + 4 < deadline < time.time() + 5
@@ -0,0 +1,53 @@
+# ai/tests/test_response_encoding.py
+import json
+import pytest
+import response_encoding
+from response_encoding import JSON, MSGPACK, NotAcceptable, negotiate, encode, encode_record, stream_media_type
+
+msgpack = pytest.importorskip("msgpack")
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("*/*", JSON),
+    ("application/json", JSON),
+    ("application/msgpack", MSGPACK),
+    ("application/x-msgpack, application/json;q=0.5", MSGPACK),
+    ("application/json;q=0.9, application/msgpack", MSGPACK),
+    ("application/msgpack;q=0.5, */*", JSON),
+    ("text/html, application/*;q=0.2", JSON),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+def test_negotiate_rejects_unoffered_types():
+    with pytest.raises(NotAcceptable):
+        negotiate("text/html")
+    with pytest.raises(NotAcceptable):
+        negotiate("application/json;q=0, application/msgpack;q=0")
+
+def test_ndjson_only_accepted_for_streams():
+    with pytest.raises(NotAcceptable):
+        negotiate("application/x-ndjson")
+    assert negotiate("application/x-ndjson", stream=True) == JSON
+    assert stream_media_type(JSON) == "application/x-ndjson"
+    assert stream_media_type(MSGPACK) == MSGPACK
+
+def test_msgpack_not_offered_without_the_package(monkeypatch):
+    monkeypatch.setattr(response_encoding, "msgpack", None)
+    with pytest.raises(NotAcceptable):
+        negotiate("application/msgpack")
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_encoding_round_trips(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(response_encoding, "orjson", None)
+    data = {"a": [1, 2.5, None, "é"], 3: "non-string key"}
+    assert json.loads(encode(data)) == {"a": [1, 2.5, None, "é"], "3": "non-string key"}
+
+def test_records_split_back_apart():
+    records = [{"index": i, "result": {"x": "y" * i}} for i in range(3)]
+    lines = b"".join(encode_record(record) for record in records).splitlines()
+    assert [json.loads(line) for line in lines] == records
+    unpacker = msgpack.Unpacker()
+    unpacker.feed(b"".join(encode_record(record, MSGPACK) for record in records))
+    assert list(unpacker) == records
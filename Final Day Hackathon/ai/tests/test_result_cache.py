@@ -0,0 +1,73 @@
+# ai/tests/test_result_cache.py
+import time
+import pytest
+import result_cache
+from result_cache import DiskTier, MemoryTier, ResultCache, make_cache_key
+
+def test_key_depends_on_content_and_options_only():
+    key = make_cache_key("<p>a</p>", "p{}", profile="fast", pipelined=False)
+    assert key == make_cache_key("<p>a</p>", "p{}", pipelined=False, profile="fast")
+    assert key != make_cache_key("<p>a</p>", "p{}", profile="thorough", pipelined=False)
+    # Length prefixes keep the html/css boundary unambiguous
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = MemoryTier(max_bytes=10, ttl=60)
+    tier.set("a", "aaaa")
+    tier.set("b", "bbbb")
+    assert tier.get("a") == "aaaa"
+    tier.set("c", "cccc")
+    assert tier.get("b") is None
+    assert tier.get("a") == "aaaa" and tier.get("c") == "cccc"
+    assert tier.size == 8
+    tier.set("huge", "x" * 11)
+    assert tier.get("huge") is None
+
+def test_memory_tier_expires_entries(monkeypatch):
+    tier = MemoryTier(max_bytes=100, ttl=10)
+    tier.set("a", "value")
+    later = time.time() + 11
+    monkeypatch.setattr(result_cache.time, "time", lambda: later)
+    assert tier.get("a") is None
+    assert tier.size == 0
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_disk_tier_round_trips_and_evicts(tmp_path, monkeypatch, codec):
+    if codec == "zlib":
+        monkeypatch.setattr(result_cache, "zstandard", None)
+    elif result_cache.zstandard is None:
+        pytest.skip("zstandard not installed")
+    tier = DiskTier(str(tmp_path / "cache.sqlite3"), max_bytes=10 ** 6, ttl=60)
+    tier.set("k", '{"a": 1}')
+    assert tier.get("k") == '{"a": 1}'
+    assert tier.get("missing") is None
+
+def test_disk_tier_drops_least_recently_used_over_budget(tmp_path):
+    tier = DiskTier(str(tmp_path / "cache.sqlite3"), max_bytes=10 ** 6, ttl=60)
+    incompressible = [bytes(range(256)).hex() * 20 for _ in range(3)]
+    for i, payload in enumerate(incompressible):
+        tier.set(f"k{i}", payload + str(i))
+    size = tier._conn.execute("SELECT MAX(size) FROM results").fetchone()[0]
+    tier.max_bytes = size * 3
+    tier.get("k0")
+    tier.set("k3", "x" * 100000)
+    assert tier.get("k0") is not None
+    assert tier.get("k1") is None
+
+def test_two_tier_cache_promotes_disk_hits(tmp_path):
+    disk = DiskTier(str(tmp_path / "cache.sqlite3"), max_bytes=10 ** 6, ttl=60)
+    ResultCache(MemoryTier(10 ** 6, 60), disk).set("k", {"lcnc_structure": [1]})
+    # A new process: empty memory, same disk
+    cache = ResultCache(MemoryTier(10 ** 6, 60), disk)
+    assert cache.get("k") == ({"lcnc_structure": [1]}, "disk")
+    assert cache.get("k") == ({"lcnc_structure": [1]}, "memory")
+    assert cache.get("other") == (None, None)
+    assert cache.stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 1}
+
+def test_disk_failures_degrade_to_misses(tmp_path):
+    disk = DiskTier(str(tmp_path / "cache.sqlite3"), max_bytes=10 ** 6, ttl=60)
+    disk._conn.close()
+    cache = ResultCache(MemoryTier(10 ** 6, 60), disk)
+    cache.set("k", {"a": 1})
+    assert cache.get("k") == ({"a": 1}, "memory")
+    assert cache.get("other") == (None, None)
@@ -0,0 +1,84 @@
+# ai/tests/test_result_views.py
+import pytest
+from result_views import (
+    InvalidCursor, InvalidPointer, page_structure, resolve_pointer, select_fields
+)
+
+RESPONSE = {
+    "status": "success",
+    "lcnc_structure": [{"type": "Container"}],
+    "analysis_report": {"fixes": ["a"], "compatibility": [{"score": 1}], "sections": []}
+}
+
+TREE = [{
+    "type": "Page",
+    "children": [
+        {"type": "Card", "id": i, "components": [{"type": "Text", "id": f"{i}.{j}"} for j in range(3)]}
+        for i in range(5)
+    ]
+}]
+
+def test_select_fields_projects_dotted_paths():
+    assert select_fields(RESPONSE, ["status", "analysis_report.fixes", "analysis_report.missing", "nope.x"]) == {
+        "status": "success",
+        "analysis_report": {"fixes": ["a"]}
+    }
+
+def test_resolve_pointer_follows_rfc_6901():
+    document = {"a/b": {"~k": [10, 20]}}
+    assert resolve_pointer(document, "") is document
+    assert resolve_pointer(document, "/a~1b/~0k/1") == 20
+    for bad in ("a", "/a~1b/~0k/2", "/a~1b/~0k/01", "/a~1b/~0k/0/x", "/missing"):
+        with pytest.raises(InvalidPointer):
+            resolve_pointer(document, bad)
+
+def test_pages_through_children_with_cursors():
+    first = page_structure(TREE, "/0", None, limit=2, depth=1, version=1.0)
+    assert first["node"] == {"type": "Page"}
+    assert first["children_pointer"] == "/0/children" and first["total"] == 5
+    # Below depth, child lists are cut to a count and a pointer to fetch them
+    assert first["items"][1] == {"type": "Card", "id": 1, "components_count": 3, "components_pointer": "/0/children/1/components"}
+    ids = [item["id"] for item in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = page_structure(TREE, "/0", cursor, limit=2, depth=1, version=1.0)
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+    assert ids == [0, 1, 2, 3, 4]
+
+def test_cut_pointer_fetches_the_cut_list():
+    page = page_structure(TREE, "/0/children/1/components", None, limit=10, depth=1, version=1.0)
+    assert [item["id"] for item in page["items"]] == ["1.0", "1.1", "1.2"]
+    deep = page_structure(TREE, "", None, limit=1, depth=3, version=1.0)
+    assert deep["items"][0]["children"][0]["components"][0] == {"type": "Text", "id": "0.0"}
+
+def test_cursors_are_bound_to_pointer_and_version():
+    cursor = page_structure(TREE, "/0", None, limit=2, depth=1, version=1.0)["next_cursor"]
+    with pytest.raises(InvalidCursor, match="stale"):
+        page_structure(TREE, "/0", cursor, limit=2, depth=1, version=2.0)
+    with pytest.raises(InvalidCursor, match="another pointer"):
+        page_structure(TREE, "", cursor, limit=2, depth=1, version=1.0)
+    with pytest.raises(InvalidCursor, match="Malformed"):
+        page_structure(TREE, "/0", "!!", limit=2, depth=1, version=1.0)
+
+def test_convert_returns_only_selected_fields(monkeypatch):
+    import asyncio
+    import httpx
+    import app as app_module
+
+    async def fake_run_conversion(request, on_stage=None, admit=False):
+        return {"lcnc_structure": TREE, "analysis_report": RESPONSE["analysis_report"]}
+
+    monkeypatch.setattr(app_module, "_run_conversion", fake_run_conversion)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {"html_content": "<p>x</p>", "css_content": ""}
+            trimmed = await client.post("/convert?fields=analysis_report.fixes", json=body)
+            unknown = await client.post("/convert?fields=bogus", json=body)
+            return trimmed, unknown
+
+    trimmed, unknown = asyncio.run(main())
+    assert trimmed.json() == {"status": "success", "analysis_report": {"fixes": ["a"]}}
+    assert unknown.status_code == 422
@@ -0,0 +1,61 @@
+# ai/tests/test_resume.py
+import asyncio
+import pytest
+import agent
+import blob_store
+from types import SimpleNamespace
+
+class _Workflow:
+    """Checkpointed graph whose only thread is one finished run"""
+
+    checkpointer = object()
+
+    def __init__(self, values):
+        self.snapshot = SimpleNamespace(values=values, next=(), config={"configurable": {}})
+
+    async def aget_state(self, config):
+        return self.snapshot
+
+    async def aget_state_history(self, config):
+        if config["configurable"]["thread_id"] == "run1":
+            yield self.snapshot
+
+class _Store:
+    def __init__(self, record):
+        self.record = record
+
+    async def get(self, conversion_id):
+        return self.record
+
+    async def save(self, *args):
+        pass
+
+def _resume(monkeypatch, workflow, record):
+    async def fake_graph(profile=agent.DEFAULT_PROFILE):
+        return workflow
+
+    monkeypatch.setattr(agent, "aget_workflow_graph", fake_graph)
+    monkeypatch.setattr(agent, "get_conversion_store", lambda: _Store(record))
+
+    async def main():
+        return [event async for event in agent.astream_resume_html_to_lcnc("run1")]
+    return asyncio.run(main())
+
+# A finished large run: its state holds handles to blobs deleted when it succeeded
+_GONE = {"$blob": "run1/b0", "kind": "text", "bytes": 10}
+
+@pytest.fixture(autouse=True)
+def empty_spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "BLOB_SPILL_DIR", str(tmp_path))
+    monkeypatch.setattr(blob_store, "_stores", {})
+
+def test_finished_run_returns_its_recorded_result(monkeypatch):
+    result = {"conversion_id": "run1", "error": None, "lcnc_structure": [{"type": "text"}], "analysis_report": {}}
+    events = _resume(monkeypatch, _Workflow({"html_content": _GONE}), {"profile": "fast", "sections": [], "result": result})
+    assert events == [{"event": "result", "data": result}]
+    assert blob_store._stores == {}
+
+def test_finished_run_without_record_or_blobs_is_not_found(monkeypatch):
+    with pytest.raises(agent.ConversionNotFound):
+        _resume(monkeypatch, _Workflow({"html_content": _GONE, "css_content": ""}), None)
+    assert blob_store._stores == {}
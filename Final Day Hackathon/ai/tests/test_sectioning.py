@@ -0,0 +1,45 @@
+# ai/tests/test_sectioning.py
+import sectioning
+from sectioning import split_into_sections, stitch_results, section_fingerprint
+
+def _card(i: int) -> str:
+    return f"<section id='s{i}'><h2>Title {i}</h2>" + "<p>Lorem ipsum dolor sit amet.</p>" * 60 + "</section>"
+
+def test_small_page_is_one_section():
+    sections = split_into_sections("<body><div id='root'><p>hi</p></div></body>")
+    assert [s["name"] for s in sections] == ["page"]
+
+def test_top_level_sections_and_main_children():
+    page = "<body><header>" + "h" * 2000 + "</header><main>" + _card(0) + _card(1) + "</main><footer>" + "f" * 2000 + "</footer></body>"
+    names = [s["name"] for s in split_into_sections(page)]
+    assert names == ["header[0]", "section#s0", "section#s1", "footer[3]"]
+
+def test_single_root_wrapper_is_descended(monkeypatch):
+    monkeypatch.setattr(sectioning, "SECTION_SPLIT_CHARS", 5000)
+    page = "<body><div id='root'><div class='app'>" + "".join(_card(i) for i in range(6)) + "</div></div><script>x()</script></body>"
+    sections = split_into_sections(page)
+    assert [s["name"] for s in sections] == [f"section#s{i}" for i in range(6)]
+    assert all(len(s["html"]) <= 5000 for s in sections)
+
+def test_oversized_sections_are_split_again(monkeypatch):
+    monkeypatch.setattr(sectioning, "SECTION_SPLIT_CHARS", 5000)
+    big = "<section id='big'>" + "".join(f"<article id='a{i}'>" + "<p>text</p>" * 200 + "</article>" for i in range(4)) + "</section>"
+    page = "<body><header>" + "h" * 2000 + "</header>" + big + "</body>"
+    names = [s["name"] for s in split_into_sections(page)]
+    assert names == ["header[0]", "article#a0", "article#a1", "article#a2", "article#a3"]
+
+def test_stitch_takes_workflow_agent_from_sections():
+    sections = [{"name": "a", "tag": "div", "html": "<div/>"}, {"name": "b", "tag": "div", "html": "<div/>"}]
+    fast = {"lcnc_structure": [{"x": 1}], "analysis_report": {"workflow_agent": "LAYOUT_TRANSLATOR_COMPLETE"}}
+    result = stitch_results(sections, [fast, fast])
+    assert result["analysis_report"]["workflow_agent"] == "LAYOUT_TRANSLATOR_COMPLETE"
+    assert result["lcnc_structure"] == [{"x": 1}, {"x": 1}]
+    failed = stitch_results(sections, [{"error": "boom", "analysis_report": {}}, fast])
+    assert failed["analysis_report"]["workflow_agent"] == "ERROR"
+    assert failed["error"] == "a: boom"
+
+def test_fingerprint_ignores_whitespace_and_quoting_only():
+    base = section_fingerprint("<div class='a'>\n  <p>Hello   world</p>\n</div>")
+    assert section_fingerprint('<div class="a"> <p>Hello world</p> </div>') == base
+    assert section_fingerprint('<div class="a"> <p>Hello there</p> </div>') != base
+    assert section_fingerprint('<div class="b"> <p>Hello world</p> </div>') != base
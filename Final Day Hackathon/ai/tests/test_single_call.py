@@ -0,0 +1,101 @@
+# ai/tests/test_single_call.py
+import json
+import time
+import asyncio
+import pytest
+import single_call
+from single_call import convert_single_call, count_tokens, use_single_call
+
+class _Reply:
+    def __init__(self, content):
+        self.content = content
+
+class _FakeLLM:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return _Reply(json.dumps({
+            "parsed_components": [{"tag": "p"}],
+            "mapped_components": {"lcnc_type": "Text"},
+            "layout_structure": [{"type": "stack"}],
+            "responsive_breakpoints": []
+        }))
+
+@pytest.fixture
+def no_tokenizer(monkeypatch):
+    monkeypatch.setattr(single_call, "_encoding", False)
+
+def test_offline_tokenizer_falls_back_to_estimate(monkeypatch):
+    class Offline:
+        @staticmethod
+        def encoding_for_model(model):
+            raise OSError("no network")
+
+    monkeypatch.setattr(single_call, "tiktoken", Offline)
+    monkeypatch.setattr(single_call, "_encoding", None)
+    single_call.load_tokenizer()
+    assert single_call._encoding is False
+    assert count_tokens("x" * 400) == 100
+
+def test_size_threshold(monkeypatch, no_tokenizer):
+    monkeypatch.setattr(single_call, "SINGLE_CALL_MAX_TOKENS", 100)
+    assert use_single_call("x" * 300, "y" * 100)
+    assert not use_single_call("x" * 300, "y" * 200)
+    monkeypatch.setattr(single_call, "SINGLE_CALL_MAX_TOKENS", 0)
+    assert not use_single_call("x", "")
+
+def test_result_is_normalized(monkeypatch):
+    monkeypatch.setattr(single_call, "get_llm", lambda: _FakeLLM())
+    update = asyncio.run(convert_single_call("<p>hi</p>", ""))
+    assert update["mapped_components"] == [{"lcnc_type": "Text"}]
+    assert update["current_agent"] == "LAYOUT_TRANSLATOR_COMPLETE"
+
+def test_call_is_abandoned_at_the_deadline(monkeypatch):
+    llm = _FakeLLM(delay=5)
+    monkeypatch.setattr(single_call, "get_llm", lambda: llm)
+    started = time.perf_counter()
+    assert asyncio.run(convert_single_call("<p>hi</p>", "", deadline=time.time() + 0.1)) is None
+    assert time.perf_counter() - started < 1
+
+def test_passed_deadline_skips_the_call(monkeypatch):
+    llm = _FakeLLM()
+    monkeypatch.setattr(single_call, "get_llm", lambda: llm)
+    assert asyncio.run(convert_single_call("<p>hi</p>", "", deadline=time.time() - 1)) is None
+    assert llm.calls == 0
+
+def test_follow_up_stages_honour_the_deadline(monkeypatch):
+    import agent
+    import component_pipeline
+
+    async def fake_convert(html, css, deadline=None):
+        return {"mapped_components": [{"lcnc_type": "Text"}], "layout_structure": [{"type": "stack"}],
+                "current_agent": "SINGLE_CALL_COMPLETE"}
+
+    async def quick_patterns(args):
+        return json.dumps({"matched_patterns": [{"pattern_name": "hero"}]})
+
+    async def slow_ranking(args):
+        await asyncio.sleep(5)
+        return json.dumps({"compatibility": [], "fixes": []})
+
+    monkeypatch.setattr(agent, "use_single_call", lambda html, css: True)
+    monkeypatch.setattr(agent, "convert_single_call", fake_convert)
+    monkeypatch.setattr(agent, "get_conversion_store", lambda: None)
+    monkeypatch.setattr(component_pipeline, "retrieve_similar_patterns", quick_patterns)
+    monkeypatch.setattr(component_pipeline, "rank_component_compatibility", slow_ranking)
+
+    async def main():
+        events = agent.astream_html_to_lcnc("<p>x</p>", "", profile="balanced", deadline=time.time() + 0.3)
+        return [event async for event in events]
+
+    started = time.perf_counter()
+    events = asyncio.run(main())
+    assert time.perf_counter() - started < 2
+    report = events[-1]["data"]["analysis_report"]
+    assert report["single_call"] and events[-1]["data"]["error"] is None
+    assert report["degraded_nodes"] == [{"node": "COMPATIBILITY_RANKER", "mode": "skipped"}]
+    assert report["matched_patterns"] == [{"pattern_name": "hero"}]
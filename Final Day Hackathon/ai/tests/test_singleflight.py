@@ -0,0 +1,73 @@
+# ai/tests/test_singleflight.py
+import asyncio
+import pytest
+import app as app_module
+from result_cache import MemoryTier, ResultCache
+from singleflight import SingleFlight
+
+def test_followers_get_their_own_copy_of_the_leaders_result():
+    async def main():
+        flight = SingleFlight()
+        future, leader = flight.claim("k")
+        follower_future, follower = flight.claim("k")
+        assert leader and not follower and follower_future is future
+        waiters = [asyncio.ensure_future(flight.wait(future)) for _ in range(2)]
+        flight.resolve("k", {"lcnc_structure": [1]})
+        first, second = await asyncio.gather(*waiters)
+        first["lcnc_structure"].append(2)
+        assert second == {"lcnc_structure": [1]}
+        # Resolved keys start a new flight
+        assert flight.claim("k")[1]
+        return flight.stats()
+
+    assert asyncio.run(main()) == {"in_flight": 1, "executions": 2, "coalesced": 1}
+
+def test_leader_failure_reaches_followers():
+    async def main():
+        flight = SingleFlight()
+        future, _ = flight.claim("k")
+        waiter = asyncio.ensure_future(flight.wait(future))
+        flight.fail("k", RuntimeError("boom"))
+        with pytest.raises(RuntimeError, match="boom"):
+            await waiter
+        # Failing with nobody waiting must not warn or raise
+        flight.claim("j")
+        flight.fail("j", RuntimeError("unseen"))
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(main())
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    async def main():
+        flight = SingleFlight()
+        future, _ = flight.claim("k")
+        waiter = asyncio.ensure_future(flight.wait(future))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert not future.cancelled()
+        flight.resolve("k", {"ok": True})
+        assert future.result() == {"ok": True}
+
+    asyncio.run(main())
+
+def test_identical_concurrent_requests_run_once(monkeypatch):
+    runs = []
+
+    async def fake_pipeline(request):
+        runs.append(request.html_content)
+        await asyncio.sleep(0.05)
+        yield {"event": "result", "data": {"lcnc_structure": [{"type": "text"}], "analysis_report": {}}}
+
+    monkeypatch.setattr(app_module, "_pipeline_events", fake_pipeline)
+    monkeypatch.setattr(app_module, "get_result_cache", lambda cache=ResultCache(MemoryTier(10 ** 6, 60)): cache)
+    monkeypatch.setattr(app_module, "inflight", SingleFlight())
+    request = app_module.ConversionRequest(html_content="<p>same</p>", css_content="")
+
+    async def main():
+        return await asyncio.gather(*(app_module._run_conversion(request) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert runs == ["<p>same</p>"]
+    assert sorted(result["analysis_report"]["coalesced"] for result in results) == [False] + [True] * 4
+    assert all(result["lcnc_structure"] == [{"type": "text"}] for result in results)
@@ -0,0 +1,87 @@
+# ai/tests/test_site_bundle.py
+import io
+import json
+import asyncio
+import zipfile
+import pytest
+import site_bundle
+from site_bundle import SiteBundleError, read_bundle, inline_imports, page_stylesheets, convert_site_bundle
+
+def _zip(files, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+    return buffer.getvalue()
+
+def test_enclosing_folder_is_stripped_and_escaping_paths_dropped():
+    data = _zip({"site/index.html": "<p>hi</p>", "site/css/a.css": "p{}", "../evil.html": "x", "__MACOSX/site/._a": "x"})
+    assert sorted(read_bundle(data)) == ["css/a.css", "index.html"]
+
+def test_not_a_zip_is_a_400():
+    with pytest.raises(SiteBundleError) as e:
+        read_bundle(b"plain text")
+    assert e.value.status_code == 400
+
+def test_corrupt_entry_is_a_400():
+    content = b"<p>" + b"hello " * 200 + b"</p>"
+    data = bytearray(_zip({"index.html": content}, zipfile.ZIP_STORED))
+    # Flip a byte of the stored entry so its CRC no longer matches
+    i = bytes(data).index(b"hello")
+    data[i] ^= 0xFF
+    with pytest.raises(SiteBundleError) as e:
+        read_bundle(bytes(data))
+    assert e.value.status_code == 400
+    assert "index.html" in str(e.value)
+
+def test_file_limit_is_a_413(monkeypatch):
+    monkeypatch.setattr(site_bundle, "BUNDLE_MAX_FILES", 2)
+    with pytest.raises(SiteBundleError) as e:
+        read_bundle(_zip({f"{i}.html": "x" for i in range(3)}))
+    assert e.value.status_code == 413
+
+def test_inline_imports_resolves_media_external_missing_and_cycles():
+    files = {
+        "css/main.css": b"@import 'base.css'; @import url(print.css) print; @import 'https://cdn/x.css'; @import 'gone.css';",
+        "css/base.css": b"body{margin:0} @import '/css/main.css';",
+        "css/print.css": b"p{color:black}"
+    }
+    warnings = []
+    css, imported = inline_imports(files, "css/main.css", files["css/main.css"].decode(), warnings)
+    assert "body{margin:0}" in css
+    assert "@media print {\np{color:black}\n}" in css
+    assert "@import 'https://cdn/x.css';" in css
+    assert "@import 'gone.css';" in css
+    assert imported == ["css/base.css", "css/print.css"]
+    assert any("circular" in w for w in warnings) and any("gone.css" in w for w in warnings)
+
+def test_page_stylesheets_in_cascade_order():
+    files = {"css/a.css": b"a{}"}
+    html = '<link rel="stylesheet" href="css/a.css"><style>b{}</style><link rel="stylesheet" href="missing.css">'
+    warnings = []
+    sheets = page_stylesheets(files, "index.html", html, warnings)
+    assert [sheet["id"] for sheet in sheets] == ["css/a.css", "index.html#style-1"]
+    assert warnings == ["index.html: stylesheet missing.css not found in bundle"]
+
+def test_shared_stylesheet_is_parsed_once(monkeypatch):
+    parses = []
+
+    async def fake_parse(args):
+        parses.append(args["css_content"])
+        return json.dumps({"rules": args["css_content"]})
+
+    async def fake_pipelined(html, css, stages=None, css_data=None):
+        styles = await css_data
+        yield {"event": "result", "data": {"lcnc_structure": [{"html": html, "styles": styles}], "analysis_report": {}}}
+
+    monkeypatch.setattr(site_bundle, "parse_css_styles", fake_parse)
+    monkeypatch.setattr(site_bundle, "astream_pipelined", fake_pipelined)
+    page = '<link rel="stylesheet" href="/site.css"><p>{}</p>'
+    data = _zip({f"p{i}.html": page.format(i) for i in range(5)} | {"site.css": "p{}", "logo.png": b"\x89PNG"})
+    manifest = asyncio.run(convert_site_bundle(data, "demo", ["html_parser"], concurrency=3))
+    assert parses == ["p{}"]
+    assert [record["path"] for record in manifest["pages"]] == [f"p{i}.html" for i in range(5)]
+    assert manifest["project"]["stylesheet_parses"] == 1
+    assert manifest["stylesheets"][0]["used_by"] == [f"p{i}.html" for i in range(5)]
+    assert [asset["path"] for asset in manifest["assets"]] == ["logo.png"]
+    assert manifest["error"] is None
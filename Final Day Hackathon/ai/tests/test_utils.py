@@ -0,0 +1,20 @@
+# ai/tests/test_utils.py
+import json
+from utils import prompt_batches
+
+def test_prompt_batches_keep_every_component_within_the_limit():
+    items = [{"id": i, "text": "x" * 40} for i in range(50)]
+    batches = prompt_batches(items, limit=300)
+    assert len(batches) > 1
+    assert all(len(batch) <= 300 for batch in batches)
+    assert [item for batch in batches for item in json.loads(batch)] == items
+
+def test_oversized_component_gets_a_batch_of_its_own():
+    items = [{"id": 0}, {"id": 1, "text": "x" * 500}, {"id": 2}]
+    batches = prompt_batches(items, limit=100)
+    assert [json.loads(batch) for batch in batches] == [[items[0]], [items[1]], [items[2]]]
+    assert "TRUNCATED" not in "".join(batches)
+
+def test_empty_or_small_payload_is_one_batch():
+    assert prompt_batches([]) == ["[]"]
+    assert prompt_batches([{"a": 1}]) == [json.dumps([{"a": 1}])]
@@ -0,0 +1,86 @@
+# ai/tests/test_workflow_graphs.py
+import time
+import asyncio
+import threading
+import weakref
+import pytest
+import agent
+
+pytest.importorskip("langgraph.checkpoint.sqlite.aio")
+
+@pytest.fixture
+def checkpointing(tmp_path, monkeypatch):
+    built = []
+    connects = []
+    connect = agent.aiosqlite.connect
+
+    def fake_create(checkpointer=None, profile=agent.DEFAULT_PROFILE):
+        # Slow enough that concurrent first requests overlap
+        time.sleep(0.05)
+        built.append((profile, checkpointer))
+        return {"profile": profile, "checkpointer": checkpointer}
+
+    def counting_connect(*args, **kwargs):
+        connects.append(args)
+        return connect(*args, **kwargs)
+
+    monkeypatch.setattr(agent, "CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite3"))
+    monkeypatch.setattr(agent, "create_workflow_graph", fake_create)
+    monkeypatch.setattr(agent.aiosqlite, "connect", counting_connect)
+    monkeypatch.setattr(agent, "_checkpointed_graphs", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(agent, "_checkpoint_saver", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(agent, "_workflow_graphs", {})
+    monkeypatch.setattr(agent, "_workflow_ready", threading.Event())
+    return built, connects
+
+def test_concurrent_first_requests_share_one_connection_and_graph(checkpointing):
+    built, connects = checkpointing
+
+    async def main():
+        try:
+            return await asyncio.gather(*(agent.aget_workflow_graph("fast") for _ in range(8)))
+        finally:
+            await agent.aclose_workflow_checkpointer()
+
+    graphs = asyncio.run(main())
+    assert len(connects) == 1
+    assert [profile for profile, checkpointer in built if checkpointer is not None] == ["fast"]
+    assert all(graph is graphs[0] for graph in graphs)
+
+def test_warm_up_builds_the_checkpointed_graphs(checkpointing):
+    built, connects = checkpointing
+
+    async def main():
+        try:
+            await agent.awarm_up_workflow()
+            assert agent.is_workflow_ready()
+            graph = await agent.aget_workflow_graph("thorough")
+            assert graph["checkpointer"] is not None
+        finally:
+            await agent.aclose_workflow_checkpointer()
+
+    asyncio.run(main())
+    checkpointed = sorted(profile for profile, checkpointer in built if checkpointer is not None)
+    assert checkpointed == sorted(agent.PROFILES)
+    assert len(connects) == 1
+
+def test_alternating_loops_keep_their_own_connection_and_graphs(checkpointing):
+    built, connects = checkpointing
+    # E.g. the server's loop and the sync wrapper's background loop
+    server, background = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        first = server.run_until_complete(agent.aget_workflow_graph("fast"))
+        other = background.run_until_complete(agent.aget_workflow_graph("fast"))
+        again = server.run_until_complete(agent.aget_workflow_graph("fast"))
+        assert again is first and other is not first
+        assert len(connects) == 2
+        assert [profile for profile, checkpointer in built if checkpointer is not None] == ["fast", "fast"]
+        saver = agent._checkpoint_saver[server]
+        server.run_until_complete(agent.aclose_workflow_checkpointer())
+        # Closing one loop's connection leaves the other loop's in place
+        assert saver.conn._connection is None
+        assert server not in agent._checkpoint_saver and background in agent._checkpoint_saver
+        background.run_until_complete(agent.aclose_workflow_checkpointer())
+    finally:
+        server.close()
+        background.close()
@@ -1,11 +1,15 @@
 # ai/utils.py
 import os
+import re
+import json
 from typing import Dict, List, Any, Optional
 from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.tools import Tool
+from langchain_core.callbacks import BaseCallbackHandler
 import logging
 from dotenv import load_dotenv
+import metrics
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,8 +22,62 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     logger.warning("No OpenAI API key found in environment variables!")
 
+# Model used by every agent and tool
+LLM_MODEL = os.getenv("LCNC_LLM_MODEL", "gpt-3.5-turbo")
+
+# Bump whenever agent or tool prompts change so cached results are not reused
+PROMPT_TEMPLATE_VERSION = "2"
+
+# Largest component payload placed in one prompt (≈4 chars per token);
+# longer lists are sent in several batches whose results are merged
+PROMPT_MAX_CHARS = int(os.getenv("LCNC_PROMPT_MAX_CHARS", "12000"))
+
+# Shared LLM client, created once per process
+_llm: Optional[ChatOpenAI] = None
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Count LLM calls and token usage in the metrics module"""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def on_chat_model_start(self, *args: Any, **kwargs: Any) -> None:
+        metrics.record_llm_call(self.model)
+
+    def on_llm_start(self, *args: Any, **kwargs: Any) -> None:
+        metrics.record_llm_call(self.model)
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        if not usage:
+            # Providers that report usage on the message instead
+            for generations in response.generations:
+                for generation in generations:
+                    meta = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += meta.get("input_tokens", 0)
+                    completion_tokens += meta.get("output_tokens", 0)
+        metrics.record_llm_tokens(self.model, prompt_tokens, completion_tokens)
+
+class ReActIterationCallback(BaseCallbackHandler):
+    """Count a ReAct agent's steps (tool actions and the final answer) for a node"""
+
+    def __init__(self, node: str):
+        self.node = node
+
+    def on_agent_action(self, *args: Any, **kwargs: Any) -> None:
+        metrics.record_react_iteration(self.node)
+
+    def on_agent_finish(self, *args: Any, **kwargs: Any) -> None:
+        metrics.record_react_iteration(self.node)
+
 # Initialize OpenAI LLM
 def get_llm():
+    global _llm
+    if _llm is not None:
+        return _llm
+
     logger.info("Initializing OpenAI LLM...")
     if not OPENAI_API_KEY:
         logger.error("Cannot initialize LLM: No API key available")
@@ -29,11 +87,13 @@ def get_llm():
         # Initialize ChatOpenAI with GPT-4 Turbo
         logger.info("Initializing ChatOpenAI...")
         llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
+            model=LLM_MODEL,
             temperature=0.7,
-            openai_api_key=OPENAI_API_KEY
+            openai_api_key=OPENAI_API_KEY,
+            callbacks=[LLMMetricsCallback(LLM_MODEL)]
         )
         logger.info("ChatOpenAI initialized successfully")
+        _llm = llm
         return llm
     except Exception as e:
         logger.error(f"ChatOpenAI initialization failed: {str(e)}")
@@ -59,4 +119,59 @@ def normalize_to_list(val):
     elif val is None:
         return []
     else:
-        return [val]
\ No newline at end of file
+        return [val]
+
+def prompt_batches(items: List[Any], limit: int = PROMPT_MAX_CHARS) -> List[str]:
+    """JSON arrays of consecutive items, each at most limit chars, together holding every item.
+
+    An item that alone is longer than limit gets a batch of its own rather
+    than being cut.
+    """
+    batches: List[str] = []
+    current: List[str] = []
+    size = 2
+    for item in items:
+        text = json.dumps(item)
+        if current and size + len(text) + 2 > limit:
+            batches.append("[" + ", ".join(current) + "]")
+            current, size = [], 2
+        if len(text) + 2 > limit:
+            logger.warning(f"Component of {len(text)} chars exceeds LCNC_PROMPT_MAX_CHARS; sent in a batch of its own")
+        current.append(text)
+        size += len(text) + 2
+    if current or not batches:
+        batches.append("[" + ", ".join(current) + "]")
+    return batches
+
+def capped_executor(agent_executor: Any, state: Dict[str, Any]) -> Any:
+    """The executor to run a node with: limited to state["max_iterations"] when a deadline is close"""
+    cap = state.get("max_iterations")
+    if cap is not None and cap < agent_executor.max_iterations:
+        # AgentExecutor.copy() drops callback fields, so build a fresh executor
+        return type(agent_executor)(
+            agent=agent_executor.agent,
+            tools=agent_executor.tools,
+            verbose=agent_executor.verbose,
+            handle_parsing_errors=agent_executor.handle_parsing_errors,
+            max_iterations=cap,
+            callbacks=agent_executor.callbacks
+        )
+    return agent_executor
+
+def parse_llm_json(output: str, source: str = "llm_output") -> Any:
+    """Parse JSON from LLM output, falling back to the outermost {...} block.
+
+    Raises ValueError when no JSON can be recovered. Each fallback is
+    counted under source in the parse-fallback metric.
+    """
+    try:
+        return json.loads(output)
+    except (json.JSONDecodeError, ValueError, TypeError) as e:
+        json_match = re.search(r'\{[\s\S]*\}', output or "")
+        if json_match:
+            metrics.record_parse_fallback(source)
+            try:
+                return json.loads(json_match.group(0))
+            except (json.JSONDecodeError, ValueError):
+                pass
+        raise ValueError(f"No JSON in LLM output: {str(e)}")
@@ -13,26 +13,54 @@ app.use(cors({
 }));
 
 app.post('/upload', upload.single('file'), async (req, res) => {
+  const filePath = req.file.path;
+  try {
+    // Stream the file as-is; the AI service enforces size limits while it reads
+    const aiRes = await fetch('http://localhost:8000/convert/upload', {
+      method: 'POST',
+      headers: { 'Content-Type': 'text/html; charset=utf-8', 'Content-Length': String(req.file.size) },
+      body: fs.createReadStream(filePath)
+    });
+    const aiData = await aiRes.json();
+    res.status(aiRes.status).json(aiData);
+  } catch (err) {
+    res.status(500).json({ error: 'Failed to process with AI agent', details: err.message });
+  } finally {
+    fs.unlink(filePath, () => {}); // Clean up uploaded file
+  }
+});
+
+// Queue large pages as background jobs instead of holding the request open
+app.post('/upload/async', upload.single('file'), async (req, res) => {
   const filePath = req.file.path;
   try {
     const htmlContent = await fs.promises.readFile(filePath, 'utf8');
-    // If you want to extract CSS separately, do so here. For now, just send empty string.
     const cssContent = "";
 
-    const aiRes = await fetch('http://localhost:8000/convert', {
+    const aiRes = await fetch('http://localhost:8000/jobs', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ html_content: htmlContent, css_content: cssContent })
     });
     const aiData = await aiRes.json();
-    res.json(aiData);
+    res.status(aiRes.status).json(aiData);
   } catch (err) {
-    res.status(500).json({ error: 'Failed to process with AI agent', details: err.message });
+    res.status(500).json({ error: 'Failed to queue AI job', details: err.message });
   } finally {
     fs.unlink(filePath, () => {}); // Clean up uploaded file
   }
 });
 
+app.get('/jobs/:id', async (req, res) => {
+  try {
+    const aiRes = await fetch(`http://localhost:8000/jobs/${encodeURIComponent(req.params.id)}`);
+    const aiData = await aiRes.json();
+    res.status(aiRes.status).json(aiData);
+  } catch (err) {
+    res.status(500).json({ error: 'Failed to fetch AI job', details: err.message });
+  }
+});
+
 app.listen(5000, () => {
   console.log('Backend listening on port 5000');
 });
\ No newline at end of file